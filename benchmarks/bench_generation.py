@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+MockGen Benchmarks - Reproducible generation throughput suite
+Measures records/s, bytes/s, peak RSS and startup time across record counts,
+synthetic model sizes, output formats and verifier worker counts
+
+Usage:
+    # Run the quick suite and save the results
+    python benchmarks/bench_generation.py --quick --output benchmarks/results.json
+    
+    # Compare a run against a stored baseline (exit code 1 on regressions)
+    python benchmarks/bench_generation.py --baseline benchmarks/baseline.json --output results.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import string
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from src.mockgen.plan import WGS_TEMPLATE_FIELDS  # noqa: E402
+
+BENCH_MODEL = "Bench"
+
+# Synthetic model sizes: extra fields beyond the WGS template, values per pool, ClaimDetails fields
+MODEL_SIZES = {
+    "small": {"extra_fields": 0, "pool_size": 4, "claim_fields": 3},
+    "wide": {"extra_fields": 200, "pool_size": 16, "claim_fields": 20},
+    "large_pools": {"extra_fields": 20, "pool_size": 50000, "claim_fields": 5},
+}
+
+# JSON writes one file per record, so it runs at smaller counts than the streaming formats
+FULL_SUITE = {
+    "counts": {"json": [2000, 20000], "ndjson": [20000, 200000], "csv": [20000, 200000],
+               "sqlite": [20000, 200000]},
+    "sizes": ["small", "wide", "large_pools"],
+    "verify_workers": [1, 2, 4],
+}
+QUICK_SUITE = {
+    "counts": {"json": [1000], "ndjson": [20000], "csv": [20000], "sqlite": [20000]},
+    "sizes": ["small", "wide"],
+    "verify_workers": [1, 2],
+}
+
+# Relative change beyond which a metric counts as a regression
+DEFAULT_THRESHOLD = 0.10
+HIGHER_IS_BETTER = {"records_per_s": True, "bytes_per_s": True, "peak_rss_kb": False, "startup_s": False}
+
+
+def _random_value(rng: random.Random, length: int) -> str:
+    return "".join(rng.choice(string.ascii_letters + string.digits) for _ in range(length))
+
+
+def make_config(extra_fields: int, pool_size: int, claim_fields: int, seed: int = 0) -> Dict[str, Any]:
+    """Build a deterministic synthetic config for the benchmark model.
+    
+    Args:
+        extra_fields: Number of non-template fields added after the template fields
+        pool_size: Number of values in every pool
+        claim_fields: Number of fields in the ClaimDetails line
+        seed: Seed for the generated values
+    
+    Returns:
+        Config dictionary with a Bench_positive section
+    """
+    rng = random.Random(seed)
+    fields = [field for field in WGS_TEMPLATE_FIELDS if field != "ClaimDetails"]
+    fields += [f"extra_field_{n:03d}" for n in range(extra_fields)]
+    
+    data: Dict[str, Any] = {}
+    for field in fields:
+        data[field] = [_random_value(rng, rng.randint(4, 24)) for _ in range(pool_size)]
+    data["ClaimDetails"] = [{
+        f"claim_field_{n:02d}": [_random_value(rng, rng.randint(2, 12)) for _ in range(pool_size)]
+        for n in range(claim_fields)
+    }]
+    return {f"{BENCH_MODEL}_positive": data}
+
+
+def _run_child(case: Dict[str, Any]) -> Dict[str, Any]:
+    """Run one case in a fresh interpreter and collect its metrics and peak RSS."""
+    command = [sys.executable, str(Path(__file__).resolve()), "--child", json.dumps(case)]
+    started = time.perf_counter()
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, cwd=str(ROOT))
+    output = process.stdout.read()
+    process.stdout.close()
+    if hasattr(os, "wait4"):
+        _, status, usage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status) if hasattr(os, "waitstatus_to_exitcode") else status
+        # ru_maxrss is in KiB on Linux and in bytes on macOS
+        peak_rss_kb = usage.ru_maxrss // 1024 if sys.platform == "darwin" else usage.ru_maxrss
+    else:
+        process.wait()
+        peak_rss_kb = None
+    wall = time.perf_counter() - started
+    if process.returncode != 0:
+        raise RuntimeError(f"Benchmark case {case['id']} failed with exit code {process.returncode}")
+    
+    result = json.loads(output.decode("utf-8").strip().splitlines()[-1])
+    result["peak_rss_kb"] = peak_rss_kb
+    result["process_s"] = wall
+    return result
+
+
+def child_main(case: Dict[str, Any]) -> None:
+    """Entry point of the benchmark subprocess: import, generate or verify, report JSON."""
+    imported = time.perf_counter()
+    from src.mockgen.core import MockGenCore
+    
+    core = MockGenCore(case["config"], case["output_dir"])
+    ready = time.perf_counter()
+    
+    if case["kind"] == "verify":
+        core.generate_probability_scenarios("positive", BENCH_MODEL, case["count"], True, output_format="ndjson")
+        started = time.perf_counter()
+        report = core.verify_outputs(None, BENCH_MODEL, case["workers"])
+        elapsed = time.perf_counter() - started
+        if report["violation_count"]:
+            raise SystemExit(f"Verification found {report['violation_count']} violation(s)")
+        records = report["records"]
+    else:
+        started = time.perf_counter()
+        core.generate_probability_scenarios("positive", BENCH_MODEL, case["count"], True,
+                                            output_format=case["format"])
+        elapsed = time.perf_counter() - started
+        records = case["count"]
+    
+    total_bytes = sum(entry.stat().st_size for entry in Path(case["output_dir"]).iterdir() if entry.is_file())
+    print(json.dumps({
+        "records": records,
+        "bytes": total_bytes,
+        "elapsed_s": elapsed,
+        "records_per_s": records / elapsed if elapsed > 0 else 0.0,
+        "bytes_per_s": total_bytes / elapsed if elapsed > 0 else 0.0,
+        "import_and_load_s": ready - imported,
+    }))
+
+
+def measure_startup(config: Path, repeat: int) -> float:
+    """Return the best wall time of a CLI invocation that only loads the config."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-m", "src.mockgen.cli", "--list", "--config", str(config)],
+                       cwd=str(ROOT), stdout=subprocess.DEVNULL, check=True)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def build_cases(suite: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Expand a suite definition into individual benchmark cases."""
+    cases = []
+    for size in suite["sizes"]:
+        for output_format, counts in suite["counts"].items():
+            for count in counts:
+                cases.append({"id": f"generate/{size}/{output_format}/{count}", "kind": "generate",
+                              "size": size, "format": output_format, "count": count})
+        for workers in suite["verify_workers"]:
+            count = suite["counts"]["ndjson"][0]
+            cases.append({"id": f"verify/{size}/workers={workers}/{count}", "kind": "verify",
+                          "size": size, "format": "ndjson", "count": count, "workers": workers})
+    return cases
+
+
+def run_suite(suite: Dict[str, Any], repeat: int = 3, pattern: Optional[str] = None) -> Dict[str, Any]:
+    """Run every case of a suite, keeping the best of `repeat` runs per metric.
+    
+    Returns:
+        Results with environment details and a metrics dictionary per case id
+    """
+    workdir = Path(tempfile.mkdtemp(prefix="mockgen-bench-"))
+    results: Dict[str, Any] = {}
+    try:
+        configs = {}
+        for size in suite["sizes"]:
+            configs[size] = workdir / f"{size}.json"
+            with configs[size].open("w", encoding="utf-8") as f:
+                json.dump(make_config(**MODEL_SIZES[size]), f)
+            results[f"startup/{size}"] = {"startup_s": measure_startup(configs[size], repeat)}
+            print(f"startup/{size}: {results[f'startup/{size}']['startup_s'] * 1000:.1f} ms")
+        
+        for case in build_cases(suite):
+            if pattern and pattern not in case["id"]:
+                continue
+            runs = []
+            for _ in range(repeat):
+                output_dir = workdir / "out"
+                shutil.rmtree(output_dir, ignore_errors=True)
+                output_dir.mkdir()
+                runs.append(_run_child(dict(case, config=str(configs[case["size"]]), output_dir=str(output_dir))))
+            rss = [run["peak_rss_kb"] for run in runs if run["peak_rss_kb"] is not None]
+            metrics = {
+                "records": runs[0]["records"],
+                "bytes": runs[0]["bytes"],
+                "records_per_s": max(run["records_per_s"] for run in runs),
+                "bytes_per_s": max(run["bytes_per_s"] for run in runs),
+                "peak_rss_kb": min(rss) if rss else None,
+            }
+            results[case["id"]] = metrics
+            print(f"{case['id']}: {metrics['records_per_s']:,.0f} rec/s, "
+                  f"{metrics['bytes_per_s'] / 1024 ** 2:,.1f} MiB/s, peak RSS {metrics['peak_rss_kb']} KiB")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    
+    return {"environment": environment(), "repeat": repeat, "results": results}
+
+
+def environment() -> Dict[str, Any]:
+    """Describe the machine and revision the results were measured on."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=str(ROOT), capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float = DEFAULT_THRESHOLD) -> List[str]:
+    """Compare results against a baseline.
+    
+    Args:
+        current: Results of this run
+        baseline: Stored baseline results
+        threshold: Relative change beyond which a metric is flagged
+    
+    Returns:
+        One message per regressed metric
+    """
+    regressions = []
+    for case_id, metrics in current["results"].items():
+        reference = baseline["results"].get(case_id)
+        if reference is None:
+            continue
+        for metric, higher_is_better in HIGHER_IS_BETTER.items():
+            new, old = metrics.get(metric), reference.get(metric)
+            if not new or not old:
+                continue
+            change = (new - old) / old
+            if (higher_is_better and change < -threshold) or (not higher_is_better and change > threshold):
+                regressions.append(f"{case_id} {metric}: {old:,.3f} -> {new:,.3f} ({100 * change:+.1f}%)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MockGen generation throughput benchmarks")
+    parser.add_argument("--quick", action="store_true", help="Run the smaller suite")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per case; the best one is kept (default: 3)")
+    parser.add_argument("--filter", type=str, default=None, help="Only run cases whose id contains this text")
+    parser.add_argument("--output", type=str, default=None, help="Write the results JSON to this file")
+    parser.add_argument("--baseline", type=str, default=None, help="Baseline results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Relative change flagged as a regression (default: 0.10)")
+    parser.add_argument("--child", type=str, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.child:
+        child_main(json.loads(args.child))
+        return
+    
+    results = run_suite(QUICK_SUITE if args.quick else FULL_SUITE, args.repeat, args.filter)
+    
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+    
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {100 * args.threshold:.0f}%:")
+            for message in regressions:
+                print(f"  {message}")
+            sys.exit(1)
+        print(f"\nNo regressions beyond {100 * args.threshold:.0f}% against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Stand-in HTTP server for exercising replay mode locally
+Accepts POSTed claims over HTTP/1.1 keep-alive connections and answers 202 Accepted
+"""
+
+import argparse
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class ClaimHandler(BaseHTTPRequestHandler):
+    """Reads the request body and acknowledges it without further processing."""
+    
+    protocol_version = "HTTP/1.1"
+    received = 0
+    lock = threading.Lock()
+    
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        with ClaimHandler.lock:
+            ClaimHandler.received += 1
+        self.send_response(202)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+    
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    """Run the stand-in server until interrupted"""
+    parser = argparse.ArgumentParser(description="Stand-in claims intake server for replay testing")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Bind address (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8080, help="Port to listen on (default: 8080)")
+    args = parser.parse_args()
+    
+    server = ThreadingHTTPServer((args.host, args.port), ClaimHandler)
+    server.daemon_threads = True
+    print(f"Listening on http://{args.host}:{args.port}/ (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"\nReceived {ClaimHandler.received} request(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+"""
+Behavioural tests for the generation invariants: determinism, verification,
+incremental patching, coverage, sizing, sinks and the record index
+"""
+
+import asyncio
+import csv
+import itertools
+import json
+import random
+import sqlite3
+import sys
+from collections import Counter
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from src.mockgen.cache import DatasetCache
+from src.mockgen.core import MockGenCore
+from src.mockgen.infer import FieldSketch, infer_config
+from src.mockgen.plan import WgsPlan, flatten_value
+
+CONFIG = ROOT / "user_input.json"
+MODEL = "Model_1"
+SEED = 7
+
+
+def make_core(tmp_path, name="out", config=CONFIG, cache=None):
+    """Core writing into its own subdirectory of tmp_path."""
+    return MockGenCore(config, str(tmp_path / name), cache)
+
+
+def read_ndjson(paths):
+    """Parse every line of the given NDJSON files."""
+    return [json.loads(line) for path in paths for line in Path(path).read_text(encoding="utf-8").splitlines()]
+
+
+def body(record):
+    """WGS body of a record."""
+    return next(iter(record.values()))
+
+
+def write_config(tmp_path, edit):
+    """Copy the default config, let `edit` change it and return the copy's path."""
+    config = json.loads(CONFIG.read_text(encoding="utf-8"))
+    edit(config)
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps(config), encoding="utf-8")
+    return path
+
+
+def test_seeded_runs_share_manifest_root(tmp_path):
+    """Sync, async and merged sharded runs of one seed produce the same manifest root."""
+    options = {"manifest": True, "output_format": "ndjson", "seed": SEED}
+    sync = make_core(tmp_path, "sync")
+    sync.generate_probability_scenarios("positive", MODEL, 100, True, **options)
+    again = make_core(tmp_path, "again")
+    again.generate_probability_scenarios("positive", MODEL, 100, True, **options)
+    
+    async_core = make_core(tmp_path, "async")
+    asyncio.run(async_core.agenerate("positive", MODEL, 100, True, chunk=16, **options))
+    
+    sharded = make_core(tmp_path, "sharded")
+    for shard in range(1, 4):
+        sharded.generate_probability_scenarios("positive", MODEL, 100, True, shard=(shard, 3), **options)
+    merged = sharded.merge_shard_manifests()
+    
+    root = sync.manifests[0]["root"]
+    assert again.manifests[0]["root"] == root
+    assert async_core.manifests[0]["root"] == root
+    assert [entry["root"] for entry in merged] == [root]
+    assert merged[0]["records"] == 100
+
+
+@pytest.mark.parametrize("output_format", ["json", "ndjson"])
+def test_verify_accepts_generated_output(tmp_path, output_format):
+    core = make_core(tmp_path)
+    core.generate_all_scenarios(MODEL, 20, True, output_format=output_format, seed=SEED)
+    report = core.verify_outputs(workers=1)
+    assert report["records"] == 60
+    assert report["violation_count"] == 0
+
+
+def test_verify_accepts_member_runs(tmp_path):
+    core = make_core(tmp_path)
+    core.generate_all_scenarios(MODEL, 50, True, output_format="ndjson", seed=SEED, members=5)
+    assert core.verify_outputs(workers=1)["violation_count"] == 0
+    
+    # A member keeps the same patient fields in every scenario type
+    patients = {}
+    for record in read_ndjson(sorted((tmp_path / "out").glob("*.jsonl"))):
+        fields = body(record)
+        patient = tuple(fields[field][0] for field in ("PAT_FRST_NME", "PAT_LAST_NME", "PAT_BRTH_DT"))
+        assert patients.setdefault(fields["MEMBER_ID"][0], patient) == patient
+
+
+def test_verify_reports_foreign_values(tmp_path):
+    core = make_core(tmp_path)
+    files = core.generate_probability_scenarios("positive", MODEL, 3, True, output_format="ndjson", seed=SEED)
+    records = read_ndjson(files)
+    body(records[0])["HCID"] = ["NOT-CONFIGURED"]
+    files[0].write_text("".join(json.dumps(record) + "\n" for record in records), encoding="utf-8")
+    report = core.verify_outputs(workers=1)
+    assert report["violation_count"] == 1
+
+
+def test_incremental_patch_matches_full_regeneration(tmp_path):
+    def rename(config):
+        for section in config.values():
+            if isinstance(section, dict) and section.get("PAT_LAST_NME") == ["Kumar"]:
+                section["PAT_LAST_NME"] = ["Kumaz"]
+    
+    base = write_config(tmp_path, lambda config: None)
+    core = make_core(tmp_path, "incremental", base)
+    core.generate_probability_scenarios("positive", MODEL, 30, True, output_format="json", seed=SEED,
+                                        incremental=True)
+    edited = write_config(tmp_path, rename)
+    core = make_core(tmp_path, "incremental", edited)
+    core.generate_probability_scenarios("positive", MODEL, 30, True, output_format="json", seed=SEED,
+                                        incremental=True)
+    assert core.incremental[0]["action"] == "patched"
+    assert core.incremental[0]["fields"] == ["PAT_LAST_NME"]
+    
+    full = make_core(tmp_path, "full", edited)
+    full.generate_probability_scenarios("positive", MODEL, 30, True, output_format="json", seed=SEED)
+    
+    def contents(directory):
+        files = sorted(directory.glob(f"{MODEL}_positive_*.json"), key=lambda path: int(path.stem.rsplit("_", 1)[1]))
+        return [path.read_bytes() for path in files]
+    
+    assert contents(tmp_path / "incremental") == contents(tmp_path / "full")
+
+
+def test_pairwise_coverage_contains_every_pair(tmp_path):
+    pools = {"city": ["Austin", "Boston", "Chicago"], "state": ["TX", "MA", "IL", "CA"],
+             "country": ["US", "CA"], "phone": ["1", "2", "3"]}
+    
+    def widen(config):
+        config[f"{MODEL}_positive"].update(pools)
+    
+    core = make_core(tmp_path, config=write_config(tmp_path, widen))
+    files = core.generate_probability_scenarios("positive", MODEL, 1, True, output_format="ndjson", coverage=2)
+    rows = [{field: body(record)[field][0] for field in pools} for record in read_ndjson(files)]
+    
+    for left, right in itertools.combinations(pools, 2):
+        seen = {(row[left], row[right]) for row in rows}
+        assert seen == set(itertools.product(pools[left], pools[right])), (left, right)
+    assert len(rows) < len(list(itertools.product(*pools.values())))
+
+
+def test_record_bytes_sizes_every_line_exactly(tmp_path):
+    core = make_core(tmp_path)
+    files = core.generate_probability_scenarios("positive", MODEL, 25, True, output_format="ndjson", seed=SEED,
+                                                record_bytes=2048)
+    lines = files[0].read_bytes().splitlines(keepends=True)
+    assert len(lines) == 25
+    assert {len(line) for line in lines} == {2048}
+
+
+def test_target_bytes_hits_exact_size_with_sized_records(tmp_path):
+    core = make_core(tmp_path)
+    files = core.generate_probability_scenarios("positive", MODEL, 1, True, output_format="ndjson", seed=SEED,
+                                                record_bytes=1024, target_bytes=40 * 1024)
+    assert files[0].stat().st_size == 40 * 1024
+
+
+def seeded_records(tmp_path, count):
+    """Record bodies of a seeded NDJSON run, the reference for the other sinks."""
+    core = make_core(tmp_path, "reference")
+    files = core.generate_probability_scenarios("positive", MODEL, count, True, output_format="ndjson", seed=SEED)
+    return [body(record) for record in read_ndjson(files)]
+
+
+def cell(value):
+    """A record value as a CSV/SQLite cell."""
+    value = flatten_value(value)
+    return "" if value is None else str(value)
+
+
+def test_csv_round_trip(tmp_path):
+    expected = seeded_records(tmp_path, 20)
+    core = make_core(tmp_path)
+    files = core.generate_probability_scenarios("positive", MODEL, 20, True, output_format="csv", seed=SEED)
+    main_file = next(path for path in files if not path.stem.endswith("_ClaimDetails"))
+    details_file = next(path for path in files if path.stem.endswith("_ClaimDetails"))
+    
+    with main_file.open(encoding="utf-8", newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert [int(row["record_number"]) for row in rows] == list(range(1, 21))
+    for row, record in zip(rows, expected):
+        for field, value in record.items():
+            if field != "ClaimDetails":
+                assert row[field] == cell(value), field
+    
+    with details_file.open(encoding="utf-8", newline="") as f:
+        lines = list(csv.DictReader(f))
+    for line in lines:
+        claim = expected[int(line["record_number"]) - 1]["ClaimDetails"][int(line["line_number"]) - 1]
+        for field, value in claim.items():
+            assert line[field] == cell(value), field
+
+
+def test_sqlite_round_trip(tmp_path):
+    expected = seeded_records(tmp_path, 20)
+    core = make_core(tmp_path)
+    files = core.generate_probability_scenarios("positive", MODEL, 20, True, output_format="sqlite", seed=SEED)
+    
+    conn = sqlite3.connect(str(files[0]))
+    conn.row_factory = sqlite3.Row
+    try:
+        rows = conn.execute("SELECT * FROM claims ORDER BY record_number").fetchall()
+        assert len(rows) == 20
+        for row, record in zip(rows, expected):
+            assert row["probability_type"] == "positive"
+            for field, value in record.items():
+                if field != "ClaimDetails":
+                    assert cell(row[field]) == cell(value), field
+    finally:
+        conn.close()
+
+
+def test_x12_round_trip(tmp_path):
+    expected = seeded_records(tmp_path, 12)
+    core = make_core(tmp_path)
+    files = core.generate_probability_scenarios("positive", MODEL, 12, True, output_format="x12", seed=SEED)
+    segments = files[0].read_text(encoding="ascii").split("~")[:-1]
+    
+    assert segments[0].startswith("ISA*") and segments[-1].startswith("IEA*1*")
+    claims = [segment.split("*") for segment in segments if segment.startswith("CLM*")]
+    assert [int(claim[1]) for claim in claims] == list(range(1, 13))
+    
+    subscribers = [segment.split("*") for segment in segments if segment.startswith("NM1*IL*")]
+    for subscriber, record in zip(subscribers, expected):
+        assert subscriber[3] == record["PAT_LAST_NME"][0]
+        assert subscriber[4] == record["PAT_FRST_NME"][0]
+        assert subscriber[9] == record["HCID"][0]
+    
+    # SE01 counts the segments of its transaction, ST and SE included
+    start = None
+    for number, segment in enumerate(segments):
+        if segment.startswith("ST*"):
+            start = number
+        elif segment.startswith("SE*"):
+            assert int(segment.split("*")[1]) == number - start + 1
+
+
+def test_x12_runs_never_overwrite_each_other(tmp_path):
+    core = make_core(tmp_path)
+    first = core.generate_probability_scenarios("positive", MODEL, 2, True, output_format="x12")
+    second = core.generate_probability_scenarios("positive", MODEL, 2, True, output_format="x12")
+    assert first[0] != second[0]
+    assert first[0].exists() and second[0].exists()
+
+
+def test_index_query_returns_matching_records(tmp_path):
+    core = make_core(tmp_path)
+    core.generate_all_scenarios(MODEL, 15, True, output_format="ndjson", seed=SEED, index=True)
+    
+    negatives = list(core.query_records(["probability_type=negative"]))
+    assert len(negatives) == 15
+    assert all(json.loads(match["record"]).keys() == {"WGS_csbd_medicaid_negative"} for match in negatives)
+    
+    hcid = WgsPlan(core._get_probability_data(MODEL, "exclusion"), "exclusion").build()
+    hcid = body(hcid)["HCID"][0]
+    matches = list(core.query_records([f"HCID={hcid}", f"model={MODEL}"]))
+    assert matches and all(body(json.loads(match["record"]))["HCID"] == [hcid] for match in matches)
+    assert list(core.query_records(["HCID=NOT-CONFIGURED"])) == []
+
+
+def test_index_follows_output_outside_output_dir(tmp_path):
+    core = make_core(tmp_path)
+    elsewhere = tmp_path / "elsewhere"
+    elsewhere.mkdir()
+    core.generate_probability_scenarios("positive", MODEL, 5, True, output_format="ndjson",
+                                        output=str(elsewhere / "records.jsonl"), index=True)
+    assert len(list(core.query_records(["probability_type=positive"]))) == 5
+
+
+def test_output_rejects_formats_that_cannot_stream(tmp_path):
+    core = make_core(tmp_path)
+    for output_format in ("csv", "tsv", "sqlite", "x12"):
+        with pytest.raises(ValueError):
+            core.generate_probability_scenarios("positive", MODEL, 2, True, output_format=output_format, output="-")
+
+
+def test_cache_serves_identical_files(tmp_path):
+    cache = DatasetCache(tmp_path / "cache")
+    first = make_core(tmp_path, "first", cache=cache)
+    files = first.generate_probability_scenarios("positive", MODEL, 10, True, output_format="csv", seed=SEED)
+    second = make_core(tmp_path, "second", cache=cache)
+    restored = second.generate_probability_scenarios("positive", MODEL, 10, True, output_format="csv", seed=SEED)
+    assert second.cache_hits == 1
+    assert [path.read_bytes() for path in restored] == [path.read_bytes() for path in files]
+    
+    # Restored files are copies, so rewriting one leaves the cache intact
+    restored[0].write_text("overwritten", encoding="utf-8")
+    third = make_core(tmp_path, "third", cache=cache)
+    again = third.generate_probability_scenarios("positive", MODEL, 10, True, output_format="csv", seed=SEED)
+    assert again[0].read_bytes() == files[0].read_bytes()
+
+
+def test_layered_config_is_kept_in_dataset_cache(tmp_path):
+    override = tmp_path / "override.json"
+    override.write_text(json.dumps({f"{MODEL}_positive": {"PAT_LAST_NME": {"append": ["Kumaz"]}}}), encoding="utf-8")
+    layers = [str(CONFIG), str(override)]
+    
+    assert not make_core(tmp_path, "uncached", layers).cache
+    cache = DatasetCache(tmp_path / "cache")
+    first = make_core(tmp_path, "first", layers, cache)
+    assert first.config[f"{MODEL}_positive"]["PAT_LAST_NME"] == ["Kumar", "Kumaz"]
+    entries = list((tmp_path / "cache").glob("*/*/entry.json"))
+    assert len(entries) == 1
+    
+    second = make_core(tmp_path, "second", layers, cache)
+    assert second.config == first.config
+    assert second.config_digest == first.config_digest
+    
+    # The merged config is an ordinary entry, evicted with the rest of the cache
+    DatasetCache(tmp_path / "cache", max_bytes=0).evict()
+    assert list((tmp_path / "cache").glob("*/*/entry.json")) == []
+
+
+def test_index_query_in_directory_with_uri_characters(tmp_path):
+    core = make_core(tmp_path, "odd dir?#%20")
+    core.generate_probability_scenarios("positive", MODEL, 4, True, output_format="ndjson", seed=SEED, index=True)
+    assert len(list(core.query_records(["probability_type=positive"]))) == 4
+
+
+def test_mutations_keep_value_fields_in_their_shape(tmp_path):
+    def add_values(config):
+        config[f"{MODEL}_positive"].update({"REF_CODE": "12345", "UNIT": "m²"})
+    
+    core = make_core(tmp_path, config=write_config(tmp_path, add_values))
+    files = core.generate_probability_scenarios("negative", MODEL, 400, True, output_format="ndjson", seed=SEED,
+                                                mutate=["type_swap"])
+    baselines = {"REF_CODE": "12345", "UNIT": "m²"}
+    seen = {field: set() for field in baselines}
+    for record in read_ndjson(files):
+        fields = body(record)
+        for field, baseline in baselines.items():
+            if record["_mutation"]["field"] == field:
+                seen[field].add(json.dumps(fields[field], ensure_ascii=False))
+            else:
+                assert fields[field] == baseline
+    # Mutants are written bare, like the value they replace; a one-element list is itself a type swap
+    assert seen == {"REF_CODE": {"12345", "null", "true", '["12345"]'}, "UNIT": {"2", "null", "true", '["m²"]'}}
+
+
+def test_field_sketch_keeps_misra_gries_bound():
+    from src.mockgen.infer import FieldSketch
+    
+    rng = random.Random(3)
+    stream = [str(rng.choice(range(6))) if rng.random() < 0.6 else str(rng.randrange(10 ** 6)) for _ in range(20000)]
+    sketch = FieldSketch(8)
+    for key in stream:
+        sketch.add(key, rng)
+        assert len(sketch.counters) <= 16
+    sketch.pool()
+    assert len(sketch.counters) <= 8
+    
+    bound = len(stream) / 9
+    for key, count in Counter(stream).items():
+        estimate = sketch.counters.get(key, 0)
+        assert count - bound <= estimate <= count
+
+
+def test_inference_is_independent_of_worker_count(tmp_path):
+    from src.mockgen.infer import infer_config
+    
+    core = make_core(tmp_path)
+    core.generate_all_scenarios(MODEL, 40, True, output_format="json", seed=SEED)
+    core.generate_all_scenarios(MODEL, 500, True, output_format="ndjson", seed=SEED)
+    paths = [tmp_path / "out"]
+    single = infer_config(paths, MODEL, workers=1, pool_size=4)
+    assert single["records"] == {"positive": 540, "negative": 540, "exclusion": 540}
+    for _ in range(3):
+        assert infer_config(paths, MODEL, workers=3, pool_size=4) == single
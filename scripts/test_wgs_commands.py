@@ -38,6 +38,10 @@ def test_cli_module():
         {
             "name": "All Scenarios",
             "cmd": ["python", "-m", "src.mockgen.cli", "--probability", "--all", "--model", "Model_1", "--wgs", "--count", "1"]
+        },
+        {
+            "name": "Verify Outputs",
+            "cmd": ["python", "-m", "src.mockgen.cli", "--verify", "--model", "Model_1"]
         }
     ]
     
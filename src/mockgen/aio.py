@@ -0,0 +1,170 @@
+"""
+MockGen Aio - asyncio front end for record generation
+Builds and writes records in executor chunks so generation can share an event loop with replay and test code
+"""
+
+import asyncio
+import contextlib
+import json
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Iterator, AsyncIterator, Callable
+
+from .manifest import ManifestWriter
+from .plan import COMPACT, WgsPlan
+
+
+# Records built or written per executor call; large enough to amortize the
+# hand-off, small enough that the loop is never starved for long
+CHUNK_SIZE = 1024
+
+
+def check_executor(executor: Optional[Executor]) -> None:
+    """Reject executors that run work in other processes.
+    
+    Chunks are pulled off one shared payload generator (and agenerate runs
+    bound core methods), neither of which can be pickled, so records must be
+    built in threads.
+    """
+    if isinstance(executor, ProcessPoolExecutor):
+        raise ValueError("Records are built in threads; pass a ThreadPoolExecutor (or None for the loop's "
+                         "default executor), not a ProcessPoolExecutor")
+
+
+def _take(iterator: Iterator[Any], size: int, decode: bool, lock: threading.Lock) -> List[Any]:
+    """Pull the next chunk of payloads (decoded into independent records if asked) off an iterator."""
+    with lock:
+        chunk = list(islice(iterator, size))
+    if decode:
+        return [json.loads(payload) for payload in chunk]
+    return chunk
+
+
+async def aiter_chunks(plan: WgsPlan, count: int, style: str = COMPACT, seed: Optional[int] = None,
+                       start: int = 1, chunk: int = CHUNK_SIZE, executor: Optional[Executor] = None,
+                       decode: bool = False) -> AsyncIterator[List[Any]]:
+    """Yield lists of up to `chunk` serialized records built in an executor.
+    
+    The next chunk is already being built while the consumer handles the
+    current one. Records are the same as plan.iter_payloads with the same
+    arguments.
+    
+    Args:
+        plan: Compiled WGS plan
+        count: Number of records
+        style: PRETTY or COMPACT serialization
+        seed: Seed for reproducible records
+        start: Number of the first record
+        chunk: Records per executor call
+        executor: Thread executor to build records in (default: the loop's default executor)
+        decode: Yield record dictionaries (each one independent) instead of bytes
+    """
+    check_executor(executor)
+    loop = asyncio.get_running_loop()
+    payloads = plan.iter_payloads(count, style, seed, start)
+    lock = threading.Lock()
+    pending = loop.run_in_executor(executor, _take, payloads, chunk, decode, lock)
+    try:
+        while True:
+            batch = await pending
+            if not batch:
+                break
+            pending = loop.run_in_executor(executor, _take, payloads, chunk, decode, lock)
+            yield batch
+    finally:
+        # A consumer that stops early leaves at most one chunk being built.
+        # Cancelling cannot stop a chunk already running in a worker thread,
+        # so let it finish before closing the generator it is advancing; the
+        # lock covers a chunk whose future was cancelled from outside.
+        with contextlib.suppress(Exception):
+            await pending
+        with lock:
+            payloads.close()
+
+
+async def aiter_payloads(plan: WgsPlan, count: int, style: str = COMPACT, seed: Optional[int] = None,
+                         start: int = 1, chunk: int = CHUNK_SIZE,
+                         executor: Optional[Executor] = None) -> AsyncIterator[bytes]:
+    """Yield serialized records one by one, built in executor chunks (see aiter_chunks)."""
+    async for batch in aiter_chunks(plan, count, style, seed, start, chunk, executor):
+        for payload in batch:
+            yield payload
+
+
+async def aiter_records(plan: WgsPlan, count: int, seed: Optional[int] = None, start: int = 1,
+                        chunk: int = CHUNK_SIZE, executor: Optional[Executor] = None) -> AsyncIterator[Dict[str, Any]]:
+    """Yield record dictionaries one by one, built in executor chunks (see aiter_chunks).
+    
+    Unlike WgsPlan.iter_records, every record is its own dictionary and may be kept.
+    """
+    async for batch in aiter_chunks(plan, count, COMPACT, seed, start, chunk, executor, decode=True):
+        for record in batch:
+            yield record
+
+
+class AsyncSink:
+    """Runs the blocking writes of a sink (and its manifest) off the event loop, one chunk per call.
+    
+    Every sink call runs on one dedicated writer thread, so writes stay in
+    order and sinks bound to their creating thread (SQLite) work. Calls must
+    not overlap: await each write before starting the next.
+    """
+    
+    def __init__(self, manifest_writer: Optional[ManifestWriter] = None):
+        self.sink: Any = None
+        self.manifest_writer = manifest_writer
+        self._thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mockgen-sink")
+    
+    @classmethod
+    async def open(cls, factory: Callable[[], Any],
+                   manifest_writer: Optional[ManifestWriter] = None) -> "AsyncSink":
+        """Create the sink returned by `factory` on the writer thread."""
+        writer = cls(manifest_writer)
+        try:
+            writer.sink = await asyncio.get_running_loop().run_in_executor(writer._thread, factory)
+        except BaseException:
+            writer._thread.shutdown(wait=False)
+            raise
+        return writer
+    
+    @property
+    def style(self) -> Optional[str]:
+        """Serialization style the sink accepts payloads in, or None if it needs record dictionaries."""
+        return self.sink.style
+    
+    def _write_chunk(self, first: int, chunk: List[Any]) -> int:
+        """Write one chunk inside the executor."""
+        sink = self.sink
+        manifest_writer = self.manifest_writer
+        written = 0
+        for i, item in enumerate(chunk, first):
+            if isinstance(item, bytes):
+                name, offset, payload = sink.write_payload(i, item)
+            else:
+                name, offset, payload = sink.write(i, item)
+            if payload is not None:
+                written += len(payload)
+            if manifest_writer is not None:
+                if payload is None:
+                    payload = json.dumps(item, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+                manifest_writer.add(i, name, offset, payload)
+        return written
+    
+    async def write(self, first: int, chunk: List[Any]) -> int:
+        """Write a chunk of payloads (or record dictionaries) numbered from `first`.
+        
+        Returns:
+            Number of serialized bytes the sink reported
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._thread, self._write_chunk, first, chunk)
+    
+    async def close(self) -> List[Path]:
+        """Close the sink, stop the writer thread and return the sink's files."""
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self._thread, self.sink.close)
+        finally:
+            self._thread.shutdown(wait=False)
@@ -0,0 +1,181 @@
+"""
+MockGen Cache - Content-addressed cache of generated datasets
+Seeded runs are keyed by config, template, parameters and seed so repeat requests can be served from disk
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+
+ENTRY_FILE = "entry.json"
+SIZE_UNITS = {"": 1, "B": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+
+
+def content_hash(value: Any) -> str:
+    """Hash a JSON-serializable value in canonical form."""
+    canonical = json.dumps(value, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def parse_size(size: str) -> int:
+    """Parse a size such as '512M', '10G' or '1048576' into bytes."""
+    text = str(size).strip().upper()
+    for suffix in ("IB", "B"):
+        if text.endswith(suffix) and len(text) > len(suffix):
+            text = text[:-len(suffix)]
+            break
+    unit = text[-1] if text and text[-1] in SIZE_UNITS else ""
+    number = text[:-1] if unit else text
+    try:
+        value = float(number) * SIZE_UNITS[unit]
+    except ValueError:
+        raise ValueError(f"Invalid size '{size}'. Expected e.g. 512M or 10G")
+    if value < 0:
+        raise ValueError(f"Size must not be negative, got '{size}'")
+    return int(value)
+
+
+def default_cache_dir() -> Path:
+    """Return the per-user cache directory for generated datasets."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return Path(base) / "mockgen" / "datasets"
+
+
+def _copy(source: Path, target: Path) -> None:
+    """Copy source to target as a new file.
+    
+    Never a hardlink: sinks rewrite, patch and append to their files in
+    place, which would otherwise change the cached dataset as well.
+    """
+    if target.exists():
+        target.unlink()
+    shutil.copyfile(source, target)
+
+
+class DatasetCache:
+    """Size-bounded LRU cache of generated output files.
+    
+    Each entry is a directory named by its key holding the generated files
+    and an entry.json with their names and total size. Entries are filled in
+    a temporary directory and renamed into place, so concurrent runs never
+    see a partial entry. A hit refreshes the entry's mtime, which is the
+    recency used for eviction.
+    """
+    
+    def __init__(self, root: Optional[Path] = None, max_bytes: int = 10 * 1024 ** 3):
+        self.root = Path(root) if root else default_cache_dir()
+        self.max_bytes = max_bytes
+        self.root.mkdir(parents=True, exist_ok=True)
+    
+    def _entry_dir(self, key: str) -> Path:
+        return self.root / key[:2] / key
+    
+    def lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the entry metadata for a key, marking it as recently used."""
+        entry_file = self._entry_dir(key) / ENTRY_FILE
+        try:
+            with entry_file.open("r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        os.utime(entry_file)
+        return entry
+    
+    def entry_files(self, key: str) -> Optional[List[Path]]:
+        """Return the paths of a cached entry's files in place, marking it as recently used.
+        
+        The files belong to the cache; callers must only read them.
+        """
+        entry = self.lookup(key)
+        if entry is None:
+            return None
+        return [self._entry_dir(key) / name for name in entry["files"]]
+    
+    def restore(self, key: str, output_dir: Path, stream: bool = False) -> Optional[Dict[str, Any]]:
+        """Serve a cached dataset.
+        
+        Files are copied into output_dir under their original
+        names. With stream=True the single cached NDJSON file is written to
+        stdout instead.
+        
+        Returns:
+            Dictionary with 'files' (restored paths) and 'manifest' (path or None), or None on a miss
+        """
+        entry = self.lookup(key)
+        if entry is None:
+            return None
+        entry_dir = self._entry_dir(key)
+        
+        if stream:
+            sys.stdout.flush()
+            with (entry_dir / entry["files"][0]).open("rb") as source:
+                shutil.copyfileobj(source, sys.stdout.buffer, 1024 * 1024)
+            sys.stdout.buffer.flush()
+            files: List[Path] = []
+        else:
+            files = []
+            for name in entry["files"]:
+                target = Path(output_dir) / name
+                _copy(entry_dir / name, target)
+                files.append(target)
+        
+        manifest = None
+        if entry.get("manifest"):
+            manifest = Path(output_dir) / entry["manifest"]
+            _copy(entry_dir / entry["manifest"], manifest)
+        
+        return {"files": files, "manifest": manifest}
+    
+    def store(self, key: str, files: List[Path], manifest: Optional[Path] = None) -> None:
+        """Add generated files to the cache and evict old entries beyond the size limit."""
+        entry_dir = self._entry_dir(key)
+        if entry_dir.exists():
+            return
+        entry_dir.parent.mkdir(parents=True, exist_ok=True)
+        
+        staging = Path(tempfile.mkdtemp(prefix=".staging-", dir=self.root))
+        try:
+            total = 0
+            for path in files + ([manifest] if manifest else []):
+                _copy(Path(path), staging / Path(path).name)
+                total += Path(path).stat().st_size
+            with (staging / ENTRY_FILE).open("w", encoding="utf-8") as f:
+                json.dump({
+                    "files": [Path(p).name for p in files],
+                    "manifest": Path(manifest).name if manifest else None,
+                    "bytes": total,
+                    "created": time.time(),
+                }, f, indent=2)
+            os.rename(staging, entry_dir)
+        except OSError:
+            # Another run stored the same key first, or the cache is unwritable
+            shutil.rmtree(staging, ignore_errors=True)
+            return
+        
+        self.evict()
+    
+    def evict(self) -> None:
+        """Remove least recently used entries until the cache fits in max_bytes."""
+        entries = []
+        total = 0
+        for entry_file in self.root.glob(f"*/*/{ENTRY_FILE}"):
+            try:
+                with entry_file.open("r", encoding="utf-8") as f:
+                    size = json.load(f).get("bytes", 0)
+                entries.append((entry_file.stat().st_mtime, size, entry_file.parent))
+            except (OSError, ValueError):
+                continue
+            total += size
+        
+        for _, size, entry_dir in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total -= size
@@ -5,8 +5,20 @@ Handles probability scenarios (positive, negative, exclusion) with count support
 """
 
 import argparse
+import json
+import os
 import sys
+from pathlib import Path
+from .cache import DatasetCache, parse_size
 from .core import MockGenCore
+from .infer import DEFAULT_POOL_SIZE, infer_config
+from .metrics import RunMetrics
+from .mutations import MUTATION_OPERATORS
+from .profiling import StageProfiler
+from .progress import ProgressReporter
+from .replay import parse_headers
+from .shards import parse_shard
+from .sinks import OUTPUT_FORMATS, CLAIM_LINE_MODES, DURABILITY_MODES
 
 
 def main():
@@ -39,9 +51,80 @@ Examples:
     # Generate all available scenario types with multiple records for Model_1 in WGS format
     python -m src.mockgen.cli --probability --all --model Model_1 --count 5 --wgs
     
+    # Generate 1000 positive scenarios with a content-hash manifest
+    python -m src.mockgen.cli --probability --positive --model Model_1 --count 1000 --wgs --manifest
+    
+    # Load 100000 records for every scenario type straight into generated_outputs/Model_1.sqlite
+    python -m src.mockgen.cli --probability --all --model Model_1 --count 100000 --wgs --format sqlite
+    
+    # Export 100000 positive records as CSV with claim lines exploded into rows
+    python -m src.mockgen.cli --probability --positive --model Model_1 --count 100000 --wgs --format csv --claim-lines exploded
+    
+    # 10 million seeded claims as one X12 837 file (ST/SE transactions of 5000 claims)
+    python -m src.mockgen.cli --probability --positive --model Model_1 --count 10000000 --wgs --format x12 --seed 7
+    
+    # Stream 1000000 positive records as NDJSON into another tool
+    python -m src.mockgen.cli --probability --positive --model Model_1 --count 1000000 --wgs --output - | my-loader
+    
+    # Reproducible dataset; repeat runs with the same config and seed are served from the cache
+    python -m src.mockgen.cli --probability --positive --model Model_1 --count 100000 --wgs --format ndjson --seed 42 --cache
+    
+    # Show where the time goes (config load, sampling, serialization, I/O) and dump a cProfile
+    python -m src.mockgen.cli --probability --positive --model Model_1 --count 100000 --wgs --profile --cprofile run.prof
+    
+    # Export run statistics for a Prometheus textfile collector and serve them while running
+    python -m src.mockgen.cli --probability --all --model Model_1 --count 1000000 --wgs --format ndjson --metrics-file /var/lib/node_exporter/mockgen.prom --metrics-port 9464
+    
+    # Derive 100000 negative records from the positive pools, one field corruption each
+    python -m src.mockgen.cli --probability --negative --model Model_1 --count 100000 --wgs --format ndjson --mutate
+    
+    # Only corrupt dates and emails
+    python -m src.mockgen.cli --probability --negative --model Model_1 --count 1000 --wgs --mutate invalid_date,malformed_email
+    
+    # Smallest record set in which every pair of field values appears at least once
+    python -m src.mockgen.cli --probability --positive --model Model_1 --wgs --format ndjson --coverage 2
+    
+    # 50 GiB of 4 KiB NDJSON records
+    python -m src.mockgen.cli --probability --positive --model Model_1 --wgs --format ndjson --target-bytes 50G --record-bytes 4K
+    
+    # Claims for 50000 recurring members, each MEMBER_ID always with the same patient, in every output
+    python -m src.mockgen.cli --probability --all --model all --count 1000000 --wgs --format ndjson --members 50000 --reuse zipf:1.2
+    
+    # Base config plus environment and team overrides, merged in order
+    python -m src.mockgen.cli --probability --all --model Model_1 --count 1000 --wgs --config user_input.json env/staging.json team/claims.json
+    
+    # Keep a seeded corpus in sync with user_input.json, rewriting only the records an edit changes
+    python -m src.mockgen.cli --probability --all --model Model_1 --count 100000 --wgs --seed 7 --incremental
+    
+    # Every scenario type of every model in the config, over 8 worker processes
+    python -m src.mockgen.cli --probability --all --model all --count 100000 --wgs --format ndjson --workers 8
+    
+    # Replay 100000 positive records to a claims intake API at 5000 requests/s
+    python -m src.mockgen.cli --probability --positive --model Model_1 --count 100000 --wgs --replay --url http://localhost:8080/claims --rate 5000/s
+    
+    # Split a seeded run across 4 hosts sharing /mnt/corpus, then merge the shard manifests
+    python -m src.mockgen.cli --probability --all --model Model_1 --count 500000000 --wgs --format ndjson --seed 7 --manifest --output-dir /mnt/corpus --shard 1/4
+    python -m src.mockgen.cli --merge-manifests --output-dir /mnt/corpus
+    
     # List available models
     python -m src.mockgen.cli --list
     
+    # Verify every generated record in the output directory against the config
+    python -m src.mockgen.cli --verify
+    
+    # Index records while generating, then look one up without scanning the corpus
+    python -m src.mockgen.cli --probability --all --model Model_1 --count 1000000 --wgs --format ndjson --index
+    python -m src.mockgen.cli --query probability_type=exclusion CLM_TYPE=OB
+    
+    # Index an existing corpus
+    python -m src.mockgen.cli --build-index --input generated_outputs/ --workers 8
+    
+    # Infer weighted pools from a legacy claims corpus into a new config
+    python -m src.mockgen.cli --infer --input legacy_claims/ claims.jsonl.tar.gz --model Model_2 --output inferred.json --workers 8
+    
+    # Verify JSONL files or archives with 8 worker processes
+    python -m src.mockgen.cli --verify --input corpus.jsonl corpus.tar.gz --workers 8
+    
 Note: All probability scenario generation now requires --wgs flag
         """
     )
@@ -57,18 +140,159 @@ Note: All probability scenario generation now requires --wgs flag
     scenario_group.add_argument("--exclusion", action="store_true", help="Generate exclusion scenarios")
     scenario_group.add_argument("--all", action="store_true", help="Generate all available scenario types")
     scenario_group.add_argument("--list", action="store_true", help="List available models")
+    scenario_group.add_argument("--verify", action="store_true",
+                               help="Verify generated records against the template and value pools")
+    scenario_group.add_argument("--infer", action="store_true",
+                               help="Infer a weighted config from sample records in --input and write it to "
+                                    "--output (default: stdout)")
+    scenario_group.add_argument("--build-index", action="store_true",
+                               help="Rebuild the inverted index of the output directory from the records in "
+                                    "--input (default: output directory)")
+    scenario_group.add_argument("--query", type=str, nargs="+", metavar="FIELD=VALUE",
+                               help="Print the indexed records matching all conditions, e.g. HCID=ABCDEFGHI "
+                                    "probability_type=exclusion")
+    scenario_group.add_argument("--merge-manifests", action="store_true",
+                               help="Merge the manifests of a --shard run (in --input or the output directory) "
+                                    "into one manifest per model and scenario type")
     
     # Optional arguments
-    parser.add_argument("--model", type=str, help="Model name to generate scenarios for")
+    parser.add_argument("--model", type=str,
+                       help="Model name to generate scenarios for; 'all' or a glob (e.g. 'Model_*') generates "
+                            "every matching model over a worker pool")
     parser.add_argument("--count", type=int, default=1, help="Number of JSON files to generate (default: 1)")
     parser.add_argument("--wgs", action="store_true", help="Use WGS format for output (complete template structure)")
-    parser.add_argument("--config", type=str, default="user_input.json", help="Path to config file")
+    parser.add_argument("--config", type=str, nargs="+", default=["user_input.json"],
+                       help="Path to config file, or a base config followed by override layers applied in order; "
+                            "a field replaces the pool below it unless given as {\"append\": [...]}; with --cache the "
+                            "merged config is kept in the dataset cache")
     parser.add_argument("--output-dir", type=str, default="generated_outputs", help="Output directory")
+    parser.add_argument("--format", type=str, choices=OUTPUT_FORMATS, default="json", dest="output_format",
+                       help="Output format: json (one file per record), sqlite (one database per model), "
+                            "csv/tsv (flat table per scenario type) or x12 (one 837 claim file per scenario type)")
+    parser.add_argument("--claim-lines", type=str, choices=CLAIM_LINE_MODES, default="linked",
+                       help="CSV/TSV only: write ClaimDetails to a linked file or explode them into rows (default: linked)")
+    parser.add_argument("--output", type=str, default=None,
+                       help="Stream NDJSON records (json/ndjson formats only) to this file (appended), "
+                            "or '-' for stdout; "
+                            "with --infer, the config file to write")
+    parser.add_argument("--target-bytes", type=str, default=None,
+                       help="JSON/NDJSON only: ignore --count and stop each scenario type once this much "
+                            "output was written, e.g. 50G")
+    parser.add_argument("--record-bytes", type=str, default=None,
+                       help="JSON/NDJSON only: grow every record to exactly this size with extra ClaimDetails "
+                            "lines and padding, e.g. 4K")
+    parser.add_argument("--durability", type=str, choices=DURABILITY_MODES, default="none",
+                       help="JSON only: fsync nothing (default), every batch of files, or every file")
+    parser.add_argument("--incremental", action="store_true",
+                       help="Seeded WGS runs only: compare the config with the previous --incremental run into "
+                            "the output directory and rewrite only the records (JSON files, or fixed-size "
+                            "NDJSON lines in place) whose fields changed")
+    parser.add_argument("--index", action="store_true",
+                       help="JSON/NDJSON only: add every record's field values to the output directory's "
+                            "inverted index for --query")
+    parser.add_argument("--members", type=int, default=None,
+                       help="WGS only: draw this many members once; every record carries one member's "
+                            "MEMBER_ID and PAT_* fields, identical across models and scenario types, so "
+                            "files join on MEMBER_ID (HCID stays with the scenario)")
+    parser.add_argument("--reuse", type=str, default="uniform",
+                       help="How records pick their member with --members: uniform (default), sequential "
+                            "or zipf[:exponent] (a few members hold most claims)")
+    parser.add_argument("--limit", type=int, default=100,
+                       help="Maximum number of records printed by --query (default: 100)")
+    parser.add_argument("--manifest", action="store_true",
+                       help="Write a content-hash manifest (index, file, offset, size, blake2b) per scenario type")
+    parser.add_argument("--seed", type=int, default=None,
+                       help="Seed for reproducible records (record n is the same in every run with this seed)")
+    parser.add_argument("--cache", action="store_true",
+                       help="Serve repeat seeded runs from the dataset cache and store new ones in it")
+    parser.add_argument("--cache-dir", type=str, default=None,
+                       help="Dataset cache directory (default: ~/.cache/mockgen/datasets)")
+    parser.add_argument("--cache-size", type=str, default="10G",
+                       help="Evict least recently used cached datasets beyond this size (default: 10G)")
+    parser.add_argument("--progress", action="store_true", default=None,
+                       help="Report records/s, bytes/s, ETA and CPU use while generating "
+                            "(default: on when stderr is a terminal)")
+    parser.add_argument("--no-progress", action="store_false", dest="progress",
+                       help="Never report progress")
+    parser.add_argument("--verbose", action="store_true",
+                       help="Print every generated file path")
+    parser.add_argument("--profile", type=str, nargs="?", const="text", choices=["text", "json"], default=None,
+                       help="Report time per stage (config, plan, sampling, serialization, io, manifest, close) "
+                            "as a table or JSON")
+    parser.add_argument("--cprofile", type=str, default=None,
+                       help="Run under cProfile and dump the stats to this .prof file")
+    parser.add_argument("--tracemalloc", type=str, default=None,
+                       help="Trace allocations and dump a tracemalloc snapshot to this file")
+    parser.add_argument("--metrics-file", type=str, default=None,
+                       help="Write run statistics in the OpenMetrics text format to this file at the end of the run")
+    parser.add_argument("--metrics-port", type=int, default=None,
+                       help="Serve run statistics at http://127.0.0.1:PORT/metrics while the run is in progress")
+    parser.add_argument("--mutate", type=str, nargs="?", const="all", default=None,
+                       help="Derive negative/exclusion records from the positive pools by corrupting one field "
+                            f"per record; optionally a comma-separated subset of: {', '.join(MUTATION_OPERATORS)}")
+    parser.add_argument("--coverage", type=int, choices=[1, 2], default=None,
+                       help="Emit a near-minimal covering array instead of --count random records: "
+                            "every pool value (1) or every pair of values across fields (2)")
+    parser.add_argument("--replay", action="store_true",
+                       help="POST generated records to --url at --rate instead of writing files")
+    parser.add_argument("--url", type=str, help="Replay target URL (http:// or https://)")
+    parser.add_argument("--rate", type=str, default="1000/s", help="Replay request rate, e.g. 5000/s (default: 1000/s)")
+    parser.add_argument("--concurrency", type=int, default=64,
+                       help="Maximum in-flight replay requests / keep-alive connections (default: 64)")
+    parser.add_argument("--header", type=str, action="append", default=[],
+                       help="Extra replay request header as 'Name: value' (repeatable)")
+    parser.add_argument("--shard", type=str, default=None,
+                       help="Generate only slice k of N of the record numbers (e.g. 3/16) into a shard-k-of-N "
+                            "subdirectory; requires --seed")
+    parser.add_argument("--input", type=str, nargs="+",
+                       help="Files, directories, JSONL files or archives to verify, index or infer pools from, "
+                            "or shard manifests to merge (default: output directory)")
+    parser.add_argument("--workers", type=int, default=None,
+                       help="Number of worker processes for --verify, --infer, --build-index and multi-model "
+                            "generation "
+                            "(default: one per CPU)")
+    parser.add_argument("--pool-size", type=int, default=DEFAULT_POOL_SIZE,
+                       help=f"--infer only: frequent values counted and sampled per field "
+                            f"(default: {DEFAULT_POOL_SIZE})")
+    parser.add_argument("--max-violations", type=int, default=20,
+                       help="Maximum number of violations to print when verifying (default: 20)")
     
     args = parser.parse_args()
     
+    # Records own stdout when streaming, so status messages go to stderr
+    log = sys.stderr if args.output == "-" or (args.infer and not args.output) else sys.stdout
+    if args.output and args.output_format == "json":
+        args.output_format = "ndjson"
+    if args.output and not args.infer and args.output_format != "ndjson":
+        parser.error(f"--output streams NDJSON records; it cannot be combined with --format {args.output_format}")
+    
+    profiler = None
+    if args.profile or args.cprofile or args.tracemalloc:
+        profiler = StageProfiler()
+        profiler.start_capture(args.cprofile, args.tracemalloc)
+    
+    metrics = None
+    if args.metrics_file or args.metrics_port:
+        metrics = RunMetrics()
+        if args.metrics_port:
+            metrics.serve(args.metrics_port)
+    
     try:
-        core = MockGenCore(args.config, args.output_dir)
+        if args.infer:
+            # Inference builds a config, so it must not require one to exist
+            report = infer_config(args.input or [args.output_dir], args.model or "Model_1", args.workers,
+                                  args.pool_size)
+            text = json.dumps(report["config"], indent=2, ensure_ascii=False) + "\n"
+            if args.output and args.output != "-":
+                Path(args.output).write_text(text, encoding="utf-8")
+            else:
+                sys.stdout.write(text)
+            records = ", ".join(f"{count} {prob_type}" for prob_type, count in report["records"].items())
+            print(f"Inferred pools from {records} record(s) in {report['files']} file(s).", file=log)
+            return
+        
+        cache = DatasetCache(args.cache_dir, parse_size(args.cache_size)) if args.cache or args.cache_dir else None
+        core = MockGenCore(args.config, args.output_dir, cache, profiler, metrics)
         
         if args.list:
             models = core.list_models()
@@ -82,6 +306,35 @@ Note: All probability scenario generation now requires --wgs flag
                 for prob_type in ["positive", "negative", "exclusion"]:
                     status = "OK" if models[model].get(prob_type, False) else "X"
                     print(f"    {prob_type}: {status}")
+        elif args.verify:
+            report = core.verify_outputs(args.input, args.model, args.workers, args.max_violations)
+            
+            for violation in report["violations"]:
+                print(f"{violation['file']}@{violation['offset']}: {'; '.join(violation['errors'])}")
+            
+            print(f"\nVerified {report['records']} record(s) in {report['files']} file(s): "
+                  f"{report['violation_count']} violation(s) found.")
+            if report["violation_count"]:
+                sys.exit(1)
+        elif args.build_index:
+            report = core.build_record_index(args.input, args.workers)
+            print(f"Indexed {report['records']} record(s) into {report['path']}")
+        elif args.query:
+            found = 0
+            for match in core.query_records(args.query, args.limit + 1):
+                found += 1
+                if found > args.limit:
+                    break
+                record = json.dumps(json.loads(match["record"]), ensure_ascii=False, separators=(",", ":"))
+                print(f"{match['file']}@{match['offset']}\t{record}")
+            if found > args.limit:
+                print(f"\nShowing the first {args.limit} matching record(s); raise --limit to see more.", file=sys.stderr)
+            else:
+                print(f"\nFound {found} matching record(s).", file=sys.stderr)
+        elif args.merge_manifests:
+            for entry in core.merge_shard_manifests(args.input):
+                print(f"Merged manifest: {entry['path']} ({entry['records']} record(s) from {entry['shards']} "
+                      f"shard(s), root {entry['root']})")
         else:
             # Check if probability flag is provided for scenario generation
             if not args.probability:
@@ -99,27 +352,130 @@ Note: All probability scenario generation now requires --wgs flag
                 print("Example: python -m src.mockgen.cli --probability --positive --model Model_1 --wgs")
                 sys.exit(1)
             
-            if args.positive:
-                generated_files = core.generate_probability_scenarios("positive", args.model, args.count, args.wgs)
+            if args.replay:
+                if not args.url:
+                    print("Error: --url is required with --replay")
+                    sys.exit(1)
+                
+                if args.all:
+                    prob_types = ["positive", "negative", "exclusion"]
+                else:
+                    prob_types = ["positive" if args.positive else "negative" if args.negative else "exclusion"]
+                headers = parse_headers(args.header)
+                
+                stats = core.replay_scenarios(prob_types, args.model, args.url, args.count, args.rate,
+                                              args.concurrency, headers)
+                
+                latency = stats["latency"]
+                print(f"Replayed {stats['sent']} request(s) in {stats['elapsed_s']:.2f}s "
+                      f"({stats['achieved_rate']:.0f}/s): {stats['ok']} OK, {sum(stats['errors'].values())} error(s)")
+                print(f"Status codes: {stats['statuses']}")
+                if stats["errors"]:
+                    print(f"Errors: {stats['errors']}")
+                if latency["count"]:
+                    print(f"Latency (ms): p50 {latency['p50_ms']:.2f}  p90 {latency['p90_ms']:.2f}  "
+                          f"p99 {latency['p99_ms']:.2f}  p99.9 {latency['p999_ms']:.2f}  max {latency['max_ms']:.2f}")
+                if stats["ok"] != stats["sent"]:
+                    sys.exit(1)
+                return
+            
+            # Output options shared by every scenario type
+            options = {"manifest": args.manifest, "output_format": args.output_format,
+                       "claim_lines": args.claim_lines, "output": args.output, "seed": args.seed,
+                       "durability": args.durability}
+            if args.incremental:
+                options["incremental"] = True
+            if args.index:
+                options["index"] = True
+            if args.members is not None:
+                options["members"] = args.members
+                options["reuse"] = args.reuse
+            if args.target_bytes:
+                options["target_bytes"] = parse_size(args.target_bytes)
+            if args.record_bytes:
+                options["record_bytes"] = parse_size(args.record_bytes)
+            if args.coverage:
+                options["coverage"] = args.coverage
+            if args.shard:
+                options["shard"] = parse_shard(args.shard)
+            if args.mutate:
+                options["mutate"] = [] if args.mutate == "all" else [op.strip() for op in args.mutate.split(",")]
+            
+            show_progress = args.progress if args.progress is not None else sys.stderr.isatty()
+            if show_progress:
+                core.progress = ProgressReporter(sys.stderr)
+            
+            if args.model == "all" or any(char in args.model for char in "*?["):
+                if args.all:
+                    prob_types = ["positive", "negative", "exclusion"]
+                else:
+                    prob_types = ["positive" if args.positive else "negative" if args.negative else "exclusion"]
+                generated_files = core.generate_models(args.model, prob_types, args.count, args.wgs,
+                                                       args.workers, **options)
+            elif args.positive:
+                generated_files = core.generate_probability_scenarios("positive", args.model, args.count, args.wgs, **options)
             elif args.negative:
-                generated_files = core.generate_probability_scenarios("negative", args.model, args.count, args.wgs)
+                generated_files = core.generate_probability_scenarios("negative", args.model, args.count, args.wgs, **options)
             elif args.exclusion:
-                generated_files = core.generate_probability_scenarios("exclusion", args.model, args.count, args.wgs)
+                generated_files = core.generate_probability_scenarios("exclusion", args.model, args.count, args.wgs, **options)
             elif args.all:
-                generated_files = core.generate_all_scenarios(args.model, args.count, args.wgs)
+                generated_files = core.generate_all_scenarios(args.model, args.count, args.wgs, **options)
+            
+            if core.progress is not None:
+                core.progress.finish()
+            
+            # Listing every file is itself slow for large JSON runs, so it is opt-in
+            if args.verbose:
+                for filepath in generated_files:
+                    print(f"Generated: {filepath}", file=log)
             
-            # Print generated files
-            for filepath in generated_files:
-                print(f"Generated: {filepath}")
+            for entry in core.manifests:
+                print(f"Manifest: {entry['path']} (root {entry['root']})", file=log)
             
-            if args.all:
+            for update in core.incremental:
+                fields = f" (changed: {', '.join(update['fields'])})" if update["fields"] else ""
+                if update["action"] == "unchanged":
+                    print(f"Incremental: {update['model']} {update['probability_type']} unchanged", file=log)
+                else:
+                    print(f"Incremental: {update['model']} {update['probability_type']} {update['action']} "
+                          f"{update['changed']} of {update['records']} record(s){fields}", file=log)
+            
+            if core.cache is not None and args.seed is None:
+                print("Warning: --cache only applies to seeded runs; add --seed to cache this dataset", file=log)
+            elif core.cache_hits:
+                print(f"Served {core.cache_hits} scenario type(s) from the dataset cache.", file=log)
+            
+            if args.output == "-":
+                print("\nGeneration completed successfully! Streamed records to stdout as NDJSON.", file=log)
+            elif args.output_format != "json":
+                print(f"\nGeneration completed successfully! Wrote records to {len(generated_files)} {args.output_format} file(s).")
+            elif args.all:
                 print(f"\nGeneration completed successfully! Generated {len(generated_files)} JSON file(s) across all available scenario types in WGS format.")
             else:
                 print(f"\nGeneration completed successfully! Generated {len(generated_files)} JSON file(s) in WGS format.")
                 
+    except BrokenPipeError:
+        # The reader closed the pipe (e.g. `| head`); stop quietly and keep
+        # the interpreter from failing again while flushing stdout at exit.
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        sys.exit(1)
     except Exception as e:
-        print(f"Error: {e}")
+        print(f"Error: {e}", file=log)
         sys.exit(1)
+    finally:
+        # Stopped in every mode and for failed runs too, so capture never outlives the run
+        if profiler is not None:
+            for dump in profiler.stop_capture():
+                print(f"Profile: {dump}", file=log)
+            if args.profile == "json":
+                print(json.dumps(profiler.report(), indent=2), file=log)
+            elif args.profile:
+                print(profiler.format_report(), file=log)
+        
+        # Written for failed runs too, so their error counts reach the dashboards
+        if metrics is not None and args.metrics_file:
+            metrics.write(args.metrics_file)
 
 
 if __name__ == "__main__":
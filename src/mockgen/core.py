@@ -2,31 +2,95 @@
 MockGen Core - Core functionality for mock data generation
 """
 
+import asyncio
+import fnmatch
 import json
+import os
 import random
+import sys
+import time
 from pathlib import Path
+from concurrent.futures import Executor
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from functools import partial
+from typing import Dict, List, Any, Optional, Tuple, Iterator, AsyncIterator, Union
+
+from .aio import CHUNK_SIZE, AsyncSink, aiter_chunks, aiter_records, check_executor
+from .cache import DatasetCache, content_hash
+from .coverage import CoveringPlan
+from .index import IndexWriter, build_index, index_path, parse_condition, query_index
+from .incremental import (INCREMENTAL_FORMATS, changed_fields, field_fingerprints, load_plan_state,
+                          patch_records, plan_state_path, save_plan_state)
+from .layers import load_layers
+from .manifest import ManifestWriter, manifest_path, read_manifest
+from .members import MemberPlan, MemberPool, member_pools
+from .metrics import RunMetrics
+from .mutations import MutationPlan
+from .plan import COMPACT, PRETTY, WGS_TEMPLATE_FIELDS, WgsPlan, expand_weighted, is_weighted
+from .profiling import StageProfiler
+from .progress import CHECK_MASK, ProgressReporter
+from .replay import iter_request_bodies, parse_rate, replay_records, run_replay
+from .scheduler import run_tasks
+from .shards import merge_manifests, shard_directory, shard_range
+from .sizing import SizedPlan
+from .sinks import open_sink
+from .verify import build_expectations, verify_paths
+
+
+# Output formats whose files can be served from the dataset cache
+CACHEABLE_FORMATS = ["json", "ndjson", "csv", "tsv"]
+
+# The only output format that --output (a file or '-' for stdout) streams
+STREAMED_FORMAT = "ndjson"
+
+# Output formats whose sinks report the serialized bytes of every record
+SIZED_FORMATS = ["json", "ndjson"]
+
+# Record count of a run that stops on --target-bytes instead
+UNBOUNDED_COUNT = sys.maxsize
 
 
 class MockGenCore:
     """Core MockGen functionality for generating probability scenarios."""
     
-    def __init__(self, config_file: str = "user_input.json", output_dir: str = "generated_outputs"):
-        self.config_file = Path(config_file)
+    def __init__(self, config_file: Union[str, List[str]] = "user_input.json", output_dir: str = "generated_outputs",
+                 cache: Optional[DatasetCache] = None, profiler: Optional[StageProfiler] = None,
+                 metrics: Optional[RunMetrics] = None):
+        # A list of config files is a base config followed by override layers
+        files = [config_file] if isinstance(config_file, (str, Path)) else list(config_file)
+        if not files:
+            raise ValueError("At least one configuration file is required")
+        self.config_files = [Path(f) for f in files]
+        self.config_file = self.config_files[0]
+        # Combined content hash of the config files, set when they are loaded
+        self.config_digest = ""
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(exist_ok=True)
+        self.profiler = profiler
+        self.metrics = metrics
+        if profiler is not None and metrics is not None:
+            profiler.add_hook(metrics.profiler_hook)
+        # Set before loading, which keeps merged layered configs in the cache
+        self.cache = cache
+        began = time.perf_counter()
         self.config = self._load_config()
+        if profiler is not None:
+            profiler.record("config", time.perf_counter() - began)
+        if metrics is not None:
+            metrics.observe_stage("config", time.perf_counter() - began)
+        self.cache_hits = 0
+        self.progress: Optional[ProgressReporter] = None
+        self.manifests: List[Dict[str, Any]] = []
+        self.runs: List[Dict[str, Any]] = []
+        self.incremental: List[Dict[str, Any]] = []
+        self._member_pools: Dict[int, MemberPool] = {}
+        # Index written by this core; worker processes write a shard of their own
+        self.index_file = index_path(self.output_dir)
     
     def _load_config(self) -> Dict[str, Any]:
-        """Load configuration from JSON file."""
-        try:
-            with self.config_file.open("r", encoding="utf-8") as f:
-                return json.load(f)
-        except FileNotFoundError:
-            raise FileNotFoundError(f"Configuration file '{self.config_file}' not found.")
-        except json.JSONDecodeError as e:
-            raise ValueError(f"Invalid JSON in configuration file: {e}")
+        """Load configuration from the JSON file, merging any override layers into it."""
+        config, self.config_digest = load_layers(self.config_files, self.cache)
+        return config
     
     def _get_probability_data(self, model_name: str, probability_type: str) -> Optional[Dict[str, List[str]]]:
         """Get probability data for specific model and type."""
@@ -58,7 +122,9 @@ class MockGenCore:
         result = {}
         
         for key, value in data.items():
-            if isinstance(value, list):
+            if is_weighted(value):
+                result[key] = random.choice(expand_weighted(value))
+            elif isinstance(value, list):
                 if value:  # Check if list is not empty
                     if isinstance(value[0], dict):
                         # Handle nested list of objects (like ClaimDetails)
@@ -77,116 +143,640 @@ class MockGenCore:
     
     def _generate_wgs_format(self, data: Dict[str, List[str]], probability_type: str) -> Dict[str, Any]:
         """Generate output in WGS format matching the exact template structure."""
-        key_name = f"WGS_csbd_medicaid_{probability_type.lower()}"
+        return WgsPlan(data, probability_type).build()
+    
+    def _single_value_record(self, data: Dict[str, Any], model: str, probability_type: str,
+                             record_number: int) -> Dict[str, Any]:
+        """Build one record in the plain (non-WGS) format."""
+        # Generate single random values for each field
+        single_value_data = self._generate_single_value_data(data)
         
-        output = {}
+        # Create output structure
+        return {
+            "model": model,
+            "probability_type": probability_type,
+            "timestamp": datetime.now().strftime("%Y%m%d_%H%M%S"),
+            "record_number": record_number,
+            "data": single_value_data
+        }
+    
+    def generate_probability_scenarios(self, probability_type: str, model: str, count: int = 1, wgs: bool = False,
+                                       manifest: bool = False, output_format: str = "json",
+                                       claim_lines: str = "linked", output: Optional[str] = None,
+                                       seed: Optional[int] = None,
+                                       mutate: Optional[List[str]] = None,
+                                       coverage: Optional[int] = None,
+                                       shard: Optional[Tuple[int, int]] = None,
+                                       durability: str = "none",
+                                       target_bytes: Optional[int] = None,
+                                       record_bytes: Optional[int] = None,
+                                       incremental: bool = False,
+                                       index: bool = False,
+                                       members: Optional[int] = None,
+                                       reuse: str = "uniform") -> List[Path]:
+        """Generate probability scenarios with proper count handling.
         
-        # Add all the template fields in the exact order from the reference template
-        template_fields = [
-            "first_proc_cd", "last_proc_cd", "email", "phone", "date_of_birth",
-            "street_address", "proc_cd", "mail_id", "address", "city", "state",
-            "zip_code", "country", "PRICNG_ZIP_STATE", "CLM_TYPE", "SRVC_FROM_DT",
-            "HCID", "PAT_BRTH_DT", "PAT_FRST_NME", "PAT_LAST_NME", "ClaimDetails"
-        ]
+        Args:
+            probability_type: Type of scenario (positive, negative, exclusion)
+            model: Model name to generate scenarios for
+            count: Number of records to generate
+            wgs: Whether to use WGS format (complete template structure)
+            manifest: Whether to write a content-hash manifest alongside the records
+            output_format: Output sink (json: one file per record, ndjson: one record per line,
+                sqlite: one database per model, csv/tsv: flat table per scenario type)
+            claim_lines: How CSV/TSV output stores ClaimDetails lines (linked file or exploded rows)
+            output: NDJSON destination file, or '-' to stream to stdout
+            seed: Seed for reproducible WGS records; record n always gets the same values
+            mutate: Derive negative/exclusion records from the positive pools with these mutation
+                operators ([] for all) instead of using the configured pools; ignored for positive
+            coverage: Instead of `count` random records, emit the covering array that contains
+                every pool value (1) or every pair of values across fields (2)
+            shard: (k, N) to generate only the k-th of N contiguous slices of the record numbers,
+                into its own shard-k-of-N subdirectory
+            durability: fsync policy for JSON files: none, batch (groups of files) or file (every file)
+            target_bytes: Ignore `count` and stop once this many serialized bytes were written
+            record_bytes: Grow every record (extra ClaimDetails lines, then padding) to exactly
+                this many bytes, counting the newline of NDJSON lines
+            incremental: Compare the compiled plan with the one stored by the previous run into
+                the same directory and rewrite only the records it changes (seeded WGS runs)
+            index: Add every record's field values to the output directory's inverted index
+            members: Take the member fields (PAT_*) of every record from a table of this many
+                members shared by all models and scenario types, and add the member's MEMBER_ID
+            reuse: How records pick their member: uniform, sequential or zipf[:exponent]
+            
+        Returns:
+            List of generated file paths
+        """
+        if probability_type == "positive":
+            mutate = None
+        if coverage is not None and (mutate is not None or not wgs):
+            raise ValueError("Coverage mode requires WGS format and cannot be combined with mutation")
+        if shard is not None and (not wgs or (seed is None and coverage is None)):
+            raise ValueError("Sharded generation requires WGS format and --seed, so every shard draws "
+                             "from the same record sequence")
+        if target_bytes is not None or record_bytes is not None:
+            if output_format not in SIZED_FORMATS:
+                raise ValueError("Size-targeted generation can only be written as json or ndjson")
+            if target_bytes is not None and (target_bytes <= 0 or coverage is not None or shard is not None):
+                raise ValueError("--target-bytes must be positive and cannot be combined with coverage or sharding")
+            if record_bytes is not None and (not wgs or mutate is not None or coverage is not None):
+                raise ValueError("--record-bytes requires WGS format and cannot be combined with mutation "
+                                 "or coverage")
+        if output is not None and output_format != STREAMED_FORMAT:
+            raise ValueError(f"--output streams NDJSON records and cannot be combined with {output_format} output")
+        if incremental and (not wgs or seed is None or output is not None
+                            or output_format not in INCREMENTAL_FORMATS):
+            raise ValueError(f"Incremental generation requires WGS format, --seed, no --output and one of: "
+                             f"{', '.join(INCREMENTAL_FORMATS)}")
+        if index and (output_format not in SIZED_FORMATS or output == "-" or incremental):
+            raise ValueError("Indexed records must be written to json or ndjson files and cannot be "
+                             "combined with --incremental")
+        if members is not None and (not wgs or mutate is not None or coverage is not None
+                                    or record_bytes is not None or incremental):
+            raise ValueError("Shared members require WGS format and cannot be combined with mutation, "
+                             "coverage, --record-bytes or --incremental")
+        if mutate is not None:
+            if not wgs:
+                raise ValueError("Mutated scenarios require WGS format")
+            if output_format not in ("json", "ndjson"):
+                raise ValueError("Mutated scenarios can only be written as json or ndjson")
+            data = self._get_probability_data(model, "positive")
+            if not data:
+                raise ValueError(f"No positive data found for {model} to derive {probability_type} records from")
+        else:
+            data = self._get_probability_data(model, probability_type)
+            if not data:
+                raise ValueError(f"No {probability_type} data found for {model}")
         
-        # Initialize output with empty values - will be populated from user_input.json
-        for field in template_fields:
-            output[field] = []
-        
-        # Add probability-specific data from user_input.json
-        for field, values in data.items():
-            if field == "ClaimDetails":
-                # Handle ClaimDetails specially - ensure it uses the structure from user_input.json
-                if isinstance(values, list) and len(values) > 0:
-                    claim_detail = values[0]  # Take the first claim detail
-                    if isinstance(claim_detail, dict):
-                        # Ensure each field in ClaimDetails uses values from user_input.json
-                        processed_claim = {}
-                        for claim_field, claim_values in claim_detail.items():
-                            if isinstance(claim_values, list) and len(claim_values) > 0:
-                                # For all scenarios, randomly select one value to ensure variety
-                                processed_claim[claim_field] = random.choice(claim_values)
-                            else:
-                                processed_claim[claim_field] = claim_values
-                        output[field] = [processed_claim]
-                    else:
-                        output[field] = values
-                else:
-                    output[field] = values
+        profiler = self.profiler
+        metrics = self.metrics
+        began = time.perf_counter()
+        
+        # Resolve the template against the config once instead of per record
+        if mutate is not None:
+            plan = MutationPlan(data, probability_type, mutate)
+        elif coverage is not None:
+            plan = CoveringPlan(data, probability_type, coverage)
+            count = plan.count
+        elif record_bytes is not None:
+            # NDJSON sinks add the newline, so the serialized record is one byte shorter
+            plan = SizedPlan(data, probability_type, record_bytes - (output_format == "ndjson"))
+        elif members is not None:
+            plan = MemberPlan(data, probability_type, self._member_pool(members), reuse)
+        else:
+            plan = WgsPlan(data, probability_type) if wgs else None
+        if target_bytes is not None:
+            count = -(-target_bytes // record_bytes) if record_bytes is not None else UNBOUNDED_COUNT
+        
+        # Seeded records depend only on their number, so a shard is just a slice of the numbers
+        total = count
+        first = 1
+        output_dir = self.output_dir
+        if shard is not None:
+            first, count = shard_range(total, shard)
+            output_dir = shard_directory(self.output_dir, shard)
+            output_dir.mkdir(parents=True, exist_ok=True)
+        run_timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        
+        state = None
+        if incremental:
+            # Records are patched through their manifest entries, so patchable outputs always get one
+            patchable = count != UNBOUNDED_COUNT and \
+                (output_format == "json" or (output_format == "ndjson" and record_bytes is not None))
+            manifest = manifest or patchable
+            state = {
+                "params": content_hash([model, probability_type, total, first, count, manifest, output_format,
+                                        claim_lines, seed, mutate, coverage, target_bytes, record_bytes]),
+                "fields": field_fingerprints(plan),
+                "patchable": patchable,
+            }
+            files = self._update_incremental(plan, state, model, probability_type, output_format, output_dir,
+                                             seed, first, count, began)
+            if files is not None:
+                return files
+        
+        progress = self.progress
+        if progress is not None:
+            if count != UNBOUNDED_COUNT:
+                progress.expect(count)
+            progress.begin(f"{model} {probability_type}")
+        
+        # Seeded runs are deterministic, so a repeat request can be served from the cache
+        cache_key = None
+        tee = None
+        # Streamed runs are cached from the NDJSON tee, which only the NDJSON sink writes
+        if self.cache is not None and seed is not None and plan is not None and not incremental and not index \
+                and output_format in CACHEABLE_FORMATS \
+                and (output is None or (output == "-" and output_format == STREAMED_FORMAT)):
+            cache_key = self._dataset_cache_key(data, model, probability_type, total, manifest,
+                                                output_format, claim_lines, seed, mutate, coverage, shard,
+                                                target_bytes, record_bytes,
+                                                [plan.members.digest, reuse] if members is not None else None)
+            hit = self.cache.restore(cache_key, output_dir, stream=output == "-")
+            if hit is not None:
+                self.cache_hits += 1
+                if progress is not None:
+                    progress.update(count)
+                if metrics is not None:
+                    metrics.record_cache_hit(model, probability_type)
+                if hit["manifest"] is not None:
+                    root = read_manifest(hit["manifest"])["root"]
+                    self.manifests.append({"path": hit["manifest"], "root": root, "records": count})
+                self.runs.append({"model": model, "probability_type": probability_type, "records": count,
+                                  "bytes": 0, "files": len(hit["files"]), "seconds": time.perf_counter() - began,
+                                  "cached": True})
+                return hit["files"]
+            if output == "-":
+                tee = self.cache.root / f".tee-{cache_key}.jsonl"
+        
+        sink = open_sink(output_format, output_dir, model, probability_type, plan, claim_lines, output, tee,
+                         durability)
+        
+        manifest_writer = None
+        if manifest:
+            header = {"model": model, "probability_type": probability_type, "count": count,
+                      "format": output_format}
+            if count == UNBOUNDED_COUNT:
+                del header["count"]
+                header["target_bytes"] = target_bytes
+            if shard is not None:
+                header.update({"shard": f"{shard[0]}/{shard[1]}", "first": first, "total": total, "seed": seed})
+            manifest_writer = ManifestWriter(manifest_path(output_dir, model, probability_type, run_timestamp),
+                                             header)
+        index_writer = IndexWriter(self.index_file, model, probability_type) if index else None
+        # Records are indexed under the sink's real file, which --output may place outside output_dir
+        sink_path = getattr(sink, "path", None)
+        sink_dir = Path(sink_path).parent if sink_path is not None else output_dir
+        planned = time.perf_counter()
+        if profiler is not None:
+            profiler.record("plan", planned - began)
+        
+        written = 0
+        limit = target_bytes
+        try:
+            if profiler is not None:
+                written, count = self._write_records_profiled(plan, sink, manifest_writer, data, model,
+                                                              probability_type, count, seed, first, limit,
+                                                              index_writer, sink_dir)
+            elif plan is not None and sink.style is not None:
+                # Fast path: serialize straight from pre-encoded fragments
+                for i, payload in enumerate(plan.iter_payloads(count, sink.style, seed, first), first):
+                    name, offset, payload = sink.write_payload(i, payload)
+                    written += len(payload)
+                    if manifest_writer is not None:
+                        manifest_writer.add(i, name, offset, payload)
+                    if index_writer is not None:
+                        index_writer.add(name, offset, payload, sink_dir)
+                    if progress is not None and not i & CHECK_MASK:
+                        progress.update(i - first + 1, written)
+                    if limit is not None and written >= limit:
+                        break
+                if limit is not None:
+                    count = i - first + 1
             else:
-                # For other fields, use values from user_input.json
-                if isinstance(values, list) and len(values) > 0:
-                    # For all scenarios, randomly select one value to ensure variety
-                    output[field] = [random.choice(values)]
-                else:
-                    output[field] = values
-        
-        # Ensure all template fields have values (use random value from user input if available)
-        for field in template_fields:
-            if not output[field] or len(output[field]) == 0:
-                # If field is empty, try to get a default value from the data
-                if field in data and isinstance(data[field], list) and len(data[field]) > 0:
-                    output[field] = [random.choice(data[field])]  # Randomly select one value
+                if plan is not None:
+                    # Generate WGS format output into one reused record structure
+                    records = plan.iter_records(count, seed, first)
                 else:
-                    # Provide a fallback default value
-                    output[field] = ["Default Value"]
+                    records = (self._single_value_record(data, model, probability_type, i) for i in range(1, count + 1))
+                
+                for i, record in enumerate(records, first):
+                    name, offset, payload = sink.write(i, record)
+                    if payload is not None:
+                        written += len(payload)
+                    
+                    if manifest_writer is not None:
+                        if payload is None:
+                            # Sinks that do not serialize to JSON are hashed on the canonical form
+                            payload = json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+                        manifest_writer.add(i, name, offset, payload)
+                    if index_writer is not None:
+                        index_writer.add(name, offset, payload, sink_dir)
+                    if progress is not None and not i & CHECK_MASK:
+                        progress.update(i - first + 1, written)
+                    if limit is not None and written >= limit:
+                        break
+                if limit is not None:
+                    count = i - first + 1
+            if progress is not None:
+                progress.update(count, written)
+        except BaseException as e:
+            if metrics is not None:
+                metrics.record_error(model, probability_type, e)
+            raise
+        finally:
+            closing = time.perf_counter()
+            generated_files = sink.close()
+            if manifest_writer is not None:
+                root = manifest_writer.close()
+                self.manifests.append({"path": manifest_writer.path, "root": root, "records": count})
+            if index_writer is not None:
+                index_writer.close()
+            closed = time.perf_counter()
+            if profiler is not None:
+                profiler.record("close", closed - closing)
+        
+        self.runs.append({"model": model, "probability_type": probability_type, "records": count,
+                          "bytes": written, "files": len(generated_files), "seconds": closed - began,
+                          "cached": False})
+        if metrics is not None:
+            metrics.observe_stage("plan", planned - began)
+            metrics.observe_stage("write", closing - planned)
+            metrics.observe_stage("close", closed - closing)
+            metrics.record_run(model, probability_type, output_format, count, written, len(generated_files),
+                               closed - began)
         
-        return {key_name: output}
+        if state is not None:
+            self._replace_incremental(state, model, probability_type, output_dir, generated_files,
+                                      manifest_writer.path if manifest_writer is not None else None, count)
+        
+        if cache_key is not None:
+            manifest_file = manifest_writer.path if manifest_writer is not None else None
+            if tee is not None:
+                # Cache what went to stdout under the name a file run would have used
+                stored = tee.with_name(f"{model}_{probability_type}_{run_timestamp}.jsonl")
+                os.replace(tee, stored)
+                self.cache.store(cache_key, [stored], manifest_file)
+                stored.unlink()
+            else:
+                self.cache.store(cache_key, generated_files, manifest_file)
+        
+        return generated_files
     
-    def generate_probability_scenarios(self, probability_type: str, model: str, count: int = 1, wgs: bool = False) -> List[Path]:
-        """Generate probability scenarios with proper count handling.
+    def _member_pool(self, count: int) -> MemberPool:
+        """Build (once per core) the member table of `count` members shared by every model and type."""
+        pool = self._member_pools.get(count)
+        if pool is None:
+            began = time.perf_counter()
+            pool = self._member_pools[count] = MemberPool.from_config(self.config, count)
+            if self.profiler is not None:
+                self.profiler.record("members", time.perf_counter() - began, count)
+        return pool
+    
+    def _update_incremental(self, plan: WgsPlan, state: Dict[str, Any], model: str, probability_type: str,
+                            output_format: str, output_dir: Path, seed: int, first: int, count: int,
+                            began: float) -> Optional[List[Path]]:
+        """Bring the previous incremental output up to date without regenerating it, if possible.
+        
+        Returns:
+            The existing (possibly patched) files, or None if the run must be generated from scratch
+        """
+        previous = load_plan_state(plan_state_path(output_dir, model, probability_type))
+        if previous is None or previous.get("params") != state["params"]:
+            return None
+        files = [output_dir / name for name in previous["files"]]
+        manifest_file = output_dir / previous["manifest"] if previous["manifest"] else None
+        if not all(path.exists() for path in files) or (manifest_file is not None and not manifest_file.exists()):
+            return None
+        
+        changed = changed_fields(previous["fields"], state["fields"])
+        if not changed:
+            root = previous["root"]
+            patched = patched_bytes = 0
+            action = "unchanged"
+        elif state["patchable"] and manifest_file is not None:
+            payloads = plan.iter_payloads(count, PRETTY if output_format == "json" else COMPACT, seed, first)
+            patched, patched_bytes, root = patch_records(payloads, manifest_file, output_dir,
+                                                         b"\n" if output_format == "ndjson" else b"")
+            state.update({"files": previous["files"], "manifest": previous["manifest"], "root": root})
+            save_plan_state(plan_state_path(output_dir, model, probability_type), state)
+            action = "patched"
+        else:
+            return None
+        
+        seconds = time.perf_counter() - began
+        if self.progress is not None:
+            self.progress.update(count, patched_bytes)
+        if manifest_file is not None:
+            self.manifests.append({"path": manifest_file, "root": root, "records": count})
+        self.runs.append({"model": model, "probability_type": probability_type, "records": count,
+                          "bytes": patched_bytes, "files": len(files), "seconds": seconds, "cached": False})
+        if self.metrics is not None:
+            self.metrics.record_run(model, probability_type, output_format, count, patched_bytes, len(files),
+                                    seconds)
+        self.incremental.append({"model": model, "probability_type": probability_type, "action": action,
+                                 "fields": changed, "records": count, "changed": patched})
+        return files
+    
+    def _replace_incremental(self, state: Dict[str, Any], model: str, probability_type: str, output_dir: Path,
+                             files: List[Path], manifest_file: Optional[Path], count: int) -> None:
+        """Record a freshly generated incremental output and remove the one it supersedes."""
+        path = plan_state_path(output_dir, model, probability_type)
+        previous = load_plan_state(path)
+        names = [Path(file).name for file in files]
+        root = self.manifests[-1]["root"] if manifest_file is not None else None
+        state.update({"files": names, "manifest": manifest_file.name if manifest_file is not None else None,
+                      "root": root})
+        save_plan_state(path, state)
+        
+        changed: List[str] = []
+        if previous is not None:
+            kept = set(names) | {state["manifest"]}
+            for name in previous.get("files", []) + [previous.get("manifest")]:
+                if name and name not in kept:
+                    try:
+                        (output_dir / name).unlink()
+                    except FileNotFoundError:
+                        pass
+            if previous.get("params") == state["params"]:
+                changed = changed_fields(previous["fields"], state["fields"])
+        self.incremental.append({"model": model, "probability_type": probability_type, "action": "generated",
+                                 "fields": changed, "records": count, "changed": count})
+    
+    async def agenerate(self, probability_type: str, model: str, count: int = 1, wgs: bool = False,
+                        manifest: bool = False, output_format: str = "json", claim_lines: str = "linked",
+                        seed: Optional[int] = None, durability: str = "none", chunk: int = CHUNK_SIZE,
+                        executor: Optional[Executor] = None, **options: Any) -> List[Path]:
+        """Asynchronous generate_probability_scenarios that does not block the event loop.
+        
+        Records are built in executor chunks and written on a dedicated writer
+        thread. The next chunk is built while the previous one is written, so
+        replay clients and test assertions keep running on the loop in between.
+        Options beyond the ones listed here (mutate, coverage, shard, index, ...)
+        run the blocking generate_probability_scenarios in the executor as a
+        single call.
         
         Args:
             probability_type: Type of scenario (positive, negative, exclusion)
             model: Model name to generate scenarios for
-            count: Number of JSON files to generate
-            wgs: Whether to use WGS format (complete template structure)
+            count: Number of records to generate
+            wgs: Whether to use WGS format
+            manifest: Whether to write a content-hash manifest alongside the records
+            output_format: Output sink (json, ndjson, sqlite, csv or tsv)
+            claim_lines: How CSV/TSV output stores ClaimDetails lines
+            seed: Seed for reproducible WGS records
+            durability: fsync policy for JSON files
+            chunk: Records per executor call
+            executor: Thread executor to build records in (default: the loop's default executor)
+            **options: Further keyword options for generate_probability_scenarios
             
         Returns:
             List of generated file paths
         """
+        check_executor(executor)
+        loop = asyncio.get_running_loop()
+        if options or not wgs:
+            return await loop.run_in_executor(executor, partial(
+                self.generate_probability_scenarios, probability_type, model, count, wgs, manifest=manifest,
+                output_format=output_format, claim_lines=claim_lines, seed=seed, durability=durability, **options))
+        
         data = self._get_probability_data(model, probability_type)
         if not data:
             raise ValueError(f"No {probability_type} data found for {model}")
+        metrics = self.metrics
+        progress = self.progress
+        began = time.perf_counter()
+        plan = WgsPlan(data, probability_type)
+        if progress is not None:
+            progress.expect(count)
+            progress.begin(f"{model} {probability_type}")
         
-        generated_files = []
+        writer = await AsyncSink.open(partial(open_sink, output_format, self.output_dir, model, probability_type,
+                                              plan, claim_lines, None, None, durability))
+        manifest_writer = None
+        if manifest:
+            run_timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            manifest_writer = ManifestWriter(manifest_path(self.output_dir, model, probability_type, run_timestamp),
+                                             {"model": model, "probability_type": probability_type, "count": count,
+                                              "format": output_format})
+            writer.manifest_writer = manifest_writer
+        
+        written = 0
+        done = 0
+        try:
+            # Sinks without a style take record dictionaries, decoded from compact payloads
+            async for batch in aiter_chunks(plan, count, writer.style or COMPACT, seed, 1, chunk, executor,
+                                            decode=writer.style is None):
+                written += await writer.write(done + 1, batch)
+                done += len(batch)
+                if progress is not None:
+                    progress.update(done, written)
+        except BaseException as e:
+            if metrics is not None:
+                metrics.record_error(model, probability_type, e)
+            raise
+        finally:
+            generated_files = await writer.close()
+            if manifest_writer is not None:
+                root = manifest_writer.close()
+                self.manifests.append({"path": manifest_writer.path, "root": root, "records": done})
         
-        # Generate separate files for each count
-        for i in range(count):
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"{model}_{probability_type}_{timestamp}_{i+1:06d}.json"
-            filepath = self.output_dir / filename
+        seconds = time.perf_counter() - began
+        self.runs.append({"model": model, "probability_type": probability_type, "records": count,
+                          "bytes": written, "files": len(generated_files), "seconds": seconds, "cached": False})
+        if metrics is not None:
+            metrics.record_run(model, probability_type, output_format, count, written, len(generated_files),
+                               seconds)
+        return generated_files
+    
+    def aiter_records(self, probability_type: str, model: str, count: int, seed: Optional[int] = None,
+                      start: int = 1, chunk: int = CHUNK_SIZE,
+                      executor: Optional[Executor] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Asynchronously iterate over WGS records built in executor chunks, without writing them.
+        
+        Args:
+            probability_type: Type of scenario (positive, negative, exclusion)
+            model: Model name to generate records for
+            count: Number of records
+            seed: Seed for reproducible records (record n matches record n of a seeded run)
+            start: Number of the first record
+            chunk: Records per executor call
+            executor: Thread executor to build records in (default: the loop's default executor)
             
-            if wgs:
-                # Generate WGS format output
-                output = self._generate_wgs_format(data, probability_type)
+        Returns:
+            Async iterator of independent record dictionaries
+        """
+        check_executor(executor)
+        data = self._get_probability_data(model, probability_type)
+        if not data:
+            raise ValueError(f"No {probability_type} data found for {model}")
+        return aiter_records(WgsPlan(data, probability_type), count, seed, start, chunk, executor)
+    
+    def _write_records_profiled(self, plan: Optional[WgsPlan], sink: Any, manifest_writer: Optional[ManifestWriter],
+                                data: Dict[str, Any], model: str, probability_type: str, count: int,
+                                seed: Optional[int], first: int = 1, limit: Optional[int] = None,
+                                index_writer: Optional[IndexWriter] = None,
+                                sink_dir: Optional[Path] = None) -> Tuple[int, int]:
+        """Write records like generate_probability_scenarios while timing each stage.
+        
+        Returns:
+            (number of serialized bytes handed to the sink, number of records written)
+        """
+        profiler = self.profiler
+        progress = self.progress
+        clock = time.perf_counter
+        timings = [0.0, 0.0]
+        io_time = 0.0
+        manifest_time = 0.0
+        index_time = 0.0
+        written = 0
+        
+        if plan is not None and sink.style is not None:
+            for i, payload in enumerate(plan.iter_payloads(count, sink.style, seed, first, timings=timings), first):
+                began = clock()
+                name, offset, payload = sink.write_payload(i, payload)
+                wrote = clock()
+                if manifest_writer is not None:
+                    manifest_writer.add(i, name, offset, payload)
+                    manifest_time += clock() - wrote
+                if index_writer is not None:
+                    hashed = clock()
+                    index_writer.add(name, offset, payload, sink_dir)
+                    index_time += clock() - hashed
+                io_time += wrote - began
+                written += len(payload)
+                if progress is not None and not i & CHECK_MASK:
+                    progress.update(i - first + 1, written)
+                if limit is not None and written >= limit:
+                    break
+        else:
+            if plan is not None:
+                records = plan.iter_records(count, seed, first)
             else:
-                # Generate single random values for each field
-                single_value_data = self._generate_single_value_data(data)
-                
-                # Create output structure
-                output = {
-                    "model": model,
-                    "probability_type": probability_type,
-                    "timestamp": timestamp,
-                    "record_number": i + 1,
-                    "data": single_value_data
-                }
+                records = (self._single_value_record(data, model, probability_type, i) for i in range(1, count + 1))
             
-            with filepath.open("w", encoding="utf-8") as f:
-                json.dump(output, f, indent=2, ensure_ascii=False)
-            
-            generated_files.append(filepath)
+            i = first - 1
+            while True:
+                began = clock()
+                record = next(records, None)
+                if record is None:
+                    break
+                sampled = clock()
+                i += 1
+                name, offset, payload = sink.write(i, record)
+                wrote = clock()
+                if payload is not None:
+                    written += len(payload)
+                if manifest_writer is not None:
+                    if payload is None:
+                        payload = json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+                    manifest_writer.add(i, name, offset, payload)
+                    manifest_time += clock() - wrote
+                if index_writer is not None:
+                    hashed = clock()
+                    index_writer.add(name, offset, payload, sink_dir)
+                    index_time += clock() - hashed
+                timings[0] += sampled - began
+                io_time += wrote - sampled
+                if progress is not None and not i & CHECK_MASK:
+                    progress.update(i - first + 1, written)
+                if limit is not None and written >= limit:
+                    break
         
-        return generated_files
+        if limit is not None:
+            count = i - first + 1
+        profiler.record("sampling", timings[0], count)
+        if timings[1]:
+            profiler.record("serialization", timings[1], count)
+        profiler.record("io", io_time, count)
+        if manifest_writer is not None:
+            profiler.record("manifest", manifest_time, count)
+        if index_writer is not None:
+            profiler.record("index", index_time, count)
+        return written, count
     
-    def generate_all_scenarios(self, model: str, count: int = 1, wgs: bool = False) -> List[Path]:
+    def _dataset_cache_key(self, data: Dict[str, Any], model: str, probability_type: str, count: int,
+                           manifest: bool, output_format: str, claim_lines: str, seed: int,
+                           mutate: Optional[List[str]] = None, coverage: Optional[int] = None,
+                           shard: Optional[Tuple[int, int]] = None, target_bytes: Optional[int] = None,
+                           record_bytes: Optional[int] = None, members: Optional[List[str]] = None) -> str:
+        """Build the content address of a seeded dataset."""
+        return content_hash({
+            "config": content_hash(data),
+            "template": content_hash(WGS_TEMPLATE_FIELDS),
+            "params": {
+                "model": model,
+                "probability_type": probability_type,
+                "count": count,
+                "manifest": manifest,
+                "format": output_format,
+                "claim_lines": claim_lines if output_format in ("csv", "tsv") else None,
+                "mutate": sorted(mutate) if mutate is not None else None,
+                "coverage": coverage,
+                "shard": list(shard) if shard is not None else None,
+                "target_bytes": target_bytes,
+                "record_bytes": record_bytes,
+                "members": members,
+            },
+            "seed": seed,
+        })
+    
+    def generate_all_scenarios(self, model: str, count: int = 1, wgs: bool = False,
+                               manifest: bool = False, output_format: str = "json",
+                               claim_lines: str = "linked", output: Optional[str] = None,
+                               seed: Optional[int] = None,
+                               mutate: Optional[List[str]] = None,
+                               coverage: Optional[int] = None,
+                               shard: Optional[Tuple[int, int]] = None,
+                               durability: str = "none",
+                               target_bytes: Optional[int] = None,
+                               record_bytes: Optional[int] = None,
+                               incremental: bool = False,
+                               index: bool = False,
+                               members: Optional[int] = None,
+                               reuse: str = "uniform") -> List[Path]:
         """Generate all available scenario types (positive, negative, exclusion) for a model.
         
         Args:
             model: Model name to generate scenarios for
             count: Number of JSON files to generate for each scenario type
             wgs: Whether to use WGS format (complete template structure)
+            manifest: Whether to write a content-hash manifest for each scenario type
+            output_format: Output sink (json, ndjson, sqlite, csv or tsv)
+            claim_lines: How CSV/TSV output stores ClaimDetails lines (linked file or exploded rows)
+            output: NDJSON destination file, or '-' to stream to stdout
+            seed: Seed for reproducible WGS records
+            mutate: Derive negative and exclusion records from the positive pools with these
+                mutation operators ([] for all)
+            coverage: Emit a 1-wise or 2-wise covering array per scenario type instead of `count` records
+            shard: (k, N) to generate only the k-th of N slices of the record numbers
+            durability: fsync policy for JSON files (none, batch or file)
+            target_bytes: Ignore `count` and stop each scenario type at this many serialized bytes
+            record_bytes: Grow every record to exactly this many bytes
+            incremental: Rewrite only the records changed since the previous incremental run
+            index: Add every record's field values to the output directory's inverted index
+            members: Take the member fields of every record from a shared table of this many members
+            reuse: How records pick their member: uniform, sequential or zipf[:exponent]
             
         Returns:
             List of generated file paths
@@ -196,24 +786,128 @@ class MockGenCore:
         # Get available probability types for this model
         available_types = []
         for prob_type in ["positive", "negative", "exclusion"]:
-            data = self._get_probability_data(model, prob_type)
+            source_type = "positive" if mutate is not None else prob_type
+            data = self._get_probability_data(model, source_type)
             if data:
                 available_types.append(prob_type)
         
         if not available_types:
             raise ValueError(f"No probability data found for model {model}")
         
+        if self.progress is not None and target_bytes is None:
+            expected = shard_range(count, shard)[1] if shard is not None else count
+            self.progress.expect(expected * len(available_types))
+        
         # Generate scenarios for each available type
         for prob_type in available_types:
             try:
-                files = self.generate_probability_scenarios(prob_type, model, count, wgs)
-                generated_files.extend(files)
+                files = self.generate_probability_scenarios(prob_type, model, count, wgs, manifest, output_format,
+                                                            claim_lines, output, seed, mutate, coverage, shard,
+                                                            durability, target_bytes, record_bytes, incremental,
+                                                            index, members, reuse)
+                # Database sinks return the same file for every scenario type
+                generated_files.extend(f for f in files if not generated_files or f != generated_files[-1])
+            except BrokenPipeError:
+                # The reader went away; there is no point generating the remaining types
+                raise
             except Exception as e:
-                print(f"Warning: Failed to generate {prob_type} scenarios for {model}: {e}")
+                print(f"Warning: Failed to generate {prob_type} scenarios for {model}: {e}", file=sys.stderr)
                 continue
         
         return generated_files
     
+    def generate_models(self, pattern: str, probability_types: List[str], count: int = 1, wgs: bool = False,
+                        workers: Optional[int] = None, **options: Any) -> List[Path]:
+        """Generate scenario types for every model matching a name pattern, over a worker pool.
+        
+        Each model x scenario type is one task, except for SQLite output where
+        a model's types share one database and run as a single task. Runs that
+        write to stdout, to an explicit --output file or under a profiler stay
+        in this process.
+        
+        Args:
+            pattern: 'all' or a shell-style glob over model names (e.g. 'Model_*')
+            probability_types: Scenario types to generate; types without data are skipped
+            count: Number of records per scenario type
+            wgs: Whether to use WGS format (complete template structure)
+            workers: Number of worker processes (default: one per CPU)
+            **options: Keyword options for generate_probability_scenarios
+        
+        Returns:
+            List of generated file paths
+        """
+        models = sorted(self._get_model_names())
+        if pattern != "all":
+            models = [model for model in models if fnmatch.fnmatchcase(model, pattern)]
+        if not models:
+            raise ValueError(f"No models match '{pattern}'")
+        
+        mutate = options.get("mutate")
+        tasks = []
+        for model in models:
+            types = [prob_type for prob_type in probability_types
+                     if self._get_probability_data(model, "positive" if mutate is not None else prob_type)]
+            if not types:
+                print(f"Warning: No probability data found for model {model}", file=sys.stderr)
+            elif options.get("output_format") == "sqlite":
+                tasks.append((model, types))
+            else:
+                tasks.extend((model, [prob_type]) for prob_type in types)
+        
+        if options.get("output") is not None or self.profiler is not None:
+            workers = 1
+        return run_tasks(self, tasks, count, wgs, options, workers)
+    
+    def replay_scenarios(self, probability_types: List[str], model: str, url: str, count: int = 1,
+                         rate: str = "1000/s", concurrency: int = 64,
+                         headers: Optional[Dict[str, str]] = None, timeout: float = 30.0) -> Dict[str, Any]:
+        """POST WGS records generated on the fly to an HTTP endpoint at a fixed rate.
+        
+        Args:
+            probability_types: Scenario types to draw records from (cycled per request)
+            model: Model name to generate records for
+            url: Target http:// or https:// URL
+            count: Number of requests to send
+            rate: Request rate such as '5000/s'
+            concurrency: Maximum number of in-flight requests (one keep-alive connection each)
+            headers: Extra request headers
+            timeout: Per-request timeout in seconds
+            
+        Returns:
+            Replay statistics including status counts and latency percentiles
+        """
+        stats = run_replay(self._replay_plans(probability_types, model), url, rate, count, concurrency,
+                           headers, timeout)
+        if self.metrics is not None:
+            self.metrics.record_replay(stats)
+        return stats
+    
+    async def areplay_scenarios(self, probability_types: List[str], model: str, url: str, count: int = 1,
+                                rate: str = "1000/s", concurrency: int = 64,
+                                headers: Optional[Dict[str, str]] = None, timeout: float = 30.0) -> Dict[str, Any]:
+        """replay_scenarios on the running event loop, e.g. next to agenerate and test assertions.
+        
+        Takes the same arguments and returns the same statistics as replay_scenarios.
+        """
+        plans = self._replay_plans(probability_types, model)
+        stats = await replay_records(iter_request_bodies(plans, count), url, parse_rate(rate), count,
+                                     concurrency, headers, timeout)
+        if self.metrics is not None:
+            self.metrics.record_replay(stats)
+        return stats
+    
+    def _replay_plans(self, probability_types: List[str], model: str) -> List[WgsPlan]:
+        """Compile the plans replay requests cycle through."""
+        plans = []
+        for prob_type in probability_types:
+            data = self._get_probability_data(model, prob_type)
+            if data:
+                plans.append(WgsPlan(data, prob_type))
+        
+        if not plans:
+            raise ValueError(f"No probability data found for model {model}")
+        return plans
+    
     def list_models(self) -> Dict[str, Dict[str, bool]]:
         """List available models and their probability types.
         
@@ -253,3 +947,71 @@ class MockGenCore:
                     errors.append(f"Missing {prob_type} data for model {model}")
         
         return errors
+    
+    def verify_outputs(self, paths: Optional[List[str]] = None, model: Optional[str] = None,
+                       workers: Optional[int] = None, max_violations: int = 1000) -> Dict[str, Any]:
+        """Verify generated records against the WGS template and the configured value pools.
+        
+        Args:
+            paths: Files, directories, JSONL files or archives to check (default: output directory)
+            model: Model to check against (inferred from file names when omitted)
+            workers: Number of worker processes (default: one per CPU)
+            max_violations: Maximum number of violations to keep in the report
+            
+        Returns:
+            Report with file, record and violation counts and the retained violations
+        """
+        probability_data = {}
+        for model_name in self._get_model_names():
+            for prob_type in ["positive", "negative", "exclusion"]:
+                data = self._get_probability_data(model_name, prob_type)
+                if data:
+                    probability_data[(model_name, prob_type)] = data
+        
+        if model is not None and not any(name == model for name, _ in probability_data):
+            raise ValueError(f"No probability data found for model {model}")
+        
+        expectations = build_expectations({
+            key: WgsPlan(data, key[1]) for key, data in probability_data.items()
+        }, member_pools(self.config)[0])
+        report = verify_paths(paths or [self.output_dir], expectations, model, workers, max_violations)
+        if self.metrics is not None:
+            self.metrics.record_verify(report)
+        return report
+    
+    def merge_shard_manifests(self, paths: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Merge the manifests of a sharded run into one manifest per model and scenario type.
+        
+        Args:
+            paths: Shard manifests, or directories holding shard-k-of-N subdirectories
+                (default: output directory)
+            
+        Returns:
+            One dictionary per merged manifest with 'path', 'root', 'records' and 'shards'
+        """
+        return merge_manifests(paths or [self.output_dir], self.output_dir)
+    
+    def build_record_index(self, paths: Optional[List[str]] = None, workers: Optional[int] = None) -> Dict[str, Any]:
+        """Rebuild the output directory's inverted index from existing records.
+        
+        Args:
+            paths: Files, directories, JSONL files or archives to index (default: output directory)
+            workers: Number of worker processes (default: one per CPU)
+            
+        Returns:
+            Dictionary with the index 'path' and the number of 'records' indexed
+        """
+        return build_index(paths or [self.output_dir], self.output_dir, self._get_model_names(), workers)
+    
+    def query_records(self, conditions: List[str], limit: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Look up records in the output directory's index.
+        
+        Args:
+            conditions: FIELD=VALUE conditions that must all match, e.g. HCID=ABCDEFGHI;
+                'model' and 'probability_type' are indexed too
+            limit: Maximum number of records to return
+            
+        Returns:
+            Iterator of dictionaries with the record 'file', 'offset' and raw 'record' bytes
+        """
+        return query_index(self.output_dir, [parse_condition(condition) for condition in conditions], limit)
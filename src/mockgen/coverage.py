@@ -0,0 +1,197 @@
+"""
+MockGen Coverage - Covering-array record sets
+Builds a small set of records that covers every pool value (1-wise) or every pair of values across fields (2-wise)
+"""
+
+import random
+import time
+from typing import Dict, List, Any, Optional, Iterator
+
+from .plan import PRETTY, WgsPlan, expand_weighted
+
+
+COVERAGE_STRENGTHS = [1, 2]
+
+
+def _one_wise_rows(sizes: List[int]) -> List[List[int]]:
+    """One row per value of the largest pool; every field cycles through its own values."""
+    return [[(row + field) % size for field, size in enumerate(sizes)] for row in range(max(sizes))]
+
+
+def _pairwise_rows(sizes: List[int]) -> List[List[int]]:
+    """Greedy in-parameter-order (IPOG) construction of a pairwise covering array.
+    
+    Fields are added largest first. The two largest start as their full
+    cross product; each further field is first assigned to the existing
+    rows (horizontal growth), then rows are added for the pairs still
+    uncovered (vertical growth). Uncovered values are kept as int bitmasks
+    per (earlier field, value) and a row's gains are summed with bit-sliced
+    counters, so choosing a value costs a few big-int operations per
+    earlier field instead of a loop over every value.
+    """
+    count = len(sizes)
+    order = sorted(range(count), key=lambda field: -sizes[field])
+    first, second = order[0], order[1]
+    rows: List[List[Optional[int]]] = []
+    for a in range(sizes[first]):
+        for b in range(sizes[second]):
+            row: List[Optional[int]] = [None] * count
+            row[first] = a
+            row[second] = b
+            rows.append(row)
+    
+    # Rows that still have a free slot in a field placed so far
+    flexible: List[List[Optional[int]]] = []
+    
+    for step in range(2, count):
+        field = order[step]
+        size = sizes[field]
+        earlier = order[:step]
+        full = (1 << size) - 1
+        uncovered = {other: [full] * sizes[other] for other in earlier}
+        
+        # Horizontal growth: give each row the value that closes the most pairs
+        for number, row in enumerate(rows):
+            # Bit-sliced counters: planes[k] holds bit k of every value's gain
+            planes: List[int] = []
+            for other in earlier:
+                value = row[other]
+                if value is not None:
+                    carry = uncovered[other][value]
+                    for level in range(len(planes)):
+                        if not carry:
+                            break
+                        planes[level], carry = planes[level] ^ carry, planes[level] & carry
+                    if carry:
+                        planes.append(carry)
+            if not planes:
+                continue
+            candidates = full
+            for plane in reversed(planes):
+                if candidates & plane:
+                    candidates &= plane
+            # Rotate the tie-break so equally good values are spread over the rows
+            shift = number % size
+            rotated = candidates >> shift
+            chosen = (rotated & -rotated).bit_length() - 1 + shift if rotated else \
+                (candidates & -candidates).bit_length() - 1
+            bit = 1 << chosen
+            row[field] = chosen
+            for other in earlier:
+                value = row[other]
+                if value is not None:
+                    uncovered[other][value] &= ~bit
+        
+        # Vertical growth: cover the remaining pairs, preferring rows whose
+        # free slots can take them before adding new rows
+        placed = earlier + [field]
+        flexible = [row for row in flexible if any(row[other] is None for other in placed)]
+        known = {id(row) for row in flexible}
+        flexible.extend(row for row in rows if row[field] is None and id(row) not in known)
+        by_value: Dict[Optional[int], List[List[Optional[int]]]] = {}
+        for row in flexible:
+            by_value.setdefault(row[field], []).append(row)
+        
+        for other in earlier:
+            for value, mask in enumerate(uncovered[other]):
+                while mask:
+                    bit = mask & -mask
+                    mask ^= bit
+                    chosen = bit.bit_length() - 1
+                    for row in by_value.get(chosen, ()):
+                        if row[other] is None:
+                            row[other] = value
+                            break
+                    else:
+                        for row in by_value.get(None, ()):
+                            if row[other] is None or row[other] == value:
+                                row[other] = value
+                                row[field] = chosen
+                                by_value[None].remove(row)
+                                by_value.setdefault(chosen, []).append(row)
+                                break
+                        else:
+                            row = [None] * count
+                            row[other] = value
+                            row[field] = chosen
+                            by_value.setdefault(chosen, []).append(row)
+                            flexible.append(row)
+                            rows.append(row)
+    
+    # Free slots can take any value; cycling keeps the extra values varied
+    for number, row in enumerate(rows):
+        for field, value in enumerate(row):
+            if value is None:
+                row[field] = (number + field) % sizes[field]
+    return rows
+
+
+def covering_rows(sizes: List[int], strength: int = 2) -> List[List[int]]:
+    """Compute rows of value indices covering every value (1) or every pair of values (2).
+    
+    Args:
+        sizes: Number of values of each field
+        strength: Interaction strength, 1 or 2
+    
+    Returns:
+        Rows with one value index per field
+    """
+    if strength not in COVERAGE_STRENGTHS:
+        raise ValueError(f"Unsupported coverage strength {strength}. Use 1 or 2")
+    if not sizes:
+        return [[]]
+    if strength == 1 or len(sizes) == 1:
+        return _one_wise_rows(sizes)
+    return _pairwise_rows(sizes)
+
+
+class CoveringPlan(WgsPlan):
+    """WGS plan that emits a covering array instead of random draws.
+    
+    Every pool, including ClaimDetails pools, is one field of the array.
+    rows holds the chosen value indices in slot order, and count is the
+    number of records needed for full coverage.
+    """
+    
+    def __init__(self, data: Dict[str, Any], probability_type: str, strength: int = 2):
+        super().__init__(data, probability_type)
+        self.strength = strength
+        self.rows = covering_rows(self.pool_sizes, strength)
+    
+    def _pool(self, spec: Dict[str, Any]) -> List[Any]:
+        # Weights only matter to random draws; the array covers every value once
+        expand_weighted(spec)
+        return [value for value, weight in zip(spec["values"], spec["weights"]) if weight > 0]
+    
+    @property
+    def count(self) -> int:
+        return len(self.rows)
+    
+    def iter_records(self, count: int, seed: Optional[int] = None, start: int = 1,
+                     rng: Any = random) -> Iterator[Dict[str, Any]]:
+        """Yield the first `count` covering records (see WgsPlan.iter_records)."""
+        record, cells = self._record_cells()
+        for row in self.rows[start - 1:start - 1 + count]:
+            for (container, key, pool, _), index in zip(cells, row):
+                container[key] = pool[index]
+            yield record
+    
+    def iter_payloads(self, count: int, style: str = PRETTY, seed: Optional[int] = None, start: int = 1,
+                      rng: Any = random, timings: Optional[List[float]] = None) -> Iterator[bytes]:
+        """Yield the first `count` covering records serialized (see WgsPlan.iter_payloads)."""
+        parts, variables = self._compile_fragments(style)
+        join = b"".join
+        clock = time.perf_counter
+        for row in self.rows[start - 1:start - 1 + count]:
+            if timings is not None:
+                began = clock()
+            for (position, encoded, _), index in zip(variables, row):
+                parts[position] = encoded[index]
+            if timings is None:
+                yield join(parts)
+            else:
+                sampled = clock()
+                payload = join(parts)
+                timings[0] += sampled - began
+                timings[1] += clock() - sampled
+                yield payload
@@ -0,0 +1,129 @@
+"""
+MockGen Incremental - Regenerating only what a config change affects
+Stores per-field fingerprints of each compiled scenario type and patches seeded outputs record by record
+"""
+
+import json
+import os
+from itertools import zip_longest
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Iterator, Tuple
+
+from .cache import content_hash
+from .manifest import ManifestWriter, read_manifest_header, record_digest
+from .plan import WgsPlan
+from .sinks import _write_all
+
+
+PLAN_SUFFIX = ".plan"
+
+# Formats whose files belong to exactly one scenario type, so they can be replaced independently
+INCREMENTAL_FORMATS = ["json", "ndjson", "csv", "tsv"]
+
+
+def field_fingerprints(plan: WgsPlan) -> Dict[str, str]:
+    """Hash every output field of a compiled plan, including its position in the record.
+    
+    ClaimDetails fields are listed as 'ClaimDetails.<field>'.
+    """
+    fingerprints = {}
+    for position, (field, kind, payload) in enumerate(plan.slots):
+        if kind == "claim":
+            for claim_position, (claim_field, claim_kind, claim_payload) in enumerate(payload):
+                fingerprints[f"{field}.{claim_field}"] = content_hash([position, claim_position, claim_kind,
+                                                                       claim_payload])
+        else:
+            fingerprints[field] = content_hash([position, kind, payload])
+    return fingerprints
+
+
+def changed_fields(previous: Dict[str, str], current: Dict[str, str]) -> List[str]:
+    """Fields that were added, removed or changed between two fingerprints."""
+    return sorted(field for field in set(previous) | set(current) if previous.get(field) != current.get(field))
+
+
+def plan_state_path(output_dir: Path, model: str, probability_type: str) -> Path:
+    """One state file per scenario type, so parallel workers never write the same file."""
+    return Path(output_dir) / f"{model}_{probability_type}{PLAN_SUFFIX}"
+
+
+def load_plan_state(path: Path) -> Optional[Dict[str, Any]]:
+    """Read a stored plan state, or None if there is none (or it is unreadable)."""
+    try:
+        with Path(path).open("r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_plan_state(path: Path, state: Dict[str, Any]) -> None:
+    """Write a plan state atomically."""
+    staging = Path(path).with_name(Path(path).name + ".tmp")
+    with staging.open("w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(staging, path)
+
+
+def patch_records(payloads: Iterator[bytes], manifest: Path, output_dir: Path,
+                  line_end: bytes = b"") -> Tuple[int, int, str]:
+    """Rewrite only the records whose bytes no longer match their manifest hash.
+    
+    JSON records (one file each) are rewritten whole; NDJSON records of a
+    fixed size (line_end b"\\n") are overwritten in place at their offset.
+    The manifest is rewritten with the new hashes.
+    
+    Args:
+        payloads: Regenerated records, in manifest order
+        manifest: Manifest of the existing output
+        output_dir: Directory holding the output files
+        line_end: Bytes the sink appends to every record
+    
+    Returns:
+        (records rewritten, bytes rewritten, new manifest root)
+    """
+    staging = manifest.with_name(manifest.name + ".tmp")
+    writer = ManifestWriter(staging, read_manifest_header(manifest))
+    changed = 0
+    changed_bytes = 0
+    descriptors: Dict[str, int] = {}
+    flags = os.O_WRONLY | getattr(os, "O_BINARY", 0)
+    try:
+        with manifest.open("r", encoding="utf-8") as f:
+            entries = (line.rstrip("\n").split("\t") for line in f if not line.startswith("#"))
+            for payload, entry in zip_longest(payloads, entries):
+                if payload is None or entry is None:
+                    raise ValueError(f"Manifest '{manifest}' does not match the number of records")
+                index, name, offset, size, digest = entry
+                record = payload + line_end
+                new_digest = record_digest(record)
+                if new_digest.hex() != digest:
+                    path = str(Path(output_dir) / name)
+                    if line_end:
+                        if len(record) != int(size):
+                            raise ValueError(f"Record {index} changed size; fixed-size NDJSON records "
+                                             f"can only be patched in place")
+                        fd = descriptors.get(name)
+                        if fd is None:
+                            fd = descriptors[name] = os.open(path, flags)
+                        # lseek + write rather than os.pwrite, which Windows lacks
+                        os.lseek(fd, int(offset), os.SEEK_SET)
+                        _write_all(fd, record)
+                    else:
+                        fd = os.open(path, flags | os.O_CREAT | os.O_TRUNC, 0o644)
+                        try:
+                            _write_all(fd, record)
+                        finally:
+                            os.close(fd)
+                    changed += 1
+                    changed_bytes += len(record)
+                writer.add_digest(int(index), name, int(offset), len(record), new_digest)
+    except BaseException:
+        writer.close()
+        staging.unlink()
+        raise
+    finally:
+        for fd in descriptors.values():
+            os.close(fd)
+    root = writer.close()
+    os.replace(staging, manifest)
+    return changed, changed_bytes, root
@@ -0,0 +1,402 @@
+"""
+MockGen Index - Inverted index over generated corpora
+Maps field values to record locations in a compact SQLite file so records can be looked up without scanning the corpus
+"""
+
+import json
+import os
+import sqlite3
+import tarfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple, Iterator
+
+from .sizing import PADDING_KEY
+from .verify import WGS_KEY_PREFIX, JSONL_SUFFIXES, iter_archive, iter_lines, iter_tasks
+
+
+INDEX_NAME = "mockgen_index.db"
+
+# Separates an archive path from the member a record was read from
+ARCHIVE_MEMBER_SEPARATOR = "!"
+
+# Pseudo-fields indexed for every record next to its own fields
+MODEL_FIELD = "model"
+TYPE_FIELD = "probability_type"
+
+CLAIM_FIELD = "ClaimDetails"
+
+
+def index_path(output_dir: Path) -> Path:
+    """Location of the index for an output directory."""
+    return Path(output_dir) / INDEX_NAME
+
+
+def index_shard_path(output_dir: Path, worker: int) -> Path:
+    """Location of the private index shard a worker process writes before merge_index_shards."""
+    return Path(output_dir) / f"{INDEX_NAME}.shard-{worker}"
+
+
+def record_terms(record: Any) -> Tuple[Optional[str], List[Tuple[str, str]]]:
+    """Extract the (field, value) terms of one record.
+    
+    WGS values are unwrapped from their one-element lists; ClaimDetails fields
+    are indexed per line as 'ClaimDetails.<field>'. Non-string values are
+    indexed as their compact JSON text.
+    
+    Returns:
+        (probability type from the WGS key or None, terms)
+    """
+    if not isinstance(record, dict):
+        return None, []
+    probability_type = None
+    body = record
+    for key, value in record.items():
+        if key.startswith(WGS_KEY_PREFIX) and isinstance(value, dict):
+            probability_type = key[len(WGS_KEY_PREFIX):].lower()
+            body = value
+            break
+    
+    terms = []
+    for field, value in body.items():
+        if field == PADDING_KEY:
+            continue
+        if field == CLAIM_FIELD and isinstance(value, list) and value and isinstance(value[0], dict):
+            for line in value:
+                for claim_field, claim_value in line.items():
+                    terms.append((f"{CLAIM_FIELD}.{claim_field}", _term_value(claim_value)))
+            continue
+        if isinstance(value, list) and len(value) == 1:
+            value = value[0]
+        terms.append((field, _term_value(value)))
+    return probability_type, terms
+
+
+def _term_value(value: Any) -> str:
+    """Text a value is indexed and queried as."""
+    if isinstance(value, str):
+        return value
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+class IndexWriter:
+    """Adds records to the inverted index, batching inserts into large transactions.
+    
+    Tables:
+        files    - file_id, name (relative to the index directory)
+        terms    - term_id, field, value
+        records  - record_id, file_id, byte offset, size
+        postings - (term_id, record_id), clustered by term so a lookup is one range scan
+    
+    Writers in one process may share an index; SQLite serializes their
+    transactions. Worker processes each write a shard of their own instead
+    (see index_shard_path) that the parent merges with merge_index_shards,
+    so they never contend for the write lock.
+    """
+    
+    BATCH_SIZE = 10000
+    
+    def __init__(self, path: Path, model: Optional[str] = None, probability_type: Optional[str] = None):
+        self.path = Path(path)
+        self.root = self.path.parent
+        self.model = model
+        self.probability_type = probability_type
+        self.records = 0
+        self._files: Dict[str, int] = {}
+        self._terms: Dict[Tuple[str, str], int] = {}
+        self._pending: List[Tuple[str, int, int, List[Tuple[str, str]]]] = []
+        
+        self.conn = sqlite3.connect(str(self.path), isolation_level=None, timeout=60)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS files (file_id INTEGER PRIMARY KEY, name TEXT UNIQUE)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS terms (term_id INTEGER PRIMARY KEY, field TEXT, value TEXT, "
+                          "UNIQUE (field, value))")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS records (record_id INTEGER PRIMARY KEY, file_id INTEGER, "
+                          "offset INTEGER, size INTEGER)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS postings (term_id INTEGER, record_id INTEGER, "
+                          "PRIMARY KEY (term_id, record_id)) WITHOUT ROWID")
+    
+    def location(self, path: Any) -> str:
+        """Name under which a file (or 'archive!member') is stored, relative to the index directory."""
+        path = str(path)
+        member = ""
+        if ARCHIVE_MEMBER_SEPARATOR in path:
+            path, member = path.split(ARCHIVE_MEMBER_SEPARATOR, 1)
+            member = ARCHIVE_MEMBER_SEPARATOR + member
+        return Path(os.path.relpath(path, self.root)).as_posix() + member
+    
+    def add(self, name: str, offset: int, payload: bytes, directory: Optional[Path] = None) -> None:
+        """Index one serialized record as written by a sink.
+        
+        Args:
+            name: File name reported by the sink
+            offset: Byte offset of the record in that file
+            payload: Serialized record bytes (an NDJSON line includes its newline)
+            directory: Directory holding the file (default: the index directory)
+        """
+        probability_type, terms = record_terms(json.loads(payload))
+        location = self.location((directory or self.root) / name)
+        self.add_terms(location, offset, len(payload), probability_type, terms)
+    
+    def add_terms(self, location: str, offset: int, size: int, probability_type: Optional[str],
+                  terms: List[Tuple[str, str]], model: Optional[str] = None) -> None:
+        """Index one record from already extracted terms."""
+        model = model or self.model
+        probability_type = probability_type or self.probability_type
+        if model:
+            terms.append((MODEL_FIELD, model))
+        if probability_type:
+            terms.append((TYPE_FIELD, probability_type))
+        self._pending.append((location, offset, size, terms))
+        self.records += 1
+        if len(self._pending) >= self.BATCH_SIZE:
+            self._flush()
+    
+    def _id(self, cache: Dict[Any, int], table: str, columns: Tuple[str, ...], key: Any) -> int:
+        """Look up or insert a file or term row, caching its id."""
+        row_id = cache.get(key)
+        if row_id is None:
+            values = key if isinstance(key, tuple) else (key,)
+            where = " AND ".join(f"{column} = ?" for column in columns)
+            self.conn.execute(f"INSERT OR IGNORE INTO {table} ({', '.join(columns)}) "
+                              f"VALUES ({', '.join('?' * len(columns))})", values)
+            row_id = cache[key] = self.conn.execute(f"SELECT rowid FROM {table} WHERE {where}", values).fetchone()[0]
+        return row_id
+    
+    def _flush(self) -> None:
+        """Insert all pending records and their postings in a single transaction."""
+        if not self._pending:
+            return
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            next_id = self.conn.execute("SELECT COALESCE(MAX(record_id), 0) + 1 FROM records").fetchone()[0]
+            records = []
+            postings = []
+            for record_id, (location, offset, size, terms) in enumerate(self._pending, next_id):
+                records.append((record_id, self._id(self._files, "files", ("name",), location), offset, size))
+                postings.extend((self._id(self._terms, "terms", ("field", "value"), term), record_id)
+                                for term in terms)
+            self.conn.executemany("INSERT INTO records VALUES (?, ?, ?, ?)", records)
+            self.conn.executemany("INSERT OR IGNORE INTO postings VALUES (?, ?)", postings)
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            # Ids cached inside the rolled back transaction no longer exist
+            self._files.clear()
+            self._terms.clear()
+            raise
+        self._pending = []
+    
+    def close(self) -> int:
+        """Flush pending records and close the index.
+        
+        Returns:
+            Number of records added by this writer
+        """
+        try:
+            self._flush()
+        finally:
+            self.conn.close()
+        return self.records
+
+
+def merge_index_shards(path: Path, shards: List[Path]) -> int:
+    """Merge worker index shards into an index and delete them.
+    
+    Files and terms are matched by name and value, and the shards' records
+    get new ids after the index's existing records.
+    
+    Returns:
+        Number of records merged
+    """
+    # Creates the index tables if this is the index's first data
+    IndexWriter(path).close()
+    merged = 0
+    conn = sqlite3.connect(str(path), isolation_level=None, timeout=60)
+    try:
+        for shard in shards:
+            conn.execute("ATTACH DATABASE ? AS shard", (str(shard),))
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    base = conn.execute("SELECT COALESCE(MAX(record_id), 0) FROM main.records").fetchone()[0]
+                    conn.execute("INSERT OR IGNORE INTO main.files (name) SELECT name FROM shard.files")
+                    conn.execute("INSERT OR IGNORE INTO main.terms (field, value) SELECT field, value FROM shard.terms")
+                    merged += conn.execute(
+                        "INSERT INTO main.records SELECT r.record_id + ?, f.file_id, r.offset, r.size "
+                        "FROM shard.records r JOIN shard.files s ON s.file_id = r.file_id "
+                        "JOIN main.files f ON f.name = s.name", (base,)).rowcount
+                    conn.execute(
+                        "INSERT OR IGNORE INTO main.postings SELECT t.term_id, p.record_id + ? "
+                        "FROM shard.postings p JOIN shard.terms s ON s.term_id = p.term_id "
+                        "JOIN main.terms t ON t.field = s.field AND t.value = s.value", (base,))
+                    conn.execute("COMMIT")
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+            finally:
+                conn.execute("DETACH DATABASE shard")
+            for suffix in ("", "-wal", "-shm"):
+                leftover = Path(str(shard) + suffix)
+                if leftover.exists():
+                    leftover.unlink()
+    finally:
+        conn.close()
+    return merged
+
+
+def _model_for(name: str, models: List[str]) -> Optional[str]:
+    """Model whose name prefixes a file name, longest first."""
+    base = os.path.basename(name.split(ARCHIVE_MEMBER_SEPARATOR)[-1])
+    return next((model for model in models if base.startswith(model + "_")), None)
+
+
+def _index_task(task: Tuple[str, Any]) -> List[Tuple[str, int, int, Optional[str], List[Tuple[str, str]]]]:
+    """Extract the terms of one unit of work (see verify.iter_tasks) inside a worker process."""
+    kind, payload = task
+    entries = []
+    
+    def add_raw(location: str, offset: int, raw: bytes) -> None:
+        try:
+            record = json.loads(raw)
+        except ValueError:
+            return
+        probability_type, terms = record_terms(record)
+        entries.append((location, offset, len(raw), probability_type, terms))
+    
+    if kind == "files":
+        for name in payload:
+            with open(name, "rb") as f:
+                add_raw(name, 0, f.read())
+    elif kind == "jsonl":
+        name, start, end = payload
+        with open(name, "rb") as f:
+            for offset, line in iter_lines(f, start, end):
+                add_raw(name, offset, line)
+    elif kind == "archive":
+        for member, stream in iter_archive(payload):
+            location = f"{payload}{ARCHIVE_MEMBER_SEPARATOR}{member}"
+            if member.endswith(JSONL_SUFFIXES):
+                for offset, line in iter_lines(stream, 0, None):
+                    add_raw(location, offset, line)
+            else:
+                add_raw(location, 0, stream.read())
+    return entries
+
+
+def build_index(paths: List[Path], output_dir: Path, models: List[str],
+                workers: Optional[int] = None) -> Dict[str, Any]:
+    """Rebuild the index from the records under files, directories, JSONL files or archives.
+    
+    Records are parsed over a process pool and inserted by this process.
+    
+    Args:
+        paths: Files or directories to index
+        output_dir: Directory of the index file
+        models: Known model names, used to tell a record's model from its file name
+        workers: Number of worker processes (1 parses in-process)
+    
+    Returns:
+        Dictionary with the index 'path' and the number of 'records' added
+    """
+    workers = workers or os.cpu_count() or 1
+    models = sorted(models, key=len, reverse=True)
+    path = index_path(output_dir)
+    for stale in (path, path.with_name(path.name + "-wal"), path.with_name(path.name + "-shm")):
+        if stale.exists():
+            stale.unlink()
+    writer = IndexWriter(path)
+    
+    def merge(entries: List[Tuple[str, int, int, Optional[str], List[Tuple[str, str]]]]) -> None:
+        for name, offset, size, probability_type, terms in entries:
+            writer.add_terms(writer.location(name), offset, size, probability_type, terms,
+                             _model_for(name, models))
+    
+    tasks = iter_tasks([Path(p) for p in paths])
+    try:
+        if workers == 1:
+            for task in tasks:
+                merge(_index_task(task))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                pending = set()
+                for task in tasks:
+                    pending.add(executor.submit(_index_task, task))
+                    if len(pending) >= workers * 2:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            merge(future.result())
+                for future in pending:
+                    merge(future.result())
+    finally:
+        records = writer.close()
+    return {"path": writer.path, "records": records}
+
+
+def parse_condition(condition: str) -> Tuple[str, str]:
+    """Parse a 'FIELD=VALUE' query condition."""
+    field, separator, value = condition.partition("=")
+    if not separator or not field:
+        raise ValueError(f"Invalid query condition '{condition}'. Use FIELD=VALUE, e.g. HCID=ABCDEFGHI")
+    return field.strip(), value
+
+
+def _read_record(root: Path, name: str, offset: int, size: int) -> bytes:
+    """Read one record's bytes from a file or an archive member."""
+    path, _, member = name.partition(ARCHIVE_MEMBER_SEPARATOR)
+    path = str(root / path)
+    if not member:
+        with open(path, "rb") as f:
+            f.seek(offset)
+            return f.read(size)
+    if path.endswith(".zip"):
+        with zipfile.ZipFile(path) as archive, archive.open(member) as stream:
+            stream.read(offset)
+            return stream.read(size)
+    with tarfile.open(path, "r:*") as archive:
+        stream = archive.extractfile(member)
+        stream.seek(offset)
+        return stream.read(size)
+
+
+def query_index(output_dir: Path, conditions: List[Tuple[str, str]],
+                limit: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """Yield the records matching every (field, value) condition.
+    
+    Each condition is one range scan over the postings of its term; the
+    record ids of all conditions are intersected inside SQLite.
+    
+    Args:
+        output_dir: Directory holding the index
+        conditions: (field, value) pairs that must all match
+        limit: Maximum number of records to yield
+    
+    Yields:
+        Dictionaries with the record 'file', 'offset' and raw 'record' bytes
+    """
+    path = index_path(output_dir)
+    if not path.exists():
+        raise ValueError(f"No index found at '{path}'; generate with --index or run --build-index first")
+    if not conditions:
+        raise ValueError("A query needs at least one FIELD=VALUE condition")
+    
+    # as_uri percent-encodes the path, so '?', '#' and '%' in directory names stay part of it
+    conn = sqlite3.connect(Path(path).resolve().as_uri() + "?mode=ro", uri=True)
+    try:
+        matches = " INTERSECT ".join(
+            "SELECT record_id FROM postings WHERE term_id = (SELECT term_id FROM terms WHERE field = ? AND value = ?)"
+            for _ in conditions
+        )
+        sql = (f"SELECT files.name, records.offset, records.size FROM records "
+               f"JOIN files ON files.file_id = records.file_id "
+               f"WHERE records.record_id IN ({matches}) ORDER BY records.record_id")
+        parameters: List[Any] = [item for condition in conditions for item in condition]
+        if limit is not None:
+            sql += " LIMIT ?"
+            parameters.append(limit)
+        for name, offset, size in conn.execute(sql, parameters):
+            yield {"file": name, "offset": offset, "record": _read_record(path.parent, name, offset, size)}
+    finally:
+        conn.close()
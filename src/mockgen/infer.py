@@ -0,0 +1,284 @@
+"""
+MockGen Infer - Value pools inferred from sample corpora
+Streams WGS-shaped records and keeps bounded per-field sketches (heavy hitters plus a reservoir sample) to emit a weighted config
+"""
+
+import json
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+
+from .plan import WGS_TEMPLATE_FIELDS, DEFAULT_VALUE
+from .sizing import PADDING_KEY
+from .verify import WGS_KEY_PREFIX, JSONL_SUFFIXES, iter_archive, iter_lines, iter_tasks
+
+
+# Counters and reservoir slots kept per field
+DEFAULT_POOL_SIZE = 64
+
+# Records without a WGS key are taken as the body of a record of this type
+DEFAULT_PROBABILITY_TYPE = "positive"
+
+CLAIM_FIELD = "ClaimDetails"
+
+
+class FieldSketch:
+    """Bounded summary of the values seen in one field.
+    
+    Heavy hitters are counted with the Misra-Gries algorithm: each counter is
+    an underestimate of its value's frequency by no more than
+    seen / (size + 1). Decrements are batched: up to 2 * size counters are
+    kept, and on overflow the (size + 1)-th largest count is subtracted from
+    all of them at once, leaving at most `size`. That costs O(size log size)
+    once per size new keys instead of O(size) per new key, with the same
+    error bound. While no counter has been evicted the counts are exact.
+    A uniform reservoir sample of `size` occurrences keeps some of the long
+    tail. Values are held as canonical JSON text so any JSON value can be a key.
+    """
+    
+    __slots__ = ("size", "seen", "counters", "exact", "reservoir")
+    
+    def __init__(self, size: int = DEFAULT_POOL_SIZE):
+        self.size = size
+        self.seen = 0
+        self.counters: Dict[str, int] = {}
+        self.exact = True
+        self.reservoir: List[str] = []
+    
+    def add(self, key: str, rng: random.Random) -> None:
+        """Count one occurrence of a value."""
+        self.seen += 1
+        counters = self.counters
+        if key in counters:
+            counters[key] += 1
+        else:
+            counters[key] = 1
+            if len(counters) > 2 * self.size:
+                self._prune()
+        
+        # Algorithm R
+        if len(self.reservoir) < self.size:
+            self.reservoir.append(key)
+        else:
+            slot = rng.randrange(self.seen)
+            if slot < self.size:
+                self.reservoir[slot] = key
+    
+    def _prune(self) -> None:
+        """Cut the counters down to at most `size`, the batched Misra-Gries decrement."""
+        counters = self.counters
+        if len(counters) > self.size:
+            # Subtracting the (size + 1)-th largest count keeps the Misra-Gries error bound
+            cut = sorted(counters.values(), reverse=True)[self.size]
+            self.counters = {key: count - cut for key, count in counters.items() if count > cut}
+            self.exact = False
+    
+    def merge(self, other: "FieldSketch", rng: random.Random) -> None:
+        """Fold the sketch of another part of the corpus into this one."""
+        counters = self.counters
+        for key, count in other.counters.items():
+            counters[key] = counters.get(key, 0) + count
+        self._prune()
+        self.exact = self.exact and other.exact
+        
+        # Draw the merged reservoir from both samples in proportion to the occurrences behind them
+        mine, theirs = list(self.reservoir), list(other.reservoir)
+        left, right = self.seen, other.seen
+        merged = []
+        while len(merged) < self.size and (mine or theirs):
+            if theirs and (not mine or rng.randrange(left + right) >= left):
+                merged.append(theirs.pop(rng.randrange(len(theirs))))
+                right -= 1
+            else:
+                merged.append(mine.pop(rng.randrange(len(mine))))
+                left -= 1
+        self.reservoir = merged
+        self.seen += other.seen
+    
+    def pool(self) -> Any:
+        """Return the inferred pool: a plain list if all values are equally likely, else a weighted spec."""
+        self._prune()
+        weights = dict(self.counters)
+        if not self.exact:
+            # Occurrences not attributed to a counter are spread over the sampled tail values
+            tail = [key for key in dict.fromkeys(self.reservoir) if key not in weights]
+            remainder = self.seen - sum(weights.values())
+            for key in tail:
+                weights[key] = max(1, remainder // len(tail))
+        ordered = sorted(weights.items(), key=lambda item: -item[1])
+        values = [json.loads(key) for key, _ in ordered]
+        counts = [count for _, count in ordered]
+        if len(set(counts)) <= 1:
+            return values
+        return {"values": values, "weights": counts}
+
+
+def _key(value: Any) -> str:
+    """Canonical JSON text of a value, used as its counter key."""
+    return json.dumps(value, ensure_ascii=False, sort_keys=True)
+
+
+def _add_record(result: Dict[str, Any], record: Any, size: int, rng: random.Random) -> None:
+    """Add the fields of one WGS (or plain field mapping) record to the per-type sketches."""
+    if not isinstance(record, dict):
+        return
+    probability_type = DEFAULT_PROBABILITY_TYPE
+    body = record
+    for key, value in record.items():
+        if key.startswith(WGS_KEY_PREFIX) and isinstance(value, dict):
+            probability_type = key[len(WGS_KEY_PREFIX):].lower()
+            body = value
+            break
+    fields = result["sketches"].setdefault(probability_type, {})
+    result["records"][probability_type] = result["records"].get(probability_type, 0) + 1
+    
+    for field, value in body.items():
+        if field == PADDING_KEY:
+            continue
+        if field == CLAIM_FIELD and isinstance(value, list) and value and isinstance(value[0], dict):
+            # Every claim line is one occurrence of each of its fields
+            for line in value:
+                for claim_field, claim_value in line.items():
+                    name = f"{CLAIM_FIELD}.{claim_field}"
+                    sketch = fields.get(name)
+                    if sketch is None:
+                        sketch = fields[name] = FieldSketch(size)
+                    sketch.add(_key(claim_value), rng)
+            continue
+        if isinstance(value, list) and len(value) == 1:
+            value = value[0]
+        sketch = fields.get(field)
+        if sketch is None:
+            sketch = fields[field] = FieldSketch(size)
+        if value != DEFAULT_VALUE:
+            sketch.add(_key(value), rng)
+
+
+def _infer_task(task: Tuple[str, Any], size: int) -> Dict[str, Any]:
+    """Sketch one unit of work (see verify.iter_tasks) inside a worker process.
+    
+    Returns:
+        Dictionary with 'files', 'records' per probability type and per-type field 'sketches'
+    """
+    kind, payload = task
+    result: Dict[str, Any] = {"files": 0, "records": {}, "sketches": {}}
+    rng = random.Random(repr(task))
+    
+    def add_raw(raw: bytes) -> None:
+        try:
+            record = json.loads(raw)
+        except ValueError:
+            return
+        _add_record(result, record, size, rng)
+    
+    if kind == "files":
+        for name in payload:
+            result["files"] += 1
+            with open(name, "rb") as f:
+                add_raw(f.read())
+    elif kind == "jsonl":
+        name, start, end = payload
+        result["files"] += 1 if start == 0 else 0
+        with open(name, "rb") as f:
+            for _, line in iter_lines(f, start, end):
+                add_raw(line)
+    elif kind == "archive":
+        result["files"] += 1
+        for member, stream in iter_archive(payload):
+            if member.endswith(JSONL_SUFFIXES):
+                for _, line in iter_lines(stream, 0, None):
+                    add_raw(line)
+            else:
+                add_raw(stream.read())
+    return result
+
+
+def _section(fields: Dict[str, FieldSketch]) -> Dict[str, Any]:
+    """Build one '<model>_<type>' config section, template fields first."""
+    section: Dict[str, Any] = {}
+    claim: Dict[str, Any] = {}
+    order = [field for field in WGS_TEMPLATE_FIELDS if field in fields]
+    order.extend(field for field in fields if field not in WGS_TEMPLATE_FIELDS)
+    for field in order:
+        sketch = fields[field]
+        pool = sketch.pool() if sketch.seen else []
+        if field.startswith(CLAIM_FIELD + "."):
+            claim[field[len(CLAIM_FIELD) + 1:]] = pool
+            if CLAIM_FIELD not in section:
+                section[CLAIM_FIELD] = [claim]
+        else:
+            section[field] = pool
+    return section
+
+
+def infer_config(paths: List[Path], model: str, workers: Optional[int] = None,
+                 pool_size: int = DEFAULT_POOL_SIZE) -> Dict[str, Any]:
+    """Infer a weighted MockGen config from sample records.
+    
+    Memory is bounded by pool_size per field, however large the corpus is.
+    
+    Args:
+        paths: Files, directories, JSONL files or archives holding WGS-shaped records
+        model: Model name for the emitted config sections
+        workers: Number of worker processes (1 sketches in-process)
+        pool_size: Heavy-hitter counters and reservoir slots kept per field
+    
+    Returns:
+        Dictionary with the inferred 'config' (one '<model>_<type>' section per
+        probability type found), and the 'files' and 'records' per type it was built from
+    """
+    if pool_size < 1:
+        raise ValueError("Pool size must be at least 1")
+    workers = workers or os.cpu_count() or 1
+    merged: Dict[str, Dict[str, FieldSketch]] = {}
+    report: Dict[str, Any] = {"files": 0, "records": {}}
+    rng = random.Random(0)
+    
+    def merge(result: Dict[str, Any]) -> None:
+        report["files"] += result["files"]
+        for probability_type, records in result["records"].items():
+            report["records"][probability_type] = report["records"].get(probability_type, 0) + records
+        for probability_type, fields in result["sketches"].items():
+            into = merged.setdefault(probability_type, {})
+            for field, sketch in fields.items():
+                if field in into:
+                    into[field].merge(sketch, rng)
+                else:
+                    into[field] = sketch
+    
+    tasks = iter_tasks([Path(p) for p in paths])
+    if workers == 1:
+        for task in tasks:
+            merge(_infer_task(task, pool_size))
+    else:
+        # Sketches are merged in task order, whatever order the workers finish in, so the
+        # inferred config does not depend on scheduling; finished sketches waiting for an
+        # earlier task count towards the few tasks kept in flight
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending: Dict[Any, int] = {}
+            finished: Dict[int, Dict[str, Any]] = {}
+            following = 0
+            
+            def collect(done: Any) -> int:
+                for future in done:
+                    finished[pending.pop(future)] = future.result()
+                position = following
+                while position in finished:
+                    merge(finished.pop(position))
+                    position += 1
+                return position
+            
+            for number, task in enumerate(tasks):
+                pending[executor.submit(_infer_task, task, pool_size)] = number
+                if len(pending) + len(finished) >= workers * 2:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    following = collect(done)
+            following = collect(list(pending))
+    
+    if not merged:
+        raise ValueError("No records found in the given paths")
+    report["config"] = {f"{model}_{probability_type}": _section(merged[probability_type])
+                        for probability_type in sorted(merged)}
+    return report
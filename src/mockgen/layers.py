@@ -0,0 +1,158 @@
+"""
+MockGen Layers - Layered configuration files
+Merges a base config with environment and team override layers; the merged config can be kept in the dataset cache
+"""
+
+import hashlib
+import json
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+
+from .cache import DatasetCache, content_hash
+from .plan import is_weighted
+
+
+# A field given as {"append": pool} adds to the pool of the layers below it;
+# {"replace": pool}, like a plain pool, replaces it
+LAYER_OPERATIONS = ["replace", "append"]
+
+
+# Name of the merged config file in its dataset cache entry
+MERGED_CONFIG_FILE = "config.json"
+
+
+def _operation(value: Any) -> Optional[Tuple[str, Any]]:
+    """Return (operation, pool) if a layer value is an append/replace operation."""
+    if isinstance(value, dict) and len(value) == 1:
+        operation, pool = next(iter(value.items()))
+        if operation in LAYER_OPERATIONS:
+            return operation, pool
+    return None
+
+
+def _as_weighted(pool: Any, where: str) -> Dict[str, List[Any]]:
+    """View a plain pool as a weighted spec with weight 1 per value."""
+    if is_weighted(pool):
+        return pool
+    if isinstance(pool, list):
+        return {"values": list(pool), "weights": [1] * len(pool)}
+    raise ValueError(f"Cannot append to '{where}': it is not a pool")
+
+
+def _is_claim_lines(value: Any) -> bool:
+    return isinstance(value, list) and len(value) > 0 and isinstance(value[0], dict)
+
+
+def merge_field(base: Any, override: Any, where: str) -> Any:
+    """Merge one field of an override layer into the value from the layers below.
+    
+    Appending to or from a weighted pool keeps every value's weight (plain
+    values count 1). ClaimDetails lines are merged field by field.
+    
+    Args:
+        base: Value from the layers below (None if no layer has the field)
+        override: Value in this layer: a pool, a value or an append/replace operation
+        where: 'section.field' used in error messages
+    """
+    operation = _operation(override)
+    if operation is not None:
+        name, pool = operation
+        if name == "replace" or base is None:
+            return pool
+        if is_weighted(base) or is_weighted(pool):
+            left, right = _as_weighted(base, where), _as_weighted(pool, where)
+            return {"values": left["values"] + right["values"], "weights": left["weights"] + right["weights"]}
+        if not isinstance(base, list) or not isinstance(pool, list):
+            raise ValueError(f"Cannot append to '{where}': both the pool and the appended values must be lists")
+        return base + pool
+    if _is_claim_lines(base) and _is_claim_lines(override):
+        line = dict(base[0])
+        for field, value in override[0].items():
+            line[field] = merge_field(line.get(field), value, f"{where}.{field}")
+        return [line]
+    return override
+
+
+def merge_layers(layers: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Merge config layers in order; later layers override earlier ones field by field.
+    
+    Sections missing from the layers below are added, and fields within a
+    section are merged with merge_field.
+    """
+    merged: Dict[str, Any] = {}
+    for layer in layers:
+        if not isinstance(layer, dict):
+            raise ValueError("Every config layer must be a JSON object")
+        for section, fields in layer.items():
+            if not isinstance(fields, dict):
+                merged[section] = fields
+                continue
+            base = merged.get(section)
+            result = dict(base) if isinstance(base, dict) else {}
+            for field, value in fields.items():
+                result[field] = merge_field(result.get(field), value, f"{section}.{field}")
+            merged[section] = result
+    return merged
+
+
+def load_layers(paths: List[Path], cache: Optional[DatasetCache] = None) -> Tuple[Dict[str, Any], str]:
+    """Load a config from a base file and override layers.
+    
+    Only the merged config is cached, not the plans compiled from it. With a
+    dataset cache it is stored as a cache entry under the combined content
+    hash of the layer files, so later runs with unchanged layers load one
+    merged file instead of parsing and merging every layer, and the entry
+    shares the cache's directory and size-bounded LRU eviction. A single
+    file is loaded as is.
+    
+    Args:
+        paths: Config files, base first
+        cache: Dataset cache to keep the merged config in (None: merge every run)
+    
+    Returns:
+        (config, combined content hash of the layers)
+    """
+    texts = []
+    for path in paths:
+        try:
+            texts.append(Path(path).read_bytes())
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Configuration file '{path}' not found.")
+    digest = content_hash([hashlib.sha256(text).hexdigest() for text in texts])
+    
+    def parse(path: Path, text: bytes) -> Any:
+        try:
+            return json.loads(text.decode("utf-8"))
+        except ValueError as e:
+            raise ValueError(f"Invalid JSON in configuration file '{path}': {e}")
+    
+    if len(texts) == 1:
+        return parse(paths[0], texts[0]), digest
+    
+    key = content_hash({"merged_config": digest})
+    stored = cache.entry_files(key) if cache is not None else None
+    if stored:
+        try:
+            with stored[0].open("r", encoding="utf-8") as f:
+                return json.load(f), digest
+        except (OSError, ValueError):
+            pass
+    
+    config = merge_layers([parse(path, text) for path, text in zip(paths, texts)])
+    if cache is not None:
+        staging = None
+        try:
+            staging = Path(tempfile.mkdtemp(prefix=".config-", dir=str(cache.root)))
+            merged = staging / MERGED_CONFIG_FILE
+            with merged.open("w", encoding="utf-8") as f:
+                json.dump(config, f, ensure_ascii=False)
+            cache.store(key, [merged])
+        except OSError:
+            # The cache only saves work; an unwritable cache directory is not an error
+            pass
+        finally:
+            if staging is not None:
+                shutil.rmtree(staging, ignore_errors=True)
+    return config, digest
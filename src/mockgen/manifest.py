@@ -0,0 +1,186 @@
+"""
+MockGen Manifest - Content-hash manifests for generated corpora
+Records index, location, size and blake2b hash of every record plus a Merkle rollup hash
+"""
+
+import hashlib
+from pathlib import Path
+from typing import Dict, List, Any, Tuple
+
+
+MANIFEST_VERSION = "mockgen-manifest v1"
+MANIFEST_SUFFIX = ".manifest"
+DIGEST_SIZE = 16
+
+
+def record_digest(payload: bytes) -> bytes:
+    """Hash the serialized bytes of one record."""
+    return hashlib.blake2b(payload, digest_size=DIGEST_SIZE).digest()
+
+
+def _node_digest(left: bytes, right: bytes) -> bytes:
+    """Hash two child nodes of the Merkle tree."""
+    return hashlib.blake2b(b"\x01" + left + right, digest_size=DIGEST_SIZE).digest()
+
+
+class MerkleRollup:
+    """Streaming Merkle root over an ordered sequence of record digests.
+    
+    Only one pending node per tree level is kept, so memory is O(log n).
+    """
+    
+    def __init__(self):
+        self._stack: List[Tuple[int, bytes]] = []
+        self.count = 0
+    
+    def add(self, digest: bytes) -> None:
+        """Append a leaf digest."""
+        node = digest
+        level = 0
+        while self._stack and self._stack[-1][0] == level:
+            _, left = self._stack.pop()
+            node = _node_digest(left, node)
+            level += 1
+        self._stack.append((level, node))
+        self.count += 1
+    
+    def root(self) -> str:
+        """Return the hex root hash of all digests added so far."""
+        if not self._stack:
+            return hashlib.blake2b(b"", digest_size=DIGEST_SIZE).hexdigest()
+        node = self._stack[-1][1]
+        for _, left in reversed(self._stack[:-1]):
+            node = _node_digest(left, node)
+        return node.hex()
+
+
+class ManifestWriter:
+    """Writes a compact, line-oriented manifest while records are being generated.
+    
+    Each entry line is tab separated: index, file name, byte offset, size, hash.
+    Header and trailer lines start with '#'.
+    """
+    
+    def __init__(self, path: Path, header: Dict[str, Any]):
+        self.path = Path(path)
+        self.rollup = MerkleRollup()
+        self.total_bytes = 0
+        self._file = self.path.open("w", encoding="utf-8", buffering=1024 * 1024)
+        self._file.write(f"# {MANIFEST_VERSION}\n")
+        self._file.write("# " + " ".join(f"{key}={value}" for key, value in header.items()) + "\n")
+    
+    def add(self, index: int, name: str, offset: int, payload: bytes) -> bytes:
+        """Hash a record's bytes and append its manifest entry.
+        
+        Returns:
+            The record digest
+        """
+        digest = record_digest(payload)
+        self.add_digest(index, name, offset, len(payload), digest)
+        return digest
+    
+    def add_digest(self, index: int, name: str, offset: int, size: int, digest: bytes) -> None:
+        """Append an entry whose digest has already been computed."""
+        self.rollup.add(digest)
+        self.total_bytes += size
+        self._file.write(f"{index}\t{name}\t{offset}\t{size}\t{digest.hex()}\n")
+    
+    def close(self) -> str:
+        """Write the trailer with the rollup hash and close the manifest.
+        
+        Returns:
+            Hex Merkle root of all records
+        """
+        root = self.rollup.root()
+        self._file.write(f"# root={root} records={self.rollup.count} bytes={self.total_bytes}\n")
+        self._file.close()
+        return root
+
+
+def _parse_fields(line: str) -> Dict[str, str]:
+    """Parse a 'key=value key=value' header or trailer line."""
+    fields = {}
+    for item in line.lstrip("#").split():
+        if "=" in item:
+            key, value = item.split("=", 1)
+            fields[key] = value
+    return fields
+
+
+def read_manifest(path: Path) -> Dict[str, Any]:
+    """Read a manifest file.
+    
+    Args:
+        path: Manifest file path
+    
+    Returns:
+        Dictionary with 'header', 'entries' (index, name, offset, size, hash) and 'root'
+    """
+    header: Dict[str, str] = {}
+    trailer: Dict[str, str] = {}
+    entries = []
+    
+    with Path(path).open("r", encoding="utf-8") as f:
+        first = f.readline().rstrip("\n")
+        if first != f"# {MANIFEST_VERSION}":
+            raise ValueError(f"'{path}' is not a mockgen manifest")
+        for line in f:
+            line = line.rstrip("\n")
+            if line.startswith("#"):
+                if "root=" in line:
+                    trailer = _parse_fields(line)
+                else:
+                    header.update(_parse_fields(line))
+                continue
+            index, name, offset, size, digest = line.split("\t")
+            entries.append((int(index), name, int(offset), int(size), digest))
+    
+    if not trailer:
+        raise ValueError(f"Manifest '{path}' is incomplete (no root trailer)")
+    
+    return {"header": header, "entries": entries, "root": trailer["root"]}
+
+
+def read_manifest_header(path: Path) -> Dict[str, str]:
+    """Read only the header fields of a manifest, without loading its entries."""
+    header: Dict[str, str] = {}
+    with Path(path).open("r", encoding="utf-8") as f:
+        if f.readline().rstrip("\n") != f"# {MANIFEST_VERSION}":
+            raise ValueError(f"'{path}' is not a mockgen manifest")
+        for line in f:
+            if not line.startswith("#") or "root=" in line:
+                break
+            header.update(_parse_fields(line))
+    return header
+
+
+def compare_manifests(first: Path, second: Path) -> Dict[str, Any]:
+    """Compare two corpora using only their manifests.
+    
+    Args:
+        first: Manifest of the first corpus
+        second: Manifest of the second corpus
+    
+    Returns:
+        Dictionary with 'identical' (roots match) and the record hashes only found
+        in one corpus, plus the number of duplicate records within each corpus
+    """
+    a = read_manifest(first)
+    b = read_manifest(second)
+    a_hashes = [entry[4] for entry in a["entries"]]
+    b_hashes = [entry[4] for entry in b["entries"]]
+    a_set = set(a_hashes)
+    b_set = set(b_hashes)
+    
+    return {
+        "identical": a["root"] == b["root"],
+        "only_first": sorted(a_set - b_set),
+        "only_second": sorted(b_set - a_set),
+        "duplicates_first": len(a_hashes) - len(a_set),
+        "duplicates_second": len(b_hashes) - len(b_set),
+    }
+
+
+def manifest_path(output_dir: Path, model: str, probability_type: str, timestamp: str) -> Path:
+    """Build the manifest path for one generation run."""
+    return Path(output_dir) / f"{model}_{probability_type}_{timestamp}{MANIFEST_SUFFIX}"
@@ -0,0 +1,322 @@
+"""
+MockGen Members - Member entities shared by every model and scenario type
+Draws a fixed table of members once into compact arrays and lets records reference members by index, so a member recurs with the same patient fields in every output file
+"""
+
+import json
+import random
+import time
+from array import array
+from typing import Dict, List, Any, Optional, Iterator, Callable, Tuple
+
+from .cache import content_hash
+from .plan import PRETTY, X12, WGS_TEMPLATE_FIELDS, WgsPlan, expand_weighted, is_weighted, record_draws
+
+
+# Join key written into every record of a --members run; rendered from the
+# member number, so it is unique and identical in every model and scenario type
+MEMBER_KEY = "MEMBER_ID"
+DEFAULT_KEY_FORMAT = "M{:08d}"
+
+# Fields that describe the member rather than the claim. Scenario-defining
+# fields such as HCID stay with the scenario's own pools.
+MEMBER_FIELDS = [field for field in WGS_TEMPLATE_FIELDS if field.startswith("PAT_")]
+SCENARIO_FIELDS = ["HCID"]
+
+# Optional config section with member pools and the key format, e.g.
+# {"members": {"MEMBER_ID": "MBR{:06d}", "PAT_LAST_NME": ["Kumar", "Rao"]}}
+MEMBERS_SECTION = "members"
+
+# Member pools default to the union of the positive (baseline) sections' pools
+BASELINE_SUFFIX = "_positive"
+
+REUSE_MODES = ["uniform", "sequential", "zipf"]
+DEFAULT_ZIPF_EXPONENT = 1.1
+
+# Members drawn per call while the table is built, bounding the temporary lists
+BUILD_CHUNK = 1 << 16
+
+# Turns a 64-bit seeded draw into a float in [0, 1)
+WORD_SCALE = 2.0 ** -64
+
+
+def parse_reuse(reuse: str) -> Tuple[str, float]:
+    """Parse a reuse distribution: 'uniform', 'sequential' or 'zipf[:exponent]'.
+    
+    Returns:
+        (mode, Zipf exponent or 0.0)
+    """
+    mode, _, parameter = str(reuse).strip().lower().partition(":")
+    if mode not in REUSE_MODES or (parameter and mode != "zipf"):
+        raise ValueError(f"Invalid member reuse '{reuse}'. Use uniform, sequential or zipf[:exponent]")
+    if mode != "zipf":
+        return mode, 0.0
+    try:
+        exponent = float(parameter) if parameter else DEFAULT_ZIPF_EXPONENT
+    except ValueError:
+        raise ValueError(f"Invalid Zipf exponent in '{reuse}'")
+    if exponent <= 0:
+        raise ValueError("The Zipf exponent must be positive")
+    return mode, exponent
+
+
+def member_picker(reuse: str, count: int) -> Callable[[int, float], int]:
+    """Build the function mapping (record number, uniform draw in [0, 1)) to a member index.
+    
+    uniform picks every member equally often, sequential cycles through the
+    members in order (each one recurs every `count` records) and zipf makes
+    member k about k^-exponent as likely as the first, so a few members hold
+    most of the claims. Zipf ranks are drawn by inverting the continuous
+    distribution, which costs the same for any number of members.
+    """
+    mode, exponent = parse_reuse(reuse)
+    last = count - 1
+    if mode == "sequential":
+        return lambda number, draw: (number - 1) % count
+    if mode == "uniform":
+        return lambda number, draw: min(int(draw * count), last)
+    if exponent == 1.0:
+        span = count + 1.0
+        return lambda number, draw: min(int(span ** draw) - 1, last)
+    power = 1.0 - exponent
+    span = (count + 1.0) ** power - 1.0
+    inverse = 1.0 / power
+    return lambda number, draw: min(int((1.0 + draw * span) ** inverse) - 1, last)
+
+
+def _pool_values(spec: Any) -> List[Any]:
+    """Values of a configured scalar pool (weighted pools expanded), or [] for anything else."""
+    if is_weighted(spec):
+        return expand_weighted(spec)
+    if isinstance(spec, list) and spec and not isinstance(spec[0], dict):
+        return list(spec)
+    return []
+
+
+def member_pools(config: Dict[str, Any]) -> Tuple[Dict[str, List[Any]], str]:
+    """Pools and key format of a config's member table.
+    
+    Pools come from the 'members' section where it has them, otherwise from
+    the union of the field's values over the positive sections, so one table
+    serves every model and scenario type with baseline patient data.
+    
+    Returns:
+        (pools by member field, key format)
+    """
+    section = config.get(MEMBERS_SECTION) or {}
+    if not isinstance(section, dict):
+        raise ValueError(f"The '{MEMBERS_SECTION}' config section must be an object")
+    key_format = section.get(MEMBER_KEY, DEFAULT_KEY_FORMAT)
+    if not isinstance(key_format, str):
+        raise ValueError(f"'{MEMBERS_SECTION}.{MEMBER_KEY}' must be a key format string such as "
+                         f"'{DEFAULT_KEY_FORMAT}'")
+    
+    pools: Dict[str, List[Any]] = {}
+    fields = MEMBER_FIELDS + [field for field in section if field not in MEMBER_FIELDS and field != MEMBER_KEY]
+    for field in fields:
+        if field in SCENARIO_FIELDS:
+            raise ValueError(f"'{field}' defines the scenario and cannot be a member field")
+        if field in section:
+            values = _pool_values(section[field])
+            if not values:
+                raise ValueError(f"'{MEMBERS_SECTION}.{field}' must be a non-empty pool")
+        else:
+            seen: Dict[str, Any] = {}
+            for name, data in config.items():
+                if name.endswith(BASELINE_SUFFIX) and isinstance(data, dict):
+                    for value in _pool_values(data.get(field)):
+                        seen.setdefault(json.dumps(value, sort_keys=True), value)
+            values = list(seen.values())
+        if values:
+            pools[field] = values
+    return pools, key_format
+
+
+class MemberPool:
+    """A fixed table of `count` members shared by every model and scenario type.
+    
+    Each member field is stored as an array of indices into its value pool,
+    using the smallest item size that fits the pool, so ten million members
+    with byte-sized pools take ten megabytes per field. The member key is
+    rendered from the member number on demand. The table is drawn from a
+    generator seeded with its pools, key format and count, so every process
+    (and every worker or shard) building it from the same config gets the
+    same members.
+    """
+    
+    def __init__(self, count: int, pools: Dict[str, List[Any]], key_format: str = DEFAULT_KEY_FORMAT):
+        if count < 1:
+            raise ValueError("The member table needs at least one member")
+        try:
+            distinct = key_format.format(1) != key_format.format(2)
+        except (IndexError, KeyError, ValueError):
+            distinct = False
+        if not distinct:
+            raise ValueError(f"Invalid member key format '{key_format}'; use one positional field such as "
+                             f"'{DEFAULT_KEY_FORMAT}'")
+        self.count = count
+        self.key_format = key_format
+        self.pools = pools
+        self.fields = list(pools)
+        self.digest = content_hash([count, key_format, pools])
+        
+        rng = random.Random(self.digest)
+        self.columns: Dict[str, array] = {}
+        for field in self.fields:
+            size = len(pools[field])
+            column = array("B" if size <= 0x100 else "H" if size <= 0x10000 else "L")
+            for begin in range(0, count, BUILD_CHUNK):
+                column.extend(rng.choices(range(size), k=min(BUILD_CHUNK, count - begin)))
+            self.columns[field] = column
+    
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], count: int) -> "MemberPool":
+        """Build the member table of a config (see member_pools)."""
+        pools, key_format = member_pools(config)
+        return cls(count, pools, key_format)
+    
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the member columns."""
+        return sum(column.itemsize * len(column) for column in self.columns.values())
+    
+    def key(self, index: int) -> str:
+        """Member key of a member (0-based index)."""
+        return self.key_format.format(index + 1)
+    
+    def member(self, index: int) -> Dict[str, Any]:
+        """Key and field values of one member (0-based index)."""
+        values = {MEMBER_KEY: self.key(index)}
+        for field, column in self.columns.items():
+            values[field] = self.pools[field][column[index]]
+        return values
+
+
+class MemberPlan(WgsPlan):
+    """WGS plan whose member fields come from a shared MemberPool.
+    
+    Every record draws one member with the reuse distribution, carries its
+    MEMBER_ID (first, as a join key across files) and takes every member
+    field present in the record from that member, so a member has the same
+    patient fields in every model and scenario type. All other fields,
+    HCID included, are drawn from the scenario's pools as usual. With a
+    seed, the member is drawn from one extra 64-bit word after the other
+    draws of the record. X12 output has no element for the key and omits it.
+    """
+    
+    def __init__(self, data: Dict[str, Any], probability_type: str, members: MemberPool,
+                 reuse: str = "uniform"):
+        super().__init__(data, probability_type)
+        self.members = members
+        self.reuse = reuse
+        self._pick = member_picker(reuse, members.count)
+        
+        # The key and the member fields are compiled as pools over the member
+        # table's values (the key over one placeholder) and filled per record
+        self._member_slots: List[Tuple[str, str, Any]] = [(MEMBER_KEY, "pool", [""])]
+        self._member_draws: List[Tuple[int, str]] = [(0, MEMBER_KEY)]
+        draw = 1
+        for field, kind, payload in self.slots:
+            if kind != "claim" and field in members.pools:
+                kind, payload = "pool", members.pools[field]
+                self._member_draws.append((draw, field))
+            self._member_slots.append((field, kind, payload))
+            if kind == "pool":
+                draw += 1
+            elif kind == "claim":
+                draw += sum(1 for _, claim_kind, _ in payload if claim_kind == "pool")
+    
+    @property
+    def columns(self) -> List[str]:
+        """Scalar field names with the member key first, used as flat table columns."""
+        return [MEMBER_KEY] + super().columns
+    
+    def _split(self, variables: List[Any]) -> Tuple[List[Any], List[Tuple[Any, array]], Any]:
+        """Separate the drawn variables (or record cells) from the member fields and the key.
+        
+        Returns:
+            (drawn variables, [(member field variable, member column)], key variable)
+        """
+        taken = {draw for draw, _ in self._member_draws}
+        free = [variable for draw, variable in enumerate(variables) if draw not in taken]
+        columns = [(variables[draw], self.members.columns[field])
+                   for draw, field in self._member_draws if field != MEMBER_KEY]
+        return free, columns, variables[0]
+    
+    def _key_encoder(self, style: str) -> Optional[Callable[[int], bytes]]:
+        """Build the function rendering a member's key (0-based index) as an encoded JSON value."""
+        if style == X12:
+            return None
+        key_format = self.members.key_format
+        sample = key_format.format(1)
+        if json.dumps(sample, ensure_ascii=False) == f'"{sample}"':
+            # Keys that need no escaping are wrapped like the sample instead of encoded one by one
+            template = f'"{key_format}"'
+            return lambda member: template.format(member + 1).encode("utf-8")
+        return lambda member: json.dumps(key_format.format(member + 1), ensure_ascii=False).encode("utf-8")
+    
+    def build(self, rng: Any = random) -> Dict[str, Any]:
+        """Build one record, drawing the member and the other pool values with rng.random."""
+        return next(self.iter_records(1, rng=rng))
+    
+    def iter_records(self, count: int, seed: Optional[int] = None, start: int = 1,
+                     rng: Any = random) -> Iterator[Dict[str, Any]]:
+        """Yield records sharing one preallocated structure (see WgsPlan.iter_records)."""
+        record, cells = self._record_cells(self._member_slots)
+        free, columns, (key_cell, key_name, _, _) = self._split(cells)
+        key_format = self.members.key_format.format
+        pick = self._pick
+        rand = rng.random
+        draws = len(free) + 1
+        for number in range(start, start + count):
+            if seed is None:
+                for container, name, pool, size in free:
+                    container[name] = pool[int(rand() * size)]
+                member = pick(number, rand())
+            else:
+                words = record_draws(seed, number, draws)
+                for (container, name, pool, size), word in zip(free, words):
+                    container[name] = pool[(word * size) >> 64]
+                member = pick(number, words[-1] * WORD_SCALE)
+            for (container, name, pool, _), column in columns:
+                container[name] = pool[column[member]]
+            key_cell[key_name] = key_format(member + 1)
+            yield record
+    
+    def iter_payloads(self, count: int, style: str = PRETTY, seed: Optional[int] = None, start: int = 1,
+                      rng: Any = random, timings: Optional[List[float]] = None) -> Iterator[bytes]:
+        """Yield serialized records from pre-encoded fragments (see WgsPlan.iter_payloads)."""
+        parts, variables = self._compile_fragments(style, self._member_slots)
+        free, columns, (key_position, _, _) = self._split(variables)
+        members = [(position, encoded, column) for (position, encoded, _), column in columns]
+        encode_key = self._key_encoder(style)
+        pick = self._pick
+        rand = rng.random
+        draws = len(free) + 1
+        join = b"".join
+        clock = time.perf_counter
+        
+        for number in range(start, start + count):
+            if timings is not None:
+                began = clock()
+            if seed is None:
+                for position, encoded, size in free:
+                    parts[position] = encoded[int(rand() * size)]
+                member = pick(number, rand())
+            else:
+                words = record_draws(seed, number, draws)
+                for (position, encoded, size), word in zip(free, words):
+                    parts[position] = encoded[(word * size) >> 64]
+                member = pick(number, words[-1] * WORD_SCALE)
+            for position, encoded, column in members:
+                parts[position] = encoded[column[member]]
+            if encode_key is not None:
+                parts[key_position] = encode_key(member)
+            if timings is None:
+                yield join(parts)
+            else:
+                sampled = clock()
+                payload = join(parts)
+                timings[0] += sampled - began
+                timings[1] += clock() - sampled
+                yield payload
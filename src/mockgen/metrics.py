@@ -0,0 +1,219 @@
+"""
+MockGen Metrics - OpenMetrics export of run statistics
+Counters and histograms updated once per scenario type, written as a text file or served on a local endpoint
+"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+# Histogram buckets (seconds) for run and stage durations
+DURATION_BUCKETS = [0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0, 3600.0]
+
+# Per-record stages that only an attached StageProfiler measures; without one the
+# generation loop is reported as a single 'write' stage
+LOOP_STAGES = ["sampling", "serialization", "io", "manifest"]
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_labels(labels: Tuple[Tuple[str, Any], ...], extra: Optional[Tuple[str, str]] = None) -> str:
+    items = list(labels) + ([extra] if extra else [])
+    if not items:
+        return ""
+    return "{" + ",".join(f"{name}=\"{_escape(value)}\"" for name, value in items) + "}"
+
+
+def _format_number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class MetricsRegistry:
+    """Minimal OpenMetrics registry of counters, gauges, histograms and summaries.
+    
+    Updates take a lock so the registry can be rendered from the serving
+    thread while a run is in progress; they happen a few times per scenario
+    type, never per record.
+    """
+    
+    def __init__(self):
+        self._families: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+    
+    def declare(self, name: str, kind: str, help_text: str, buckets: Optional[List[float]] = None) -> None:
+        """Declare a metric family (counter, gauge, histogram or summary)."""
+        self._families[name] = {"kind": kind, "help": help_text, "buckets": buckets, "samples": {}}
+    
+    def _key(self, labels: Optional[Dict[str, Any]]) -> Tuple[Tuple[str, Any], ...]:
+        return tuple(sorted((labels or {}).items()))
+    
+    def inc(self, name: str, amount: float = 1, labels: Optional[Dict[str, Any]] = None) -> None:
+        """Increase a counter."""
+        with self._lock:
+            samples = self._families[name]["samples"]
+            key = self._key(labels)
+            samples[key] = samples.get(key, 0) + amount
+    
+    def set(self, name: str, value: float, labels: Optional[Dict[str, Any]] = None) -> None:
+        """Set a gauge, or a summary's precomputed {'quantiles', 'count', 'sum'}."""
+        with self._lock:
+            self._families[name]["samples"][self._key(labels)] = value
+    
+    def observe(self, name: str, value: float, labels: Optional[Dict[str, Any]] = None) -> None:
+        """Add one observation to a histogram."""
+        with self._lock:
+            family = self._families[name]
+            key = self._key(labels)
+            state = family["samples"].get(key)
+            if state is None:
+                state = family["samples"][key] = {"counts": [0] * len(family["buckets"]), "count": 0, "sum": 0.0}
+            for position, bound in enumerate(family["buckets"]):
+                if value <= bound:
+                    state["counts"][position] += 1
+                    break
+            state["count"] += 1
+            state["sum"] += value
+    
+    def render(self) -> str:
+        """Render every family in the OpenMetrics text format."""
+        lines = []
+        with self._lock:
+            for name, family in self._families.items():
+                if not family["samples"]:
+                    continue
+                kind = family["kind"]
+                lines.append(f"# TYPE {name} {kind}")
+                lines.append(f"# HELP {name} {family['help']}")
+                for key, value in sorted(family["samples"].items()):
+                    if kind == "counter":
+                        lines.append(f"{name}_total{_format_labels(key)} {_format_number(value)}")
+                    elif kind == "gauge":
+                        lines.append(f"{name}{_format_labels(key)} {_format_number(value)}")
+                    elif kind == "histogram":
+                        cumulative = 0
+                        for bound, count in zip(family["buckets"], value["counts"]):
+                            cumulative += count
+                            lines.append(f"{name}_bucket{_format_labels(key, ('le', _format_number(bound)))} "
+                                         f"{cumulative}")
+                        lines.append(f"{name}_bucket{_format_labels(key, ('le', '+Inf'))} {value['count']}")
+                        lines.append(f"{name}_count{_format_labels(key)} {value['count']}")
+                        lines.append(f"{name}_sum{_format_labels(key)} {_format_number(value['sum'])}")
+                    else:
+                        for quantile, observed in value["quantiles"].items():
+                            lines.append(f"{name}{_format_labels(key, ('quantile', str(quantile)))} "
+                                         f"{_format_number(observed)}")
+                        lines.append(f"{name}_count{_format_labels(key)} {value['count']}")
+                        lines.append(f"{name}_sum{_format_labels(key)} {_format_number(value['sum'])}")
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+    
+    def write(self, path: str) -> Path:
+        """Write the rendered metrics atomically, e.g. for a node_exporter textfile collector."""
+        target = Path(path)
+        staging = target.with_name(target.name + ".tmp")
+        staging.write_text(self.render(), encoding="utf-8")
+        staging.replace(target)
+        return target
+    
+    def serve(self, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        """Serve the metrics at http://host:port/metrics from a daemon thread.
+        
+        Returns:
+            The running server; call shutdown() to stop it
+        """
+        registry = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/metrics", "/"):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, format, *args):
+                pass
+        
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+class RunMetrics(MetricsRegistry):
+    """The metric families MockGen reports for generation, verify and replay runs."""
+    
+    def __init__(self):
+        super().__init__()
+        self.declare("mockgen_records", "counter", "Records generated")
+        self.declare("mockgen_bytes", "counter", "Serialized bytes handed to output sinks")
+        self.declare("mockgen_files", "counter", "Output files produced")
+        self.declare("mockgen_cache_hits", "counter", "Scenario types served from the dataset cache")
+        self.declare("mockgen_errors", "counter", "Failed scenario generations by exception type")
+        self.declare("mockgen_run_seconds", "histogram", "Wall time per scenario type", DURATION_BUCKETS)
+        self.declare("mockgen_stage_seconds", "histogram", "Wall time per generation stage",
+                     DURATION_BUCKETS)
+        self.declare("mockgen_verified_records", "counter", "Records checked by --verify")
+        self.declare("mockgen_verify_violations", "counter", "Violations found by --verify")
+        self.declare("mockgen_replay_requests", "counter", "Replayed requests by HTTP status")
+        self.declare("mockgen_replay_errors", "counter", "Replayed requests that failed by exception type")
+        self.declare("mockgen_replay_latency_seconds", "summary", "Replay latency from the scheduled send time")
+    
+    def record_run(self, model: str, probability_type: str, output_format: str, records: int,
+                   nbytes: int, files: int, seconds: float) -> None:
+        """Count one completed scenario type."""
+        labels = {"model": model, "probability_type": probability_type, "format": output_format}
+        self.inc("mockgen_records", records, labels)
+        self.inc("mockgen_bytes", nbytes, labels)
+        self.inc("mockgen_files", files, labels)
+        self.observe("mockgen_run_seconds", seconds, {"model": model, "probability_type": probability_type})
+    
+    def record_cache_hit(self, model: str, probability_type: str) -> None:
+        self.inc("mockgen_cache_hits", 1, {"model": model, "probability_type": probability_type})
+    
+    def record_error(self, model: str, probability_type: str, error: Any) -> None:
+        """Count a failed scenario type by exception (or exception type name, from worker processes)."""
+        name = error if isinstance(error, str) else type(error).__name__
+        self.inc("mockgen_errors", 1, {"model": model, "probability_type": probability_type, "error": name})
+    
+    def observe_stage(self, stage: str, seconds: float, count: int = 1) -> None:
+        """Record a stage duration."""
+        self.observe("mockgen_stage_seconds", seconds, {"stage": stage})
+    
+    def profiler_hook(self, stage: str, seconds: float, count: int) -> None:
+        """StageProfiler hook forwarding the per-record stages that make up 'write'."""
+        if stage in LOOP_STAGES:
+            self.observe_stage(stage, seconds, count)
+    
+    def record_verify(self, report: Dict[str, Any]) -> None:
+        self.inc("mockgen_verified_records", report["records"])
+        self.inc("mockgen_verify_violations", report["violation_count"])
+    
+    def record_replay(self, stats: Dict[str, Any]) -> None:
+        """Export the statuses, errors and latency percentiles of a replay run."""
+        for status, count in stats["statuses"].items():
+            self.inc("mockgen_replay_requests", count, {"status": status})
+        for error, count in stats["errors"].items():
+            self.inc("mockgen_replay_errors", count, {"error": error})
+        latency = stats["latency"]
+        if latency["count"]:
+            self.set("mockgen_replay_latency_seconds", {
+                "quantiles": {0.5: latency["p50_ms"] / 1000, 0.9: latency["p90_ms"] / 1000,
+                              0.99: latency["p99_ms"] / 1000, 0.999: latency["p999_ms"] / 1000},
+                "count": latency["count"],
+                "sum": latency["mean_ms"] * latency["count"] / 1000,
+            })
@@ -0,0 +1,212 @@
+"""
+MockGen Mutations - Negative records derived from positive pools
+Applies one field-corruption operator per record and records which one in the record's metadata
+"""
+
+import random
+import re
+import time
+from typing import Dict, List, Any, Optional, Tuple, Iterator, Callable
+
+from .plan import PRETTY, WgsPlan, record_draws
+
+
+# Top-level key holding the applied mutation, next to the WGS record body
+MUTATION_KEY = "_mutation"
+
+# Most mutants kept per source value and operator
+VARIANTS_PER_VALUE = 8
+
+# Source values per pool used to derive mutants, so large pools stay cheap to compile
+MAX_SOURCE_VALUES = 256
+
+DATE_PATTERN = re.compile(r"^(\d{1,4})([-/.])(\d{1,2})\2(\d{1,4})$")
+CODE_PATTERN = re.compile(r"^[A-Za-z0-9]{2,}$")
+
+
+def _invalid_dates(value: Any, rng: random.Random) -> List[Any]:
+    match = DATE_PATTERN.match(value) if isinstance(value, str) else None
+    if match is None:
+        return []
+    first, separator, middle, last = match.groups()
+    year_first = len(first) == 4
+    candidates = []
+    if year_first:
+        candidates.append(f"{first}{separator}13{separator}{last}")
+        candidates.append(f"{first}{separator}{middle}{separator}32")
+        candidates.append(f"{first}{separator}02{separator}30")
+        candidates.append(f"{first}{separator}00{separator}{last}")
+    else:
+        candidates.append(f"13{separator}{middle}{separator}{last}")
+        candidates.append(f"{first}{separator}32{separator}{last}")
+        candidates.append(f"02{separator}30{separator}{last}")
+        candidates.append(f"{first}{separator}{middle}{separator}{last[-2:]}0{last[-2:]}")
+    candidates.append(value.replace(separator, "." if separator != "." else "/"))
+    candidates.append(f"{rng.randint(10000, 99999)}")
+    return candidates
+
+
+def _malformed_emails(value: Any, rng: random.Random) -> List[Any]:
+    if not isinstance(value, str) or "@" not in value:
+        return []
+    local, _, domain = value.partition("@")
+    return [
+        local + domain,
+        f"{local}@@{domain}",
+        f"{local}@",
+        f"@{domain}",
+        f"{local} {rng.choice(['x', 'test', 'a'])}@{domain}",
+        f"{local}@{domain.split('.')[0]}",
+        f"{local}@{domain}.",
+    ]
+
+
+def _truncated_codes(value: Any, rng: random.Random) -> List[Any]:
+    if not isinstance(value, str) or not CODE_PATTERN.match(value):
+        return []
+    size = len(value)
+    return sorted({value[:size - 1], value[:max(size // 2, 1)], value[:1], value[rng.randint(1, size - 1):]})
+
+
+def _type_swaps(value: Any, rng: random.Random) -> List[Any]:
+    if isinstance(value, str):
+        # isdecimal, not isdigit: digits such as '²' are not valid int() input
+        swapped: List[Any] = [int(value)] if value.isdecimal() else [len(value)]
+        return swapped + [None, True, [value]]
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return [str(value), None, [value]]
+    return [None, str(value)]
+
+
+# Operators that rewrite a pool value; each returns its mutants, or [] if it does not apply
+VALUE_OPERATORS: Dict[str, Callable[[Any, random.Random], List[Any]]] = {
+    "invalid_date": _invalid_dates,
+    "malformed_email": _malformed_emails,
+    "truncated_code": _truncated_codes,
+    "type_swap": _type_swaps,
+}
+
+# Operators that change the record structure
+STRUCTURE_OPERATORS = ["missing_field"]
+
+MUTATION_OPERATORS = list(VALUE_OPERATORS) + STRUCTURE_OPERATORS
+
+
+def _mutated_pool(values: Any, operator: str) -> List[Any]:
+    """Derive the distinct mutants of a pool (or single value) for one operator."""
+    rng = random.Random(operator)
+    sources = values if isinstance(values, list) else [values]
+    mutants: List[Any] = []
+    seen = set()
+    for value in sources[:MAX_SOURCE_VALUES]:
+        for mutant in VALUE_OPERATORS[operator](value, rng)[:VARIANTS_PER_VALUE]:
+            marker = repr(mutant)
+            if marker not in seen and mutant != value:
+                seen.add(marker)
+                mutants.append(mutant)
+    return mutants
+
+
+class MutationPlan(WgsPlan):
+    """WGS plan whose records each carry exactly one field corruption.
+    
+    The positive pools are compiled once per mutation target, a (field,
+    operator) pair, with that field's pool replaced by its mutants or the
+    field removed. Each record picks a target, then fills that target's
+    pre-encoded fragments, so a mutated record costs the same as a
+    positive one. The applied operator and field are serialized under
+    MUTATION_KEY.
+    """
+    
+    def __init__(self, data: Dict[str, Any], probability_type: str, operators: Optional[List[str]] = None):
+        super().__init__(data, probability_type)
+        operators = operators or MUTATION_OPERATORS
+        unknown = [name for name in operators if name not in MUTATION_OPERATORS]
+        if unknown:
+            raise ValueError(f"Unknown mutation operator(s): {', '.join(unknown)}. "
+                             f"Available: {', '.join(MUTATION_OPERATORS)}")
+        
+        # (metadata, slots) per mutation target
+        self.targets: List[Tuple[Dict[str, str], List[Tuple[str, str, Any]]]] = []
+        for position, (field, kind, payload) in enumerate(self.slots):
+            if kind == "claim":
+                if "missing_field" in operators:
+                    self._add_target(field, "missing_field", self.slots[:position] + self.slots[position + 1:])
+                for claim_position, (claim_field, claim_kind, claim_payload) in enumerate(payload):
+                    for operator in operators:
+                        for claim_slots in self._mutate_slot(payload, claim_position, claim_kind, claim_payload,
+                                                             operator):
+                            slots = list(self.slots)
+                            slots[position] = (field, kind, claim_slots)
+                            self._add_target(f"{field}.{claim_field}", operator, slots)
+            else:
+                for operator in operators:
+                    for slots in self._mutate_slot(self.slots, position, kind, payload, operator):
+                        self._add_target(field, operator, slots)
+        
+        if not self.targets:
+            raise ValueError(f"None of the mutation operators ({', '.join(operators)}) apply to this model")
+    
+    def _add_target(self, field: str, operator: str, slots: List[Tuple[str, str, Any]]) -> None:
+        self.targets.append(({"operator": operator, "field": field}, slots))
+    
+    @staticmethod
+    def _mutate_slot(slots: List[Tuple[str, str, Any]], position: int, kind: str, payload: Any,
+                     operator: str) -> List[List[Tuple[str, str, Any]]]:
+        """Return copies of slots with one slot mutated, or [] if the operator does not apply.
+        
+        A pool slot gets one copy drawing from all its mutants. A value slot
+        keeps its kind, so the mutant is written in the value's own shape,
+        and gets one copy per mutant.
+        """
+        field = slots[position][0]
+        if operator == "missing_field":
+            return [slots[:position] + slots[position + 1:]]
+        if kind not in ("pool", "value") or payload is None:
+            return []
+        mutants = _mutated_pool(payload, operator)
+        if not mutants:
+            return []
+        replacements = [(field, "pool", mutants)] if kind == "pool" else [(field, kind, mutant) for mutant in mutants]
+        copies = []
+        for replacement in replacements:
+            mutated = list(slots)
+            mutated[position] = replacement
+            copies.append(mutated)
+        return copies
+    
+    def iter_records(self, count: int, seed: Optional[int] = None, start: int = 1,
+                     rng: Any = random) -> Iterator[Dict[str, Any]]:
+        raise ValueError("Mutated records can only be written as JSON or NDJSON")
+    
+    def iter_payloads(self, count: int, style: str = PRETTY, seed: Optional[int] = None, start: int = 1,
+                      rng: Any = random, timings: Optional[List[float]] = None) -> Iterator[bytes]:
+        """Yield `count` serialized mutated records (see WgsPlan.iter_payloads)."""
+        compiled = [self._compile_fragments(style, slots, {MUTATION_KEY: metadata})
+                    for metadata, slots in self.targets]
+        join = b"".join
+        targets = len(compiled)
+        draws = 1 + max(len(variables) for _, variables in compiled)
+        clock = time.perf_counter
+        rand = rng.random
+        
+        for number in range(start, start + count):
+            if timings is not None:
+                began = clock()
+            if seed is None:
+                parts, variables = compiled[int(rand() * targets)]
+                for position, encoded, size in variables:
+                    parts[position] = encoded[int(rand() * size)]
+            else:
+                words = record_draws(seed, number, draws)
+                parts, variables = compiled[(words[0] * targets) >> 64]
+                for (position, encoded, size), word in zip(variables, words[1:]):
+                    parts[position] = encoded[(word * size) >> 64]
+            if timings is not None:
+                sampled = clock()
+                payload = join(parts)
+                timings[0] += sampled - began
+                timings[1] += clock() - sampled
+                yield payload
+            else:
+                yield join(parts)
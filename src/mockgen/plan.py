@@ -0,0 +1,357 @@
+"""
+MockGen Plan - Compiled WGS record layout
+Resolves a model's configured pools against the WGS template once so records can be built without re-inspecting the config
+"""
+
+import hashlib
+import json
+import random
+import struct
+import time
+from functools import reduce
+from math import gcd
+from typing import Dict, List, Any, Optional, Tuple, Iterator
+
+
+# WGS template fields in the exact order from the reference template
+WGS_TEMPLATE_FIELDS = [
+    "first_proc_cd", "last_proc_cd", "email", "phone", "date_of_birth",
+    "street_address", "proc_cd", "mail_id", "address", "city", "state",
+    "zip_code", "country", "PRICNG_ZIP_STATE", "CLM_TYPE", "SRVC_FROM_DT",
+    "HCID", "PAT_BRTH_DT", "PAT_FRST_NME", "PAT_LAST_NME", "ClaimDetails"
+]
+
+DEFAULT_VALUE = "Default Value"
+
+# Serialization styles understood by WgsPlan.iter_payloads
+PRETTY = "pretty"    # json.dumps(record, indent=2, ensure_ascii=False)
+COMPACT = "compact"  # json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+X12 = "x12"          # X12 837 claim segments (see x12.compile_segments)
+
+# Largest lookup table a weighted pool is expanded into; weights are exact up to 1/WEIGHT_RESOLUTION
+WEIGHT_RESOLUTION = 1000
+
+
+def is_weighted(values: Any) -> bool:
+    """Whether a configured pool is a weighted {"values": [...], "weights": [...]} spec."""
+    return isinstance(values, dict) and "values" in values and "weights" in values
+
+
+def expand_weighted(spec: Dict[str, Any]) -> List[Any]:
+    """Expand a weighted pool into a lookup table with each value repeated by its weight.
+    
+    Uniform draws from the table then follow the weights, so weighted pools are
+    drawn exactly like plain ones. Integer weights summing to at most
+    WEIGHT_RESOLUTION are kept exactly (divided by their common divisor); other
+    weights are scaled to that many entries, with every value kept at least once.
+    """
+    values, weights = spec["values"], spec["weights"]
+    if not isinstance(values, list) or not isinstance(weights, list) or len(values) != len(weights) \
+            or not values:
+        raise ValueError("Weighted pools need non-empty 'values' and 'weights' lists of the same length")
+    if any(not isinstance(weight, (int, float)) or weight < 0 for weight in weights) or sum(weights) <= 0:
+        raise ValueError("Pool weights must be non-negative numbers with a positive sum")
+    
+    total = sum(weights)
+    if all(isinstance(weight, int) for weight in weights) and total <= WEIGHT_RESOLUTION:
+        divisor = reduce(gcd, weights)
+        copies = [weight // divisor for weight in weights]
+    else:
+        copies = [max(1, round(weight * WEIGHT_RESOLUTION / total)) if weight > 0 else 0 for weight in weights]
+    return [value for value, copy in zip(values, copies) for _ in range(copy)]
+
+
+class WgsPlan:
+    """Compiled WGS layout for one model and probability type.
+    
+    Every output field becomes a slot of one of these kinds:
+        pool    - one value drawn from a non-empty list (or weighted pool), wrapped in a one-element list
+        value   - the configured value emitted as-is
+        default - the "Default Value" fallback for fields without data
+        claim   - the ClaimDetails line, itself a list of (field, pool|value, payload) slots
+    """
+    
+    def __init__(self, data: Dict[str, Any], probability_type: str):
+        self.probability_type = probability_type
+        self.key_name = f"WGS_csbd_medicaid_{probability_type.lower()}"
+        self.slots: List[Tuple[str, str, Any]] = []
+        self.claim_slots: List[Tuple[str, str, Any]] = []
+        
+        # Template fields come first in template order, followed by any extra
+        # fields in the order they appear in the config.
+        fields = list(WGS_TEMPLATE_FIELDS)
+        fields.extend(field for field in data if field not in WGS_TEMPLATE_FIELDS)
+        
+        for field in fields:
+            values = data.get(field)
+            if field == "ClaimDetails" and isinstance(values, list) and len(values) > 0 \
+                    and isinstance(values[0], dict):
+                for claim_field, claim_values in values[0].items():
+                    if is_weighted(claim_values):
+                        self.claim_slots.append((claim_field, "pool", self._pool(claim_values)))
+                    elif isinstance(claim_values, list) and len(claim_values) > 0:
+                        self.claim_slots.append((claim_field, "pool", claim_values))
+                    else:
+                        self.claim_slots.append((claim_field, "value", claim_values))
+                self.slots.append((field, "claim", self.claim_slots))
+            elif field == "ClaimDetails" and values:
+                self.slots.append((field, "value", values))
+            elif is_weighted(values):
+                self.slots.append((field, "pool", self._pool(values)))
+            elif isinstance(values, list) and len(values) > 0:
+                self.slots.append((field, "pool", values))
+            elif values or field not in WGS_TEMPLATE_FIELDS:
+                self.slots.append((field, "value", values))
+            else:
+                self.slots.append((field, "default", None))
+    
+    def _pool(self, spec: Dict[str, Any]) -> List[Any]:
+        """Resolve a weighted pool spec into the list its slot draws from."""
+        return expand_weighted(spec)
+    
+    @property
+    def fields(self) -> List[str]:
+        """Output field names in record order."""
+        return [field for field, _, _ in self.slots]
+    
+    @property
+    def columns(self) -> List[str]:
+        """Scalar (non-ClaimDetails) field names, used as flat table columns."""
+        return [field for field, kind, _ in self.slots if kind != "claim"]
+    
+    @property
+    def claim_columns(self) -> List[str]:
+        """ClaimDetails field names, used as child table columns."""
+        return [field for field, _, _ in self.claim_slots]
+    
+    def build(self, rng: Any = random) -> Dict[str, Any]:
+        """Build one record, drawing pool values with rng.random."""
+        rand = rng.random
+        output = {}
+        for field, kind, payload in self.slots:
+            if kind == "pool":
+                output[field] = [payload[int(rand() * len(payload))]]
+            elif kind == "claim":
+                processed_claim = {}
+                for claim_field, claim_kind, claim_payload in payload:
+                    if claim_kind == "pool":
+                        processed_claim[claim_field] = claim_payload[int(rand() * len(claim_payload))]
+                    else:
+                        processed_claim[claim_field] = claim_payload
+                output[field] = [processed_claim]
+            elif kind == "value":
+                output[field] = payload
+            else:
+                output[field] = [DEFAULT_VALUE]
+        return {self.key_name: output}
+    
+    @property
+    def draw_count(self) -> int:
+        """Number of pool draws made for each record."""
+        return sum(1 for _, kind, _ in self.slots if kind == "pool") + \
+            sum(1 for _, kind, _ in self.claim_slots if kind == "pool")
+    
+    @property
+    def pool_sizes(self) -> List[int]:
+        """Sizes of the pools drawn for each record, in draw order."""
+        sizes = []
+        for _, kind, payload in self.slots:
+            if kind == "pool":
+                sizes.append(len(payload))
+            elif kind == "claim":
+                sizes.extend(len(claim_payload) for _, claim_kind, claim_payload in payload
+                             if claim_kind == "pool")
+        return sizes
+    
+    def _record_cells(self, slots: Optional[List[Tuple[str, str, Any]]] = None) -> Tuple[Dict[str, Any], List[Tuple[Any, Any, List[Any], int]]]:
+        """Build a reusable record (of self.slots, or the given slots) and its (container, key, pool, size) cells in draw order."""
+        output: Dict[str, Any] = {}
+        cells: List[Tuple[Any, Any, List[Any], int]] = []
+        
+        for field, kind, payload in (self.slots if slots is None else slots):
+            if kind == "pool":
+                cell = [None]
+                cells.append((cell, 0, payload, len(payload)))
+                output[field] = cell
+            elif kind == "claim":
+                processed_claim: Dict[str, Any] = {}
+                for claim_field, claim_kind, claim_payload in payload:
+                    processed_claim[claim_field] = claim_payload
+                    if claim_kind == "pool":
+                        cells.append((processed_claim, claim_field, claim_payload, len(claim_payload)))
+                output[field] = [processed_claim]
+            elif kind == "value":
+                output[field] = payload
+            else:
+                output[field] = [DEFAULT_VALUE]
+        return {self.key_name: output}, cells
+    
+    def iter_records(self, count: int, seed: Optional[int] = None, start: int = 1,
+                     rng: Any = random) -> Iterator[Dict[str, Any]]:
+        """Yield `count` records that all share one preallocated structure.
+        
+        The same dict (and the same one-element lists and claim dict inside it)
+        is refilled in place for every record, so the caller must consume each
+        record, e.g. serialize or flatten it, before advancing the iterator.
+        Values are drawn in the same order as build(); with a seed, record
+        number n (counting from `start`) always gets the same values.
+        """
+        record, cells = self._record_cells()
+        
+        if seed is None:
+            rand = rng.random
+            for _ in range(count):
+                for container, key, pool, size in cells:
+                    container[key] = pool[int(rand() * size)]
+                yield record
+        else:
+            draws = len(cells)
+            for number in range(start, start + count):
+                for (container, key, pool, size), word in zip(cells, record_draws(seed, number, draws)):
+                    container[key] = pool[(word * size) >> 64]
+                yield record
+    
+    def _compile_fragments(self, style: str, slots: Optional[List[Tuple[str, str, Any]]] = None,
+                           extra: Optional[Dict[str, Any]] = None,
+                           claim_extra: Optional[List[Any]] = None) -> Tuple[List[bytes], List[Tuple[int, List[bytes], int]]]:
+        """Pre-encode the static text of a record and every pool value.
+        
+        A record whose variable values are unique sentinel strings is serialized
+        once; splitting that text on the sentinels yields the static fragments,
+        and each pool is encoded once in the form it takes at its position.
+        
+        Args:
+            style: PRETTY, COMPACT or X12
+            slots: Slots to compile instead of self.slots
+            extra: Static top-level entries serialized after the record body
+            claim_extra: Pool serialized as a second ClaimDetails item, a placeholder
+                that subclasses replace with further claim lines
+        
+        Returns:
+            (parts with static fragments in place, [(position in parts, encoded pool, pool size)])
+        """
+        if style == X12:
+            if extra or claim_extra is not None:
+                raise ValueError("X12 output cannot carry extra record entries or claim lines")
+            from .x12 import compile_segments
+            return compile_segments(self, slots)
+        
+        pools: List[List[Any]] = []
+        
+        def sentinel(pool: List[Any]) -> str:
+            pools.append(pool)
+            return f"\x00{len(pools) - 1}\x00"
+        
+        output: Dict[str, Any] = {}
+        for field, kind, payload in (self.slots if slots is None else slots):
+            if kind == "pool":
+                output[field] = [sentinel(payload)]
+            elif kind == "claim":
+                output[field] = [{
+                    claim_field: sentinel(claim_payload) if claim_kind == "pool" else claim_payload
+                    for claim_field, claim_kind, claim_payload in payload
+                }]
+                if claim_extra is not None:
+                    output[field].append(sentinel(claim_extra))
+            elif kind == "value":
+                output[field] = payload
+            else:
+                output[field] = [DEFAULT_VALUE]
+        
+        record = {self.key_name: output}
+        record.update(extra or {})
+        if style == PRETTY:
+            text = json.dumps(record, indent=2, ensure_ascii=False)
+        elif style == COMPACT:
+            text = json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+        else:
+            raise ValueError(f"Unknown serialization style '{style}'")
+        
+        parts: List[bytes] = []
+        variables: List[Tuple[int, List[bytes], int]] = []
+        for number, pool in enumerate(pools):
+            marker = json.dumps(f"\x00{number}\x00")
+            static, text = text.split(marker, 1)
+            # Nested pool values continue on lines indented like the line they start on
+            line_indent = static[static.rfind("\n") + 1:]
+            line_indent = line_indent[:len(line_indent) - len(line_indent.lstrip(" "))]
+            encoded = []
+            for value in pool:
+                if style == PRETTY:
+                    rendered = json.dumps(value, indent=2, ensure_ascii=False).replace("\n", "\n" + line_indent)
+                else:
+                    rendered = json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+                encoded.append(rendered.encode("utf-8"))
+            parts.append(static.encode("utf-8"))
+            variables.append((len(parts), encoded, len(encoded)))
+            parts.append(b"")
+        parts.append(text.encode("utf-8"))
+        return parts, variables
+    
+    def iter_payloads(self, count: int, style: str = PRETTY, seed: Optional[int] = None, start: int = 1,
+                      rng: Any = random, timings: Optional[List[float]] = None) -> Iterator[bytes]:
+        """Yield `count` serialized records without building intermediate dicts.
+        
+        Output is byte-for-byte what json.dumps would produce for the records of
+        iter_records() with the same arguments. Each record costs one join over
+        a reused list of pre-encoded fragments. If a [sampling, serialization]
+        list is passed as timings, the seconds spent drawing values and joining
+        fragments are added to it.
+        """
+        parts, variables = self._compile_fragments(style)
+        join = b"".join
+        
+        if timings is not None:
+            # Separate loop so untimed runs do not pay for the clock calls
+            clock = time.perf_counter
+            rand = rng.random
+            draws = len(variables)
+            for number in range(start, start + count):
+                began = clock()
+                if seed is None:
+                    for position, encoded, size in variables:
+                        parts[position] = encoded[int(rand() * size)]
+                else:
+                    for (position, encoded, size), word in zip(variables, record_draws(seed, number, draws)):
+                        parts[position] = encoded[(word * size) >> 64]
+                sampled = clock()
+                payload = join(parts)
+                timings[0] += sampled - began
+                timings[1] += clock() - sampled
+                yield payload
+        elif seed is None:
+            rand = rng.random
+            for _ in range(count):
+                for position, encoded, size in variables:
+                    parts[position] = encoded[int(rand() * size)]
+                yield join(parts)
+        else:
+            draws = len(variables)
+            for number in range(start, start + count):
+                for (position, encoded, size), word in zip(variables, record_draws(seed, number, draws)):
+                    parts[position] = encoded[(word * size) >> 64]
+                yield join(parts)
+
+
+def record_draws(seed: int, number: int, count: int) -> Tuple[int, ...]:
+    """Return `count` 64-bit draws for one record, derived only from (seed, number).
+    
+    Records are independent of each other, so any record (or any slice of the
+    record index space) can be regenerated without replaying earlier ones.
+    """
+    if count == 0:
+        return ()
+    digest = hashlib.shake_128(f"{seed}:{number}".encode("ascii")).digest(8 * count)
+    return struct.unpack(f"<{count}Q", digest)
+
+
+def flatten_value(value: Any) -> Any:
+    """Unwrap a one-element WGS list into a scalar suitable for a table cell.
+    
+    Values that are still structured after unwrapping are encoded as JSON text.
+    """
+    if isinstance(value, list) and len(value) == 1:
+        value = value[0]
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return value
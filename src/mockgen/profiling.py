@@ -0,0 +1,130 @@
+"""
+MockGen Profiling - Per-stage timers for generation runs
+Accumulates time and counts per stage (config load, sampling, serialization, I/O) with optional cProfile and tracemalloc capture
+"""
+
+import cProfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Callable
+
+
+# Stages in the order they happen during a run
+STAGES = ["config", "plan", "sampling", "serialization", "io", "manifest", "close"]
+
+
+class StageProfiler:
+    """Accumulates wall time and item counts per generation stage.
+    
+    Generation loops keep per-record timings in local floats and report them
+    once per scenario type through record(), so hooks fire a handful of times
+    per run rather than per record.
+    
+    Stages:
+        config        - reading and parsing the config file
+        plan          - compiling the WGS plan and opening the sink
+        sampling      - drawing pool values for each record
+        serialization - encoding records to JSON bytes
+        io            - handing records to the sink (sinks that do not write JSON,
+                        such as sqlite and csv, also format their rows here)
+        manifest      - hashing records into the manifest
+        close         - flushing and closing the sink
+    """
+    
+    def __init__(self):
+        self.stages: Dict[str, List[float]] = {}
+        self.hooks: List[Callable[[str, float, int], None]] = []
+        self.peak_memory: Optional[int] = None
+        self._started = time.perf_counter()
+        self._profile: Optional[cProfile.Profile] = None
+        self._cprofile_path: Optional[Path] = None
+        self._snapshot_path: Optional[Path] = None
+    
+    def add_hook(self, callback: Callable[[str, float, int], None]) -> None:
+        """Register a callback(stage, seconds, count) called whenever a stage is recorded."""
+        self.hooks.append(callback)
+    
+    def record(self, stage: str, seconds: float, count: int = 1) -> None:
+        """Add time spent in a stage and the number of items it covered."""
+        totals = self.stages.setdefault(stage, [0.0, 0])
+        totals[0] += seconds
+        totals[1] += count
+        for hook in self.hooks:
+            hook(stage, seconds, count)
+    
+    def start_capture(self, cprofile_path: Optional[str] = None, snapshot_path: Optional[str] = None) -> None:
+        """Start cProfile and/or tracemalloc for the rest of the run.
+        
+        Args:
+            cprofile_path: Where to dump cProfile stats (.prof, readable with pstats or snakeviz)
+            snapshot_path: Where to dump the tracemalloc snapshot (load with tracemalloc.Snapshot.load)
+        """
+        if snapshot_path:
+            self._snapshot_path = Path(snapshot_path)
+            tracemalloc.start(25)
+        if cprofile_path:
+            self._cprofile_path = Path(cprofile_path)
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+    
+    def stop_capture(self) -> List[Path]:
+        """Stop capturing and write the requested dumps.
+        
+        Returns:
+            Paths of the written dump files
+        """
+        written = []
+        if self._profile is not None:
+            self._profile.disable()
+            self._profile.dump_stats(str(self._cprofile_path))
+            written.append(self._cprofile_path)
+            self._profile = None
+        if self._snapshot_path is not None and tracemalloc.is_tracing():
+            self.peak_memory = tracemalloc.get_traced_memory()[1]
+            tracemalloc.take_snapshot().dump(str(self._snapshot_path))
+            tracemalloc.stop()
+            written.append(self._snapshot_path)
+        return written
+    
+    def report(self) -> Dict[str, Any]:
+        """Return the stage breakdown.
+        
+        Returns:
+            Dictionary with 'wall_seconds', 'stages' (seconds, count, per-item microseconds
+            and share of wall time per stage) and 'peak_memory_bytes' when traced
+        """
+        wall = time.perf_counter() - self._started
+        order = STAGES + sorted(stage for stage in self.stages if stage not in STAGES)
+        stages = {}
+        for stage in order:
+            if stage not in self.stages:
+                continue
+            seconds, count = self.stages[stage]
+            stages[stage] = {
+                "seconds": seconds,
+                "count": count,
+                "us_per_item": seconds / count * 1e6 if count else 0.0,
+                "share": seconds / wall if wall > 0 else 0.0,
+            }
+        result = {"wall_seconds": wall, "stages": stages}
+        if self.peak_memory is not None:
+            result["peak_memory_bytes"] = self.peak_memory
+        return result
+    
+    def format_report(self) -> str:
+        """Render the stage breakdown as a text table."""
+        report = self.report()
+        lines = [f"{'stage':<14} {'seconds':>10} {'count':>12} {'us/item':>10} {'share':>7}"]
+        accounted = 0.0
+        for stage, entry in report["stages"].items():
+            accounted += entry["seconds"]
+            lines.append(f"{stage:<14} {entry['seconds']:>10.3f} {entry['count']:>12,} "
+                         f"{entry['us_per_item']:>10.2f} {100 * entry['share']:>6.1f}%")
+        other = max(report["wall_seconds"] - accounted, 0.0)
+        lines.append(f"{'other':<14} {other:>10.3f} {'':>12} {'':>10} "
+                     f"{100 * other / report['wall_seconds'] if report['wall_seconds'] else 0.0:>6.1f}%")
+        lines.append(f"{'wall':<14} {report['wall_seconds']:>10.3f}")
+        if "peak_memory_bytes" in report:
+            lines.append(f"peak traced memory: {report['peak_memory_bytes'] / 1024 ** 2:.1f} MiB")
+        return "\n".join(lines)
@@ -0,0 +1,143 @@
+"""
+MockGen Progress - Throughput telemetry for long generation runs
+Reports records/s, bytes/s, ETA and CPU utilization on a time-based tick
+"""
+
+import os
+import sys
+import time
+from typing import Any, Optional
+
+
+# Generation loops poll the reporter once every 1024 records (bit mask)
+CHECK_MASK = 0x3FF
+
+
+def _cpu_time() -> float:
+    """CPU time of this process plus its exited children (e.g. a finished worker pool)."""
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+def _format_bytes(count: float) -> str:
+    """Format a byte count with a binary unit."""
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if count < 1024:
+            return f"{count:.1f} {unit}"
+        count /= 1024
+    return f"{count:.1f} TiB"
+
+
+def _format_duration(seconds: float) -> str:
+    """Format seconds as H:MM:SS."""
+    minutes, secs = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}"
+
+
+class ProgressReporter:
+    """Periodic progress line for generation runs.
+    
+    Generation loops call update() with running totals only once every 1024
+    records, and update() only formats and writes a line once
+    `interval` seconds have passed, so the per-record cost is a counter and
+    a bit test. On a terminal the line is redrawn in place; otherwise one
+    line is written per tick so logs stay readable.
+    
+    Utilization is the process CPU time over wall time of the last tick,
+    i.e. how busy the generating process kept its core(s). Worker processes
+    count once they have exited, so the final summary covers a worker pool.
+    """
+    
+    def __init__(self, stream: Any = None, interval: float = 1.0):
+        self.stream = stream if stream is not None else sys.stderr
+        self.interval = interval
+        self.tty = hasattr(self.stream, "isatty") and self.stream.isatty()
+        self.total = 0
+        self.records = 0
+        self.bytes = 0
+        self.label = ""
+        self._base_records = 0
+        self._base_bytes = 0
+        self._started = time.perf_counter()
+        self._last_wall = self._started
+        self._cpu_at_start = _cpu_time()
+        self._last_cpu = self._cpu_at_start
+        self._utilization = 0.0
+        self._line_width = 0
+    
+    def expect(self, count: int) -> None:
+        """Make sure the expected total covers `count` more records than are done."""
+        self.total = max(self.total, self.records + count)
+    
+    def begin(self, label: str) -> None:
+        """Start a new stage (e.g. one scenario type); later updates are relative to it."""
+        self.label = label
+        self._base_records = self.records
+        self._base_bytes = self.bytes
+    
+    def update(self, records: int, nbytes: int = 0) -> None:
+        """Record progress within the current stage and redraw if a tick has passed.
+        
+        Args:
+            records: Records completed in the current stage
+            nbytes: Serialized bytes written in the current stage
+        """
+        self.records = self._base_records + records
+        self.bytes = self._base_bytes + nbytes
+        now = time.perf_counter()
+        if now - self._last_wall >= self.interval:
+            self._tick(now)
+    
+    def _tick(self, now: float) -> None:
+        cpu = _cpu_time()
+        wall = now - self._last_wall
+        if wall > 0:
+            self._utilization = (cpu - self._last_cpu) / wall
+        self._last_wall = now
+        self._last_cpu = cpu
+        self._write(self._status(now), final=False)
+    
+    def _status(self, now: float) -> str:
+        elapsed = now - self._started
+        rate = self.records / elapsed if elapsed > 0 else 0.0
+        parts = [f"{self.label}: " if self.label else ""]
+        if self.total:
+            parts[0] += f"{self.records:,}/{self.total:,} records ({100.0 * self.records / self.total:.1f}%)"
+        else:
+            parts[0] += f"{self.records:,} records"
+        parts.append(f"{rate:,.0f} rec/s")
+        if self.bytes:
+            parts.append(f"{_format_bytes(self.bytes / elapsed if elapsed > 0 else 0.0)}/s")
+        if self.total and rate > 0 and self.records < self.total:
+            parts.append(f"ETA {_format_duration((self.total - self.records) / rate)}")
+        parts.append(f"cpu {100.0 * self._utilization:.0f}%")
+        return " | ".join(parts)
+    
+    def _write(self, line: str, final: bool) -> None:
+        if self.tty:
+            padding = " " * max(self._line_width - len(line), 0)
+            self._line_width = len(line)
+            self.stream.write("\r" + line + padding + ("\n" if final else ""))
+        else:
+            self.stream.write(line + "\n")
+        self.stream.flush()
+    
+    def finish(self) -> Optional[str]:
+        """Write the final summary line for the whole run.
+        
+        Returns:
+            The summary line, or None if nothing was generated
+        """
+        if not self.records:
+            return None
+        now = time.perf_counter()
+        elapsed = now - self._started
+        cpu = _cpu_time()
+        # Whole-run utilization for the summary
+        self._utilization = (cpu - self._cpu_at_start) / elapsed if elapsed > 0 else 0.0
+        self.label = "done"
+        self.total = 0
+        line = self._status(now) + f" | {_format_duration(elapsed)} elapsed"
+        self._write(line, final=True)
+        return line
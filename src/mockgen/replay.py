@@ -0,0 +1,287 @@
+"""
+MockGen Replay - Rate-controlled HTTP replay of generated records
+POSTs records built on the fly from a compiled WGS plan over pooled keep-alive connections
+"""
+
+import asyncio
+import json
+import math
+import ssl
+import time
+from typing import Dict, List, Any, Optional, Iterator
+from urllib.parse import urlsplit
+
+
+class LatencyHistogram:
+    """Log-bucketed latency histogram with roughly 3% relative precision.
+    
+    Each power of two (in microseconds) is split into 16 linear sub-buckets,
+    so recording is a frexp and a dict increment regardless of the range.
+    """
+    
+    SUB_BUCKETS = 16
+    
+    def __init__(self):
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+    
+    def record(self, seconds: float) -> None:
+        """Record one latency sample in seconds."""
+        micros = max(seconds * 1e6, 1.0)
+        mantissa, exponent = math.frexp(micros)
+        index = exponent * self.SUB_BUCKETS + int((mantissa - 0.5) * 2 * self.SUB_BUCKETS)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+    
+    def bucket_upper_bound(self, index: int) -> float:
+        """Return the upper bound of a bucket in seconds."""
+        exponent, sub = divmod(index, self.SUB_BUCKETS)
+        return (0.5 + (sub + 1) / (2 * self.SUB_BUCKETS)) * 2.0 ** exponent / 1e6
+    
+    def percentile(self, q: float) -> float:
+        """Return the latency (seconds) at or below which a fraction q of samples fall."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return min(self.bucket_upper_bound(index), self.max)
+        return self.max
+    
+    def summary(self) -> Dict[str, float]:
+        """Return count, mean, min, max and common percentiles in milliseconds."""
+        if not self.count:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count * 1000,
+            "min_ms": self.min * 1000,
+            "p50_ms": self.percentile(0.50) * 1000,
+            "p90_ms": self.percentile(0.90) * 1000,
+            "p99_ms": self.percentile(0.99) * 1000,
+            "p999_ms": self.percentile(0.999) * 1000,
+            "max_ms": self.max * 1000,
+        }
+
+
+def parse_rate(rate: str) -> float:
+    """Parse a rate such as '5000/s', '300/m' or '2.5' into requests per second."""
+    value, _, unit = str(rate).strip().partition("/")
+    per = {"": 1.0, "s": 1.0, "sec": 1.0, "m": 60.0, "min": 60.0, "h": 3600.0}.get(unit.strip().lower())
+    if per is None:
+        raise ValueError(f"Invalid rate unit in '{rate}'. Use /s, /m or /h")
+    try:
+        per_second = float(value) / per
+    except ValueError:
+        raise ValueError(f"Invalid rate '{rate}'. Expected e.g. 5000/s")
+    if per_second <= 0:
+        raise ValueError(f"Rate must be positive, got '{rate}'")
+    return per_second
+
+
+def parse_headers(headers: List[str]) -> Dict[str, str]:
+    """Parse request headers given as 'Name: value' into a dictionary with both parts stripped."""
+    parsed = {}
+    for header in headers:
+        name, separator, value = str(header).partition(":")
+        name, value = name.strip(), value.strip()
+        if not separator or not name or any(char.isspace() for char in name):
+            raise ValueError(f"Invalid header '{header}'. Expected 'Name: value'")
+        if "\r" in value or "\n" in value:
+            raise ValueError(f"Invalid header '{header}'. Values cannot contain line breaks")
+        parsed[name] = value
+    return parsed
+
+
+class _HttpConnection:
+    """Minimal HTTP/1.1 keep-alive client connection on asyncio streams."""
+    
+    def __init__(self, host: str, port: int, use_ssl: bool, path: str, headers: Dict[str, str]):
+        self.host = host
+        self.port = port
+        self.ssl = ssl.create_default_context() if use_ssl else None
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+        
+        # Everything except Content-Length is identical for every request
+        lines = [f"POST {path} HTTP/1.1", f"Host: {host}:{port}", "Connection: keep-alive",
+                 "Content-Type: application/json"]
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        self._head = ("\r\n".join(lines) + "\r\nContent-Length: ").encode("latin-1")
+    
+    async def _connect(self) -> None:
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port, ssl=self.ssl)
+    
+    async def post(self, body: bytes) -> int:
+        """Send one POST and read the full response, returning the status code."""
+        if self.writer is None:
+            await self._connect()
+        self.writer.write(self._head + str(len(body)).encode("ascii") + b"\r\n\r\n" + body)
+        
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("Connection closed by server")
+        status = int(status_line.split(None, 2)[1])
+        
+        length = 0
+        chunked = False
+        close = status_line.startswith(b"HTTP/1.0")
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.partition(b":")
+            name = name.strip().lower()
+            if name == b"content-length":
+                length = int(value)
+            elif name == b"transfer-encoding" and b"chunked" in value.lower():
+                chunked = True
+            elif name == b"connection":
+                close = value.strip().lower() == b"close"
+        
+        if chunked:
+            while True:
+                size = int((await self.reader.readline()).split(b";")[0], 16)
+                await self.reader.readexactly(size + 2)
+                if size == 0:
+                    break
+        elif length:
+            await self.reader.readexactly(length)
+        
+        if close:
+            self.close()
+        return status
+    
+    def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = None
+        self.writer = None
+
+
+async def replay_records(records: Iterator[bytes], url: str, rate: float, count: int,
+                         concurrency: int = 64, headers: Optional[Dict[str, str]] = None,
+                         timeout: float = 30.0) -> Dict[str, Any]:
+    """POST records to a URL on an open-loop schedule of `rate` requests per second.
+    
+    Request i is due at start + i / rate regardless of how earlier requests
+    went, and latency is measured from that due time, so a slow server shows
+    up as growing latency instead of a silently lower send rate.
+    
+    Args:
+        records: Iterator of request bodies
+        url: Target http:// or https:// URL
+        rate: Requests per second
+        count: Number of requests to send
+        concurrency: Maximum number of in-flight requests (one connection each)
+        headers: Extra request headers
+        timeout: Per-request timeout in seconds
+    
+    Returns:
+        Statistics with sent/ok/error counts, status codes, achieved rate and latency summary
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise ValueError(f"Invalid replay URL '{url}'. Expected http://host[:port]/path")
+    use_ssl = parts.scheme == "https"
+    port = parts.port or (443 if use_ssl else 80)
+    path = parts.path or "/"
+    if parts.query:
+        path += "?" + parts.query
+    
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+    latency = LatencyHistogram()
+    service = LatencyHistogram()
+    statuses: Dict[int, int] = {}
+    errors: Dict[str, int] = {}
+    
+    async def dispatcher() -> None:
+        start = loop.time()
+        for i in range(count):
+            due = start + i / rate
+            delay = due - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            body = next(records, None)
+            if body is None:
+                break
+            # Bounded queue: if every connection is busy the backlog shows up as latency
+            await queue.put((due, body))
+        for _ in range(concurrency):
+            await queue.put(None)
+    
+    async def worker() -> None:
+        conn = _HttpConnection(parts.hostname, port, use_ssl, path, headers or {})
+        try:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    break
+                due, body = item
+                sent = loop.time()
+                try:
+                    status = await asyncio.wait_for(conn.post(body), timeout)
+                except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError) as e:
+                    conn.close()
+                    name = type(e).__name__
+                    errors[name] = errors.get(name, 0) + 1
+                    continue
+                done = loop.time()
+                latency.record(done - due)
+                service.record(done - sent)
+                statuses[status] = statuses.get(status, 0) + 1
+        finally:
+            conn.close()
+    
+    started = time.perf_counter()
+    await asyncio.gather(dispatcher(), *(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    
+    completed = sum(statuses.values())
+    return {
+        "sent": completed + sum(errors.values()),
+        "ok": sum(n for status, n in statuses.items() if 200 <= status < 300),
+        "statuses": statuses,
+        "errors": errors,
+        "elapsed_s": elapsed,
+        "achieved_rate": completed / elapsed if elapsed > 0 else 0.0,
+        "latency": latency.summary(),
+        "service_time": service.summary(),
+    }
+
+
+def iter_request_bodies(plans: List[Any], count: int) -> Iterator[bytes]:
+    """Build compact JSON request bodies on the fly, cycling through the given plans."""
+    for i in range(count):
+        record = plans[i % len(plans)].build()
+        yield json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def run_replay(plans: List[Any], url: str, rate: str, count: int, concurrency: int = 64,
+               headers: Optional[Dict[str, str]] = None, timeout: float = 30.0) -> Dict[str, Any]:
+    """Blocking wrapper around replay_records for the CLI.
+    
+    Args:
+        plans: Compiled WGS plans to draw records from (cycled per request)
+        url: Target URL
+        rate: Rate string such as '5000/s'
+        count: Number of requests to send
+        concurrency: Maximum number of in-flight requests
+        headers: Extra request headers
+        timeout: Per-request timeout in seconds
+    
+    Returns:
+        Replay statistics (see replay_records)
+    """
+    per_second = parse_rate(rate)
+    return asyncio.run(replay_records(iter_request_bodies(plans, count), url, per_second, count,
+                                      concurrency, headers, timeout))
@@ -0,0 +1,142 @@
+"""
+MockGen Scheduler - Multi-model generation over a process pool
+Runs model x scenario type tasks in worker processes that each load the config once
+"""
+
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+
+from .index import merge_index_shards
+from .shards import shard_range
+
+
+# Worker-process state installed by the pool initializer
+_WORKER_CORE: Any = None
+
+
+def _init_worker(config_files: List[str], output_dir: str, cache: Any) -> None:
+    """Load the config once per worker process."""
+    global _WORKER_CORE
+    from .core import MockGenCore
+    from .index import index_shard_path
+    _WORKER_CORE = MockGenCore(config_files, output_dir, cache)
+    # Workers index into private shards the parent merges, so they never contend for one SQLite file
+    _WORKER_CORE.index_file = index_shard_path(_WORKER_CORE.output_dir, os.getpid())
+
+
+def run_task(core: Any, task: Tuple[str, List[str]], count: int, wgs: bool,
+             options: Dict[str, Any]) -> Dict[str, Any]:
+    """Generate every scenario type of one task with the given core.
+    
+    Failures are collected instead of raised so one bad model does not stop the others.
+    
+    Returns:
+        Dictionary with 'files', 'manifests', 'runs', 'incremental', 'index'
+        (the index file written, if any) and 'errors' (model, type, error name, message)
+    """
+    model, probability_types = task
+    first_manifest = len(core.manifests)
+    first_run = len(core.runs)
+    first_update = len(core.incremental)
+    files: List[Path] = []
+    errors: List[Tuple[str, str, str, str]] = []
+    for probability_type in probability_types:
+        try:
+            generated = core.generate_probability_scenarios(probability_type, model, count, wgs, **options)
+            # Database sinks return the same file for every scenario type
+            files.extend(f for f in generated if not files or f != files[-1])
+        except BrokenPipeError:
+            raise
+        except Exception as e:
+            errors.append((model, probability_type, type(e).__name__, str(e)))
+    return {
+        "files": files,
+        "manifests": core.manifests[first_manifest:],
+        "runs": core.runs[first_run:],
+        "incremental": core.incremental[first_update:],
+        "index": core.index_file if options.get("index") else None,
+        "errors": errors,
+    }
+
+
+def _pool_task(task: Tuple[str, List[str]], count: int, wgs: bool, options: Dict[str, Any]) -> Dict[str, Any]:
+    return run_task(_WORKER_CORE, task, count, wgs, options)
+
+
+def run_tasks(core: Any, tasks: List[Tuple[str, List[str]]], count: int, wgs: bool,
+              options: Dict[str, Any], workers: Optional[int] = None) -> List[Path]:
+    """Run generation tasks, in worker processes when more than one worker is used.
+    
+    Results are merged into core (manifests, runs, incremental updates, metrics, progress) as tasks
+    finish, and failed scenario types are reported as warnings.
+    
+    Args:
+        core: The coordinating MockGenCore
+        tasks: (model, [probability types]) pairs; the types of a task run in order in one process
+        count: Records per scenario type
+        wgs: Whether to use WGS format
+        options: Keyword options for generate_probability_scenarios
+        workers: Number of worker processes (default: one per CPU, capped at the number of tasks)
+    
+    Returns:
+        List of generated file paths
+    """
+    workers = min(workers or os.cpu_count() or 1, len(tasks)) or 1
+    progress = core.progress
+    metrics = core.metrics
+    generated_files: List[Path] = []
+    
+    def merge(result: Dict[str, Any], busy: int, finished: int) -> None:
+        generated_files.extend(result["files"])
+        for model, probability_type, error, message in result["errors"]:
+            print(f"Warning: Failed to generate {probability_type} scenarios for {model}: {message}", file=sys.stderr)
+            if metrics is not None and workers > 1:
+                metrics.record_error(model, probability_type, error)
+        if workers == 1:
+            # The core already recorded its own runs, metrics and progress
+            return
+        core.manifests.extend(result["manifests"])
+        core.runs.extend(result["runs"])
+        core.incremental.extend(result["incremental"])
+        for run in result["runs"]:
+            if metrics is not None:
+                metrics.record_run(run["model"], run["probability_type"], options.get("output_format", "json"),
+                                   run["records"], run["bytes"], run["files"], run["seconds"])
+                if run["cached"]:
+                    metrics.record_cache_hit(run["model"], run["probability_type"])
+            if run["cached"]:
+                core.cache_hits += 1
+            if progress is not None:
+                progress.begin(f"{finished}/{len(tasks)} tasks, {busy}/{workers} workers busy")
+                progress.update(run["records"], run["bytes"])
+    
+    if progress is not None and options.get("target_bytes") is None:
+        shard = options.get("shard")
+        expected = shard_range(count, shard)[1] if shard is not None else count
+        progress.expect(expected * sum(len(types) for _, types in tasks))
+    
+    if workers == 1:
+        for finished, task in enumerate(tasks, 1):
+            merge(run_task(core, task, count, wgs, options), 1, finished)
+        return generated_files
+    
+    cache = core.cache
+    shards: List[Path] = []
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=([str(path) for path in core.config_files], str(core.output_dir),
+                                           cache)) as pool:
+            futures = [pool.submit(_pool_task, task, count, wgs, options) for task in tasks]
+            for finished, future in enumerate(as_completed(futures), 1):
+                result = future.result()
+                if result["index"] is not None and result["index"] not in shards:
+                    shards.append(result["index"])
+                merge(result, min(len(tasks) - finished, workers), finished)
+    finally:
+        # Merged once every worker has closed its shard, including after a failed task
+        if shards:
+            merge_index_shards(core.index_file, [shard for shard in shards if Path(shard).exists()])
+    return generated_files
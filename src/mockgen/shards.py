@@ -0,0 +1,138 @@
+"""
+MockGen Shards - Splitting one corpus across hosts
+Each shard generates a disjoint, contiguous slice of the record index space; per-shard manifests are merged into one corpus index
+"""
+
+import os
+from pathlib import Path
+from typing import Dict, List, Any, Tuple
+
+from .manifest import MANIFEST_SUFFIX, MerkleRollup, ManifestWriter, read_manifest_header
+
+
+def parse_shard(text: str) -> Tuple[int, int]:
+    """Parse a shard spec such as '3/16' into (shard, shard count), shard numbers starting at 1."""
+    try:
+        shard, shards = (int(part) for part in str(text).split("/"))
+    except ValueError:
+        raise ValueError(f"Invalid shard '{text}'. Expected k/N, e.g. 3/16")
+    if shards < 1 or not 1 <= shard <= shards:
+        raise ValueError(f"Invalid shard '{text}'. k must be between 1 and N")
+    return shard, shards
+
+
+def shard_range(count: int, shard: Tuple[int, int]) -> Tuple[int, int]:
+    """Return (first record number, record count) of a shard's slice of `count` records.
+    
+    Slices are contiguous and differ in size by at most one record.
+    """
+    number, shards = shard
+    first = (number - 1) * count // shards
+    return first + 1, number * count // shards - first
+
+
+def shard_directory(output_dir: Path, shard: Tuple[int, int]) -> Path:
+    """Per-shard output directory, so hosts sharing a filesystem never write the same file."""
+    number, shards = shard
+    width = len(str(shards))
+    return Path(output_dir) / f"shard-{number:0{width}d}-of-{shards}"
+
+
+def _find_manifests(paths: List[str]) -> List[Path]:
+    manifests = []
+    for path in paths:
+        path = Path(path)
+        if path.is_dir():
+            manifests.extend(sorted(path.glob(f"shard-*/*{MANIFEST_SUFFIX}")))
+        else:
+            manifests.append(path)
+    return manifests
+
+
+def merge_manifests(paths: List[str], output_dir: Path) -> List[Dict[str, Any]]:
+    """Stitch per-shard manifests into one manifest per model and scenario type.
+    
+    Shards are checked to be complete (every k of N present once), to come
+    from the same run parameters, to be contiguous in record numbers and
+    to match their own rollup hash. Entries are streamed into the merged
+    manifest in record order with file names made relative to it, so its
+    root equals that of the same run generated on a single host.
+    
+    Args:
+        paths: Shard manifest files, or directories holding shard-*/ subdirectories
+        output_dir: Directory for the merged manifests
+    
+    Returns:
+        One dictionary per merged manifest with 'path', 'root', 'records' and 'shards'
+    """
+    groups: Dict[Tuple[str, str], List[Tuple[int, Path, Dict[str, str]]]] = {}
+    for path in _find_manifests(paths):
+        header = read_manifest_header(path)
+        if "shard" not in header:
+            raise ValueError(f"Manifest '{path}' was not generated with --shard")
+        number, _ = parse_shard(header["shard"])
+        groups.setdefault((header["model"], header["probability_type"]), []).append((number, path, header))
+    if not groups:
+        raise ValueError("No shard manifests found")
+    
+    output_dir = Path(output_dir)
+    merged = []
+    for (model, probability_type), shards in sorted(groups.items()):
+        shards.sort(key=lambda item: item[0])
+        first_header = shards[0][2]
+        shard_count = parse_shard(first_header["shard"])[1]
+        for number, path, header in shards:
+            for key in ("total", "seed", "format", "shard"):
+                expected = first_header[key] if key != "shard" else f"{number}/{shard_count}"
+                if header.get(key) != expected:
+                    raise ValueError(f"Manifest '{path}' does not belong to the same run ({key}={header.get(key)})")
+        numbers = [number for number, _, _ in shards]
+        if len(set(numbers)) != len(numbers):
+            raise ValueError(f"Duplicate shard manifests for {model} {probability_type}")
+        missing = sorted(set(range(1, shard_count + 1)) - set(numbers))
+        if missing:
+            raise ValueError(f"Missing shard(s) {', '.join(map(str, missing))} of {shard_count} "
+                             f"for {model} {probability_type}")
+        
+        target = output_dir / f"{model}_{probability_type}_merged{MANIFEST_SUFFIX}"
+        staging = target.with_name(target.name + ".tmp")
+        header = {key: value for key, value in first_header.items() if key not in ("shard", "first", "count", "total")}
+        header.update({"count": first_header["total"], "shards": shard_count})
+        writer = ManifestWriter(staging, header)
+        try:
+            expected_index = 1
+            for _, path, _ in shards:
+                prefix = Path(os.path.relpath(path.parent, output_dir)).as_posix()
+                rollup = MerkleRollup()
+                root = None
+                with path.open("r", encoding="utf-8") as f:
+                    for line in f:
+                        if line.startswith("#"):
+                            if "root=" in line:
+                                root = line.split("root=", 1)[1].split()[0]
+                            continue
+                        index, name, offset, size, digest = line.rstrip("\n").split("\t")
+                        if int(index) != expected_index:
+                            raise ValueError(f"Manifest '{path}' has record {index} where {expected_index} "
+                                             f"was expected")
+                        expected_index += 1
+                        raw = bytes.fromhex(digest)
+                        rollup.add(raw)
+                        name = name if prefix == "." else f"{prefix}/{name}"
+                        writer.add_digest(int(index), name, int(offset), int(size), raw)
+                if root is None:
+                    raise ValueError(f"Manifest '{path}' is incomplete (no root trailer)")
+                if rollup.root() != root:
+                    raise ValueError(f"Manifest '{path}' does not match its root hash")
+            if expected_index - 1 != int(first_header["total"]):
+                raise ValueError(f"Shards of {model} {probability_type} hold {expected_index - 1} records, "
+                                 f"expected {first_header['total']}")
+        except BaseException:
+            writer.close()
+            staging.unlink()
+            raise
+        root = writer.close()
+        # Publish atomically so readers on the shared filesystem never see a partial index
+        os.replace(staging, target)
+        merged.append({"path": target, "root": root, "records": expected_index - 1, "shards": shard_count})
+    return merged
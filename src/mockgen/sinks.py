@@ -0,0 +1,591 @@
+"""
+MockGen Sinks - Output writers for generated records
+Each sink receives fully built records and is responsible for serializing and storing them
+"""
+
+import csv
+import json
+import os
+import sqlite3
+import stat
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+
+from .plan import WgsPlan, PRETTY, COMPACT, X12, flatten_value
+from .x12 import CLAIM_ID, COMPONENT, REPETITION, TERMINATOR, VERSION, x12_value
+
+
+OUTPUT_FORMATS = ["json", "ndjson", "sqlite", "csv", "tsv", "x12"]
+CLAIM_LINE_MODES = ["linked", "exploded"]
+DURABILITY_MODES = ["none", "batch", "file"]
+
+
+class JsonFileSink:
+    """Writes one pretty-printed JSON file per record (the default output format).
+    
+    Each file is created with os.open relative to a descriptor of the output
+    directory and filled with a single os.write, avoiding the path lookups,
+    buffer setup and extra fstat/ioctl/lseek calls of a Python file object.
+    Durability is configurable: none leaves write-back to the OS, batch keeps
+    up to BATCH_SIZE files open and fsyncs them together followed by the
+    directory, and file fsyncs every file and the directory before moving on.
+    """
+    
+    BATCH_SIZE = 256
+    FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_CLOEXEC", 0) | getattr(os, "O_BINARY", 0)
+    
+    def __init__(self, output_dir: Path, model: str, probability_type: str, durability: str = "none"):
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"Unknown durability '{durability}'. Choose from: {', '.join(DURABILITY_MODES)}")
+        self.output_dir = Path(output_dir)
+        self.model = model
+        self.probability_type = probability_type
+        self.durability = durability
+        self.files: List[Path] = []
+        self._pending: List[int] = []
+        self._second = -1
+        self._prefix = ""
+        self._dir_fd: Optional[int] = None
+        if os.open in os.supports_dir_fd:
+            self._dir_fd = os.open(str(self.output_dir), os.O_RDONLY | getattr(os, "O_DIRECTORY", 0))
+    
+    # Sinks with a style accept records pre-serialized by WgsPlan.iter_payloads
+    style = PRETTY
+    
+    def write(self, index: int, record: Dict[str, Any]) -> Tuple[str, int, Optional[bytes]]:
+        """Write one record to its own file.
+        
+        Returns:
+            (file name, byte offset, serialized bytes)
+        """
+        # Serialize once so the exact bytes written can also be hashed
+        return self.write_payload(index, json.dumps(record, indent=2, ensure_ascii=False).encode("utf-8"))
+    
+    def write_payload(self, index: int, payload: bytes) -> Tuple[str, int, Optional[bytes]]:
+        """Write one already serialized record to its own file."""
+        # File names carry the current second; format it once per second, not per file
+        now = int(time.time())
+        if now != self._second:
+            self._second = now
+            timestamp = datetime.fromtimestamp(now).strftime("%Y%m%d_%H%M%S")
+            self._prefix = f"{self.model}_{self.probability_type}_{timestamp}_"
+        filename = f"{self._prefix}{index:06d}.json"
+        
+        if self._dir_fd is not None:
+            fd = os.open(filename, self.FLAGS, 0o644, dir_fd=self._dir_fd)
+        else:
+            fd = os.open(str(self.output_dir / filename), self.FLAGS, 0o644)
+        try:
+            written = os.write(fd, payload)
+            if written < len(payload):
+                _write_all(fd, memoryview(payload)[written:])
+        except BaseException:
+            os.close(fd)
+            raise
+        
+        if self.durability == "none":
+            os.close(fd)
+        elif self.durability == "file":
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+            self._sync_directory()
+        else:
+            self._pending.append(fd)
+            if len(self._pending) >= self.BATCH_SIZE:
+                self._sync_batch()
+        
+        self.files.append(self.output_dir / filename)
+        return filename, 0, payload
+    
+    def _sync_batch(self) -> None:
+        """fsync and close the files of the current batch, then make their entries durable."""
+        pending, self._pending = self._pending, []
+        try:
+            for fd in pending:
+                os.fsync(fd)
+        finally:
+            for fd in pending:
+                os.close(fd)
+        self._sync_directory()
+    
+    def _sync_directory(self) -> None:
+        # Directories can only be fsynced where they can be opened (not on Windows)
+        if self._dir_fd is not None:
+            os.fsync(self._dir_fd)
+    
+    def close(self) -> List[Path]:
+        """Sync the last batch and return the files written by this sink."""
+        try:
+            if self._pending:
+                self._sync_batch()
+        finally:
+            if self._dir_fd is not None:
+                os.close(self._dir_fd)
+                self._dir_fd = None
+        return self.files
+
+
+class NdjsonSink:
+    """Streams records as newline-delimited JSON to stdout, a pipe or a file.
+    
+    Lines are collected in a binary buffer and handed to the OS in large
+    chunks with os.write. When the destination is a pipe the chunk size
+    matches the pipe capacity (enlarged where the platform allows), so each
+    write fills the pipe once and blocks while the reader catches up; the
+    reader's pace therefore throttles generation. A closed reader surfaces
+    as BrokenPipeError from write().
+    """
+    
+    FILE_CHUNK = 1024 * 1024
+    PIPE_CHUNK = 64 * 1024
+    PIPE_SIZE = 1024 * 1024
+    
+    def __init__(self, output: Optional[str], output_dir: Path, model: str, probability_type: str,
+                 tee: Optional[Path] = None):
+        if output == "-":
+            # Anything already printed must reach the pipe before our records
+            sys.stdout.flush()
+            self._fd = sys.stdout.fileno()
+            self._owns_fd = False
+            self.path: Optional[Path] = None
+            self.name = "<stdout>"
+        else:
+            if output:
+                self.path = Path(output)
+            else:
+                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                self.path = Path(output_dir) / f"{model}_{probability_type}_{timestamp}.jsonl"
+            # Records are appended so several scenario types can share one file
+            self._fd = os.open(str(self.path), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+            self._owns_fd = True
+            self.name = self.path.name
+        
+        self._chunk = self.FILE_CHUNK
+        mode = os.fstat(self._fd).st_mode
+        if stat.S_ISFIFO(mode) or stat.S_ISSOCK(mode):
+            self._chunk = self._tune_pipe()
+        
+        try:
+            self.offset = os.lseek(self._fd, 0, os.SEEK_END if self._owns_fd else os.SEEK_CUR)
+        except OSError:
+            self.offset = 0
+        self._buffer = bytearray()
+        self._broken = False
+        
+        # Optional second copy of the stream, e.g. to fill the dataset cache
+        self._tee_fd = None
+        if tee is not None:
+            self._tee_fd = os.open(str(tee), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    
+    def _tune_pipe(self) -> int:
+        """Grow the pipe buffer where supported and return the matching write chunk size."""
+        try:
+            import fcntl
+            if hasattr(fcntl, "F_SETPIPE_SZ"):
+                fcntl.fcntl(self._fd, fcntl.F_SETPIPE_SZ, self.PIPE_SIZE)
+                return fcntl.fcntl(self._fd, fcntl.F_GETPIPE_SZ)
+        except (ImportError, OSError):
+            pass
+        return self.PIPE_CHUNK
+    
+    style = COMPACT
+    
+    def write(self, index: int, record: Dict[str, Any]) -> Tuple[str, int, Optional[bytes]]:
+        """Append one record line to the buffer, flushing once a full chunk is pending.
+        
+        Returns:
+            (stream name, byte offset of the line, line bytes)
+        """
+        return self.write_payload(index, json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+    
+    def write_payload(self, index: int, payload: bytes) -> Tuple[str, int, Optional[bytes]]:
+        """Append one already serialized (compact) record as a line."""
+        line = payload + b"\n"
+        offset = self.offset
+        self.offset += len(line)
+        self._buffer += line
+        if len(self._buffer) >= self._chunk:
+            self._flush()
+        return self.name, offset, line
+    
+    def _flush(self) -> None:
+        """Write the whole buffer, retrying partial writes."""
+        try:
+            _write_all(self._fd, self._buffer)
+        except BrokenPipeError:
+            self._broken = True
+            raise
+        if self._tee_fd is not None:
+            _write_all(self._tee_fd, self._buffer)
+        self._buffer.clear()
+    
+    def close(self) -> List[Path]:
+        """Flush pending lines and close the file (stdout is left open)."""
+        try:
+            if self._buffer and not self._broken:
+                self._flush()
+        finally:
+            if self._owns_fd:
+                os.close(self._fd)
+            if self._tee_fd is not None:
+                os.close(self._tee_fd)
+        return [self.path] if self.path is not None else []
+
+
+def _write_all(fd: int, data: Any) -> None:
+    """os.write the whole buffer, retrying partial writes."""
+    with memoryview(data) as view:
+        while view:
+            written = os.write(fd, view)
+            view = view[written:]
+
+
+class SqliteSink:
+    """Loads records straight into a local SQLite database.
+    
+    Each model gets its own database with a flattened ``claims`` table (one
+    column per WGS field) and a ``claim_details`` child table keyed by
+    ``record_id``. Rows are inserted with executemany in large transactions,
+    the journal runs in WAL mode and indexes are only created on close.
+    """
+    
+    BATCH_SIZE = 10000
+    style = None
+    
+    def __init__(self, output_dir: Path, model: str, probability_type: str, plan: WgsPlan):
+        self.path = Path(output_dir) / f"{model}.sqlite"
+        self.model = model
+        self.probability_type = probability_type
+        self.plan = plan
+        self.columns = plan.columns
+        self.claim_columns = plan.claim_columns
+        self._claim_field = next((field for field, kind, _ in plan.slots if kind == "claim"), None)
+        self._claims: List[Tuple[Any, ...]] = []
+        self._details: List[Tuple[Any, ...]] = []
+        
+        self.conn = sqlite3.connect(str(self.path), isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA temp_store=MEMORY")
+        self.conn.execute("PRAGMA cache_size=-65536")
+        self._create_tables()
+        
+        row = self.conn.execute("SELECT COALESCE(MAX(record_id), 0) FROM claims").fetchone()
+        self._next_id = row[0] + 1
+        
+        claim_cols = ", ".join(_quote(c) for c in ["record_id", "model", "probability_type", "record_number"]
+                               + self.columns)
+        self._claim_sql = f"INSERT INTO claims ({claim_cols}) VALUES ({', '.join('?' * (4 + len(self.columns)))})"
+        detail_cols = ", ".join(_quote(c) for c in ["record_id", "line_number"] + self.claim_columns)
+        self._detail_sql = (f"INSERT INTO claim_details ({detail_cols}) "
+                            f"VALUES ({', '.join('?' * (2 + len(self.claim_columns)))})")
+    
+    def _create_tables(self) -> None:
+        """Create the tables, adding any columns this model has that an existing database lacks."""
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS claims (record_id INTEGER PRIMARY KEY, model TEXT, "
+            "probability_type TEXT, record_number INTEGER)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS claim_details (record_id INTEGER, line_number INTEGER)"
+        )
+        for table, columns in (("claims", self.columns), ("claim_details", self.claim_columns)):
+            existing = {row[1] for row in self.conn.execute(f"PRAGMA table_info({table})")}
+            for column in columns:
+                if column not in existing:
+                    self.conn.execute(f"ALTER TABLE {table} ADD COLUMN {_quote(column)} TEXT")
+    
+    def write(self, index: int, record: Dict[str, Any]) -> Tuple[str, int, Optional[bytes]]:
+        """Queue one record for insertion, flushing a full batch in one transaction.
+        
+        Returns:
+            (database file name, record id, None)
+        """
+        body = record[self.plan.key_name]
+        record_id = self._next_id
+        self._next_id += 1
+        
+        self._claims.append(
+            (record_id, self.model, self.probability_type, index)
+            + tuple(flatten_value(body.get(column)) for column in self.columns)
+        )
+        if self._claim_field is not None:
+            for line_number, claim in enumerate(body.get(self._claim_field) or [], 1):
+                self._details.append(
+                    (record_id, line_number)
+                    + tuple(flatten_value(claim.get(column)) for column in self.claim_columns)
+                )
+        
+        if len(self._claims) >= self.BATCH_SIZE:
+            self._flush()
+        return self.path.name, record_id, None
+    
+    def _flush(self) -> None:
+        """Insert all queued rows in a single transaction."""
+        if not self._claims:
+            return
+        self.conn.execute("BEGIN")
+        self.conn.executemany(self._claim_sql, self._claims)
+        if self._details:
+            self.conn.executemany(self._detail_sql, self._details)
+        self.conn.execute("COMMIT")
+        self._claims = []
+        self._details = []
+    
+    def close(self) -> List[Path]:
+        """Flush remaining rows, build indexes and close the database."""
+        self._flush()
+        self.conn.execute("CREATE INDEX IF NOT EXISTS claim_details_record_id ON claim_details (record_id)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS claims_probability_type ON claims (probability_type)")
+        self.conn.close()
+        return [self.path]
+
+
+class CsvSink:
+    """Streams records as flat CSV/TSV rows with one fixed column per WGS field.
+    
+    ClaimDetails lines are either written to a separate linked file keyed by
+    ``record_number`` (linked) or exploded into one row per claim line with
+    the record columns repeated (exploded). Rows go straight through
+    csv.writer into large buffered files, so nothing is held in memory.
+    """
+    
+    BUFFER_SIZE = 1024 * 1024
+    style = None
+    
+    def __init__(self, output_dir: Path, model: str, probability_type: str, plan: WgsPlan,
+                 delimiter: str = ",", claim_lines: str = "linked"):
+        if claim_lines not in CLAIM_LINE_MODES:
+            raise ValueError(f"Unknown claim line mode '{claim_lines}'. Choose from: {', '.join(CLAIM_LINE_MODES)}")
+        
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        extension = "tsv" if delimiter == "\t" else "csv"
+        base = Path(output_dir) / f"{model}_{probability_type}_{timestamp}"
+        
+        self.plan = plan
+        self.columns = plan.columns
+        self.claim_columns = plan.claim_columns
+        self.exploded = claim_lines == "exploded"
+        self._claim_field = next((field for field, kind, _ in plan.slots if kind == "claim"), None)
+        self._rows = 0
+        
+        self.path = base.with_name(base.name + f".{extension}")
+        self._file = self.path.open("w", encoding="utf-8", newline="", buffering=self.BUFFER_SIZE)
+        self._writer = csv.writer(self._file, delimiter=delimiter)
+        self.paths = [self.path]
+        
+        header = ["record_number"] + self.columns
+        if self.exploded:
+            header += ["line_number"] + [f"{self._claim_field}.{c}" for c in self.claim_columns]
+        self._writer.writerow(header)
+        
+        self._detail_file = None
+        self._detail_writer = None
+        if not self.exploded and self._claim_field is not None:
+            detail_path = base.with_name(base.name + f"_{self._claim_field}.{extension}")
+            self._detail_file = detail_path.open("w", encoding="utf-8", newline="", buffering=self.BUFFER_SIZE)
+            self._detail_writer = csv.writer(self._detail_file, delimiter=delimiter)
+            self._detail_writer.writerow(["record_number", "line_number"] + self.claim_columns)
+            self.paths.append(detail_path)
+    
+    def write(self, index: int, record: Dict[str, Any]) -> Tuple[str, int, Optional[bytes]]:
+        """Write the row(s) for one record.
+        
+        Returns:
+            (file name, data row number of the record's first row, None)
+        """
+        body = record[self.plan.key_name]
+        row = [index] + [flatten_value(body.get(column)) for column in self.columns]
+        claims = (body.get(self._claim_field) or []) if self._claim_field is not None else []
+        first_row = self._rows + 1
+        
+        if self.exploded:
+            if not claims:
+                self._writer.writerow(row)
+                self._rows += 1
+            for line_number, claim in enumerate(claims, 1):
+                self._writer.writerow(row + [line_number] + [flatten_value(claim.get(c)) for c in self.claim_columns])
+                self._rows += 1
+        else:
+            self._writer.writerow(row)
+            self._rows += 1
+            if self._detail_writer is not None:
+                for line_number, claim in enumerate(claims, 1):
+                    self._detail_writer.writerow(
+                        [index, line_number] + [flatten_value(claim.get(c)) for c in self.claim_columns]
+                    )
+        
+        return self.path.name, first_row, None
+    
+    def close(self) -> List[Path]:
+        """Flush and close the output files."""
+        self._file.close()
+        if self._detail_file is not None:
+            self._detail_file.close()
+        return self.paths
+
+
+class X12Sink:
+    """Streams claims into an X12 837 professional file.
+    
+    The file holds one interchange (ISA/GS) with one ST transaction per
+    TRANSACTION_SIZE claims. Claims come pre-serialized from
+    WgsPlan.iter_payloads in the X12 style; per claim the sink only adds the
+    HL segment and the claim number, and segment counts for SE come from
+    counting terminators. Output is buffered and written in large chunks.
+    """
+    
+    TRANSACTION_SIZE = 5000
+    FILE_CHUNK = 1024 * 1024
+    SENDER = "MOCKGEN"
+    CLAIM_MARKER = CLAIM_ID.encode("ascii")
+    
+    style = X12
+    
+    def __init__(self, output_dir: Path, model: str, probability_type: str):
+        now = datetime.now()
+        stem = f"{model}_{probability_type}_{now.strftime('%Y%m%d_%H%M%S')}"
+        # Created exclusively, so runs started within the same second get _2, _3, ... instead of overwriting
+        attempt = 1
+        while True:
+            self.path = Path(output_dir) / (f"{stem}.x12" if attempt == 1 else f"{stem}_{attempt}.x12")
+            try:
+                self._fd = os.open(str(self.path), os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0), 0o644)
+                break
+            except FileExistsError:
+                attempt += 1
+        self.name = self.path.name
+        self.receiver = x12_value(model)[:15].upper() or "RECEIVER"
+        self._date = now.strftime("%Y%m%d")
+        self._time = now.strftime("%H%M")
+        # Interchange control numbers must differ between files; derive one from the clock
+        self._control = int(now.strftime("%H%M%S%f")) % 1000000000
+        
+        self._buffer = bytearray()
+        self.offset = 0
+        self._transactions = 0
+        self._claims = 0
+        self._segments = 0
+        self._hl = 0
+        
+        self._emit(
+            f"ISA*00*{'':10}*00*{'':10}*ZZ*{self.SENDER:<15}*ZZ*{self.receiver:<15}*{now.strftime('%y%m%d')}*"
+            f"{self._time}*{REPETITION}*00501*{self._control:09d}*0*T*{COMPONENT}{TERMINATOR}"
+            f"GS*HC*{self.SENDER}*{self.receiver}*{self._date}*{self._time}*{self._control}*X*{VERSION}{TERMINATOR}"
+            .encode("ascii")
+        )
+    
+    def _emit(self, data: bytes) -> None:
+        self._buffer += data
+        self.offset += len(data)
+        if len(self._buffer) >= self.FILE_CHUNK:
+            self._flush()
+    
+    def _flush(self) -> None:
+        _write_all(self._fd, self._buffer)
+        self._buffer.clear()
+    
+    def _begin_transaction(self) -> None:
+        self._transactions += 1
+        header = (
+            f"ST*837*{self._transactions:04d}*{VERSION}{TERMINATOR}"
+            f"BHT*0019*00*{self._control}{self._transactions:04d}*{self._date}*{self._time}*CH{TERMINATOR}"
+            f"NM1*41*2*{self.SENDER}*****46*{self.SENDER}{TERMINATOR}"
+            f"PER*IC*{self.SENDER}*TE*5555550100{TERMINATOR}"
+            f"NM1*40*2*{self.receiver}*****46*{self.receiver}{TERMINATOR}"
+            f"HL*1**20*1{TERMINATOR}"
+            f"NM1*85*2*{self.SENDER} BILLING*****XX*1234567893{TERMINATOR}"
+            f"N3*1 MAIN STREET{TERMINATOR}"
+            f"N4*NASHVILLE*TN*37201{TERMINATOR}"
+            f"REF*EI*123456789{TERMINATOR}"
+        )
+        self._segments = header.count(TERMINATOR)
+        self._hl = 1
+        self._emit(header.encode("ascii"))
+    
+    def _end_transaction(self) -> None:
+        self._segments += 1
+        self._emit(f"SE*{self._segments}*{self._transactions:04d}{TERMINATOR}".encode("ascii"))
+        self._claims = 0
+    
+    def write(self, index: int, record: Dict[str, Any]) -> Tuple[str, int, Optional[bytes]]:
+        raise ValueError("X12 output is rendered from compiled WGS plans only")
+    
+    def write_payload(self, index: int, payload: bytes) -> Tuple[str, int, Optional[bytes]]:
+        """Append one pre-serialized claim to the current transaction.
+        
+        Returns:
+            (file name, byte offset of the claim's HL segment, claim bytes)
+        """
+        if self._claims == 0:
+            self._begin_transaction()
+        self._hl += 1
+        claim = b"HL*%d*1*22*0~%s" % (self._hl, payload.replace(self.CLAIM_MARKER, b"%d" % index, 1))
+        offset = self.offset
+        self._emit(claim)
+        self._segments += claim.count(b"~")
+        self._claims += 1
+        if self._claims >= self.TRANSACTION_SIZE:
+            self._end_transaction()
+        return self.name, offset, claim
+    
+    def close(self) -> List[Path]:
+        """Close the open transaction and the interchange, then flush the file."""
+        try:
+            if self._claims:
+                self._end_transaction()
+            self._emit(f"GE*{self._transactions}*{self._control}{TERMINATOR}"
+                       f"IEA*1*{self._control:09d}{TERMINATOR}".encode("ascii"))
+            self._flush()
+        finally:
+            os.close(self._fd)
+        return [self.path]
+
+
+def _quote(identifier: str) -> str:
+    """Quote a field name for use as a SQLite identifier."""
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def open_sink(output_format: str, output_dir: Path, model: str, probability_type: str,
+              plan: Optional[WgsPlan] = None, claim_lines: str = "linked", output: Optional[str] = None,
+              tee: Optional[Path] = None, durability: str = "none"):
+    """Create the sink for an output format.
+    
+    Args:
+        output_format: One of OUTPUT_FORMATS
+        output_dir: Directory to write into
+        model: Model name
+        probability_type: Scenario type
+        plan: Compiled WGS plan (required by tabular and X12 formats)
+        claim_lines: How CSV/TSV output stores ClaimDetails lines (linked or exploded)
+        output: NDJSON destination file, or '-' for stdout (default: a .jsonl file in output_dir)
+        tee: Also copy the NDJSON stream to this file
+        durability: fsync policy for JSON files (none, batch or file)
+    
+    Returns:
+        Sink instance with write(index, record) and close() methods
+    """
+    if output_format == "json":
+        return JsonFileSink(output_dir, model, probability_type, durability)
+    if output_format == "ndjson":
+        return NdjsonSink(output, output_dir, model, probability_type, tee)
+    if output_format == "sqlite":
+        if plan is None:
+            raise ValueError("SQLite output requires WGS format (--wgs)")
+        return SqliteSink(output_dir, model, probability_type, plan)
+    if output_format in ("csv", "tsv"):
+        if plan is None:
+            raise ValueError(f"{output_format.upper()} output requires WGS format (--wgs)")
+        delimiter = "\t" if output_format == "tsv" else ","
+        return CsvSink(output_dir, model, probability_type, plan, delimiter, claim_lines)
+    if output_format == "x12":
+        if plan is None:
+            raise ValueError("X12 output requires WGS format (--wgs)")
+        return X12Sink(output_dir, model, probability_type)
+    raise ValueError(f"Unknown output format '{output_format}'. Choose from: {', '.join(OUTPUT_FORMATS)}")
@@ -0,0 +1,159 @@
+"""
+MockGen Sizing - Records serialized to an exact byte size
+Grows records with extra ClaimDetails lines and pads the remainder, tracking sizes from pre-encoded fragment lengths
+"""
+
+import json
+import random
+import time
+from typing import Dict, List, Any, Optional, Tuple, Iterator
+
+from .plan import PRETTY, COMPACT, WgsPlan, record_draws
+
+
+# Top-level key holding the padding string, next to the WGS record body
+PADDING_KEY = "_padding"
+PADDING_BYTE = b" "
+
+
+class SizedPlan(WgsPlan):
+    """WGS plan whose serialized records are all exactly `record_bytes` long.
+    
+    A record is drawn as usual, then extra ClaimDetails lines, each drawn
+    like the first one, are appended while a whole line still fits. The
+    bytes left over fill a space-only string under PADDING_KEY. Sizes are
+    summed from the lengths of the pre-encoded fragments, so a record is
+    never measured or re-serialized after it is joined.
+    """
+    
+    def __init__(self, data: Dict[str, Any], probability_type: str, record_bytes: int):
+        super().__init__(data, probability_type)
+        self.record_bytes = record_bytes
+    
+    def _compile_sized(self, style: str) -> Dict[str, Any]:
+        """Compile the record fragments plus a reusable unit for one extra claim line."""
+        claim_position = next((position for position, (_, kind, _) in enumerate(self.slots) if kind == "claim"), None)
+        has_lines = claim_position is not None and bool(self.claim_slots)
+        parts, variables = self._compile_fragments(style, extra={PADDING_KEY: ""},
+                                                   claim_extra=[None] if has_lines else None)
+        
+        # The padding goes between the quotes of the empty padding string
+        last = parts[-1]
+        cut = last.rindex(b'""') + 1
+        parts[-1:] = [last[:cut], b"", last[cut:]]
+        compiled = {"parts": parts, "variables": variables, "pad": len(parts) - 2, "extra": None,
+                    "unit": None, "unit_variables": []}
+        
+        if has_lines:
+            # The placeholder item after the first line becomes the slot for the extra lines,
+            # and the separator before it moves into the line unit
+            index = sum(1 for _, kind, _ in self.slots[:claim_position] if kind == "pool") + \
+                sum(1 for _, kind, _ in self.claim_slots if kind == "pool")
+            position = variables.pop(index)[0]
+            before = parts[position - 1]
+            parts[position - 1] = before[:before.rindex(b"}") + 1]
+            compiled["extra"] = position
+            
+            # A record holding only the claim line, trimmed to the line itself
+            field = self.slots[claim_position][0]
+            unit, unit_variables = self._compile_fragments(style, [(field, "claim", self.claim_slots)])
+            if style == PRETTY:
+                empty = json.dumps({self.key_name: {field: []}}, indent=2, ensure_ascii=False)
+            elif style == COMPACT:
+                empty = json.dumps({self.key_name: {field: []}}, ensure_ascii=False, separators=(",", ":"))
+            else:
+                raise ValueError(f"Unknown serialization style '{style}'")
+            opening = empty.rindex("[]")
+            prefix = len(empty[:opening + 1].encode("utf-8"))
+            suffix = len(empty[opening + 1:].encode("utf-8"))
+            unit[0] = b"," + unit[0][prefix:]
+            unit[-1] = unit[-1][:len(unit[-1]) - suffix].rstrip()
+            compiled["unit"] = unit
+            compiled["unit_variables"] = unit_variables
+        
+        static = sum(len(part) for part in parts)
+        smallest = static + sum(min(len(value) for value in encoded) for _, encoded, _ in variables)
+        largest = static + sum(max(len(value) for value in encoded) for _, encoded, _ in variables)
+        if largest > self.record_bytes:
+            raise ValueError(f"Records of this model take up to {largest} bytes; "
+                             f"the record size must be at least that")
+        
+        lines = 0
+        if compiled["unit"] is not None:
+            line = sum(len(part) for part in compiled["unit"]) + \
+                sum(min(len(value) for value in encoded) for _, encoded, _ in compiled["unit_variables"])
+            lines = (self.record_bytes - smallest) // line
+        compiled["static"] = static
+        compiled["max_lines"] = lines
+        return compiled
+    
+    def iter_records(self, count: int, seed: Optional[int] = None, start: int = 1,
+                     rng: Any = random) -> Iterator[Dict[str, Any]]:
+        raise ValueError("Size-targeted records can only be written as JSON or NDJSON")
+    
+    def iter_payloads(self, count: int, style: str = PRETTY, seed: Optional[int] = None, start: int = 1,
+                      rng: Any = random, timings: Optional[List[float]] = None) -> Iterator[bytes]:
+        """Yield `count` serialized records of exactly record_bytes bytes (see WgsPlan.iter_payloads)."""
+        compiled = self._compile_sized(style)
+        parts: List[bytes] = compiled["parts"]
+        variables: List[Tuple[int, List[bytes], int]] = compiled["variables"]
+        unit: Optional[List[bytes]] = compiled["unit"]
+        unit_variables: List[Tuple[int, List[bytes], int]] = compiled["unit_variables"]
+        pad = compiled["pad"]
+        extra = compiled["extra"]
+        static = compiled["static"]
+        target = self.record_bytes
+        base_draws = len(variables)
+        line_draws = len(unit_variables)
+        # Enough draws for the most lines that can fit plus the one that ends the loop
+        draws = base_draws + line_draws * (compiled["max_lines"] + 1)
+        join = b"".join
+        clock = time.perf_counter
+        rand = rng.random
+        
+        for number in range(start, start + count):
+            if timings is not None:
+                began = clock()
+            if seed is None:
+                words = None
+                size = static
+                for position, encoded, choices in variables:
+                    value = encoded[int(rand() * choices)]
+                    parts[position] = value
+                    size += len(value)
+            else:
+                words = record_draws(seed, number, draws)
+                size = static
+                for (position, encoded, choices), word in zip(variables, words):
+                    value = encoded[(word * choices) >> 64]
+                    parts[position] = value
+                    size += len(value)
+            room = target - size
+            
+            if unit is not None:
+                lines = []
+                drawn = base_draws
+                while True:
+                    for position, encoded, choices in unit_variables:
+                        if words is None:
+                            value = encoded[int(rand() * choices)]
+                        else:
+                            value = encoded[(words[drawn] * choices) >> 64]
+                            drawn += 1
+                        unit[position] = value
+                    line = join(unit)
+                    if len(line) > room:
+                        break
+                    lines.append(line)
+                    room -= len(line)
+                parts[extra] = join(lines)
+            parts[pad] = PADDING_BYTE * room
+            
+            if timings is not None:
+                sampled = clock()
+                payload = join(parts)
+                timings[0] += sampled - began
+                timings[1] += clock() - sampled
+                yield payload
+            else:
+                yield join(parts)
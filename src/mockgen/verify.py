@@ -0,0 +1,382 @@
+"""
+MockGen Verify - Streaming validation of generated output corpora
+Checks every generated record against the WGS template and the configured value pools
+"""
+
+import json
+import os
+import tarfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple, Iterator
+
+from .members import MEMBER_KEY
+from .plan import WGS_TEMPLATE_FIELDS, DEFAULT_VALUE, WgsPlan
+from .sizing import PADDING_KEY
+
+
+WGS_KEY_PREFIX = "WGS_csbd_medicaid_"
+JSON_SUFFIXES = (".json",)
+JSONL_SUFFIXES = (".jsonl", ".ndjson")
+ARCHIVE_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz")
+
+# Work is handed to the process pool in units small enough that only a
+# handful of them are ever held in memory at once.
+FILES_PER_TASK = 256
+JSONL_CHUNK_BYTES = 16 * 1024 * 1024
+MAX_VIOLATIONS_PER_TASK = 100
+
+# Expectations are installed once per worker process by the pool initializer.
+_EXPECTATIONS: Dict[str, Any] = {}
+
+
+def _hashable(value: Any) -> Any:
+    """Return a hashable stand-in for a pool value."""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, sort_keys=True, ensure_ascii=False)
+    return value
+
+
+def _pool_spec(kind: str, payload: Any) -> Tuple[str, Any]:
+    """Turn a compiled plan slot into a picklable spec with hashed pools."""
+    if kind == "pool":
+        return ("pool", {_hashable(v) for v in payload})
+    return (kind, payload)
+
+
+def build_expectations(plans: Dict[Tuple[str, str], WgsPlan],
+                       member_pools: Optional[Dict[str, List[Any]]] = None) -> Dict[str, Any]:
+    """Compile per model/type field expectations from compiled WGS plans.
+    
+    Args:
+        plans: Mapping of (model, probability_type) to compiled plans
+        member_pools: Pools of the member table (see members.member_pools); records
+            carrying a MEMBER_ID take those fields from them in every scenario type
+    
+    Returns:
+        Picklable expectations consumed by verify_paths
+    """
+    specs = {}
+    for (model, prob_type), plan in plans.items():
+        fields = {}
+        for field, kind, payload in plan.slots:
+            if kind == "claim":
+                claim = {claim_field: _pool_spec(claim_kind, claim_payload)
+                         for claim_field, claim_kind, claim_payload in payload}
+                fields[field] = ("claim", claim)
+            else:
+                fields[field] = _pool_spec(kind, payload)
+        specs[f"{model}|{prob_type}"] = fields
+    
+    return {
+        "template_fields": list(WGS_TEMPLATE_FIELDS),
+        "models": sorted({model for model, _ in plans}, key=len, reverse=True),
+        "specs": specs,
+        "members": {field: _pool_spec("pool", pool) for field, pool in (member_pools or {}).items()},
+    }
+
+
+def _check_value(spec: Tuple[str, Any], value: Any, wrapped: bool) -> Optional[str]:
+    """Check a single field value against its spec, returning a message on mismatch."""
+    kind, expected = spec
+    if kind == "value":
+        return None if value == expected else "does not match configured value"
+    if kind == "default":
+        return None if value == [DEFAULT_VALUE] else "expected default value"
+    if wrapped:
+        if not isinstance(value, list) or len(value) != 1:
+            return "expected a one-element list"
+        value = value[0]
+    if _hashable(value) not in expected:
+        return f"value {value!r} not in pool"
+    return None
+
+
+def _check_record(record: Any, model: Optional[str]) -> List[str]:
+    """Validate one parsed record, returning violation messages."""
+    if isinstance(record, dict) and PADDING_KEY in record:
+        # Padding of size-targeted records (--record-bytes) is a string of spaces
+        padding = record[PADDING_KEY]
+        if not isinstance(padding, str) or padding.strip(" "):
+            return [f"{PADDING_KEY} must be a string of spaces"]
+        record = {key: value for key, value in record.items() if key != PADDING_KEY}
+    if not isinstance(record, dict) or len(record) != 1:
+        return ["record must be an object with a single WGS key"]
+    
+    key_name, output = next(iter(record.items()))
+    if not key_name.startswith(WGS_KEY_PREFIX):
+        return [f"unexpected top-level key {key_name!r}"]
+    prob_type = key_name[len(WGS_KEY_PREFIX):]
+    if not isinstance(output, dict):
+        return [f"{key_name} must be an object"]
+    
+    if model is not None:
+        candidates = [_EXPECTATIONS["specs"].get(f"{model}|{prob_type}")]
+    else:
+        candidates = [spec for name, spec in _EXPECTATIONS["specs"].items()
+                      if name.endswith(f"|{prob_type}")]
+    candidates = [spec for spec in candidates if spec is not None]
+    if not candidates:
+        return [f"no {prob_type} data configured" + (f" for {model}" if model else "")]
+    
+    # Without a known model the record only has to satisfy one configured model
+    best: Optional[List[str]] = None
+    for fields in candidates:
+        errors = _check_fields(output, fields)
+        if not errors:
+            return []
+        if best is None or len(errors) < len(best):
+            best = errors
+    return best or []
+
+
+def _check_fields(output: Dict[str, Any], fields: Dict[str, Tuple[str, Any]]) -> List[str]:
+    """Validate the fields of a WGS record body against one model's specs."""
+    errors = []
+    if MEMBER_KEY in output:
+        # Records of --members runs take their member fields from the shared member table
+        key = output[MEMBER_KEY]
+        if not isinstance(key, list) or len(key) != 1 or not isinstance(key[0], str) or not key[0]:
+            errors.append(f"{MEMBER_KEY}: expected a one-element list with the member key")
+        output = {field: value for field, value in output.items() if field != MEMBER_KEY}
+        fields = dict(fields)
+        for field, spec in _EXPECTATIONS.get("members", {}).items():
+            if field in fields:
+                fields[field] = spec
+    
+    for field in _EXPECTATIONS["template_fields"]:
+        if field not in output:
+            errors.append(f"missing field {field}")
+    
+    for field, value in output.items():
+        spec = fields.get(field)
+        if spec is None:
+            errors.append(f"unexpected field {field}")
+            continue
+        if spec[0] == "claim":
+            # Size-targeted records carry extra claim lines drawn from the same pools
+            if not isinstance(value, list) or not value or not all(isinstance(line, dict) for line in value):
+                errors.append(f"{field}: expected claim lines")
+                continue
+            for number, claim in enumerate(value, 1):
+                name = field if number == 1 else f"{field}[{number}]"
+                for claim_field, claim_spec in spec[1].items():
+                    if claim_field not in claim:
+                        errors.append(f"{name}.{claim_field}: missing")
+                        continue
+                    message = _check_value(claim_spec, claim[claim_field], wrapped=False)
+                    if message:
+                        errors.append(f"{name}.{claim_field}: {message}")
+                for claim_field in claim:
+                    if claim_field not in spec[1]:
+                        errors.append(f"{name}.{claim_field}: unexpected field")
+        else:
+            message = _check_value(spec, value, wrapped=True)
+            if message:
+                errors.append(f"{field}: {message}")
+    return errors
+
+
+def _model_for(name: str, model: Optional[str]) -> Optional[str]:
+    """Work out which model a file belongs to from its name."""
+    if model is not None:
+        return model
+    base = os.path.basename(name)
+    for candidate in _EXPECTATIONS["models"]:
+        if base.startswith(candidate + "_"):
+            return candidate
+    return None
+
+
+def _init_worker(expectations: Dict[str, Any]) -> None:
+    """Process pool initializer installing the shared expectations."""
+    global _EXPECTATIONS
+    _EXPECTATIONS = expectations
+
+
+class _TaskResult:
+    """Accumulates counts and a bounded number of violations for one task."""
+    
+    def __init__(self):
+        self.files = 0
+        self.records = 0
+        self.violation_count = 0
+        self.violations: List[Dict[str, Any]] = []
+    
+    def add(self, location: str, offset: int, messages: List[str]) -> None:
+        self.records += 1
+        if not messages:
+            return
+        self.violation_count += 1
+        if len(self.violations) < MAX_VIOLATIONS_PER_TASK:
+            self.violations.append({"file": location, "offset": offset, "errors": messages})
+    
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "files": self.files,
+            "records": self.records,
+            "violation_count": self.violation_count,
+            "violations": self.violations,
+        }
+
+
+def _check_document(result: _TaskResult, location: str, raw: bytes, model: Optional[str]) -> None:
+    """Parse and check a single-record JSON document."""
+    try:
+        record = json.loads(raw)
+    except ValueError as e:
+        result.add(location, 0, [f"invalid JSON: {e}"])
+        return
+    result.add(location, 0, _check_record(record, model))
+
+
+def iter_lines(stream, start: int, end: Optional[int]) -> Iterator[Tuple[int, bytes]]:
+    """Yield (offset, line) for the non-blank lines whose first byte lies in [start, end)."""
+    offset = start
+    if start > 0:
+        # Resume at the first record that begins inside this chunk
+        stream.seek(start - 1)
+        offset = start - 1 + len(stream.readline())
+    while end is None or offset < end:
+        line = stream.readline()
+        if not line:
+            break
+        if line.strip():
+            yield offset, line
+        offset += len(line)
+
+
+def _check_lines(result: _TaskResult, location: str, stream, start: int, end: Optional[int],
+                 model: Optional[str]) -> None:
+    """Check newline-delimited records whose first byte lies in [start, end)."""
+    for offset, line in iter_lines(stream, start, end):
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            result.add(location, offset, [f"invalid JSON: {e}"])
+        else:
+            result.add(location, offset, _check_record(record, model))
+
+
+def _verify_task(task: Tuple[str, Any], model: Optional[str]) -> Dict[str, Any]:
+    """Verify one unit of work inside a worker process."""
+    kind, payload = task
+    result = _TaskResult()
+    
+    if kind == "files":
+        for name in payload:
+            result.files += 1
+            with open(name, "rb") as f:
+                _check_document(result, name, f.read(), _model_for(name, model))
+    elif kind == "jsonl":
+        name, start, end = payload
+        result.files += 1 if start == 0 else 0
+        with open(name, "rb") as f:
+            _check_lines(result, name, f, start, end, _model_for(name, model))
+    elif kind == "archive":
+        result.files += 1
+        for member, stream in iter_archive(payload):
+            location = f"{payload}!{member}"
+            member_model = _model_for(member, model) or _model_for(payload, model)
+            if member.endswith(JSONL_SUFFIXES):
+                _check_lines(result, location, stream, 0, None, member_model)
+            else:
+                _check_document(result, location, stream.read(), member_model)
+    
+    return result.as_dict()
+
+
+def iter_archive(path: str) -> Iterator[Tuple[str, Any]]:
+    """Yield (member name, binary stream) for record members of a zip or tar archive."""
+    record_suffixes = JSON_SUFFIXES + JSONL_SUFFIXES
+    if path.endswith(".zip"):
+        with zipfile.ZipFile(path) as archive:
+            for info in archive.infolist():
+                if not info.is_dir() and info.filename.endswith(record_suffixes):
+                    with archive.open(info) as stream:
+                        yield info.filename, stream
+    else:
+        with tarfile.open(path, "r:*") as archive:
+            for info in archive:
+                if info.isfile() and info.name.endswith(record_suffixes):
+                    stream = archive.extractfile(info)
+                    if stream is not None:
+                        yield info.name, stream
+
+
+def iter_tasks(paths: List[Path]) -> Iterator[Tuple[str, Any]]:
+    """Walk input paths lazily and yield bounded units of work."""
+    batch: List[str] = []
+    for root in paths:
+        if root.is_dir():
+            names = (os.path.join(dirpath, name)
+                     for dirpath, _, filenames in os.walk(root)
+                     for name in sorted(filenames))
+        else:
+            names = iter([str(root)])
+        
+        for name in names:
+            if name.endswith(JSON_SUFFIXES):
+                batch.append(name)
+                if len(batch) >= FILES_PER_TASK:
+                    yield ("files", batch)
+                    batch = []
+            elif name.endswith(JSONL_SUFFIXES):
+                size = os.path.getsize(name)
+                for start in range(0, max(size, 1), JSONL_CHUNK_BYTES):
+                    yield ("jsonl", (name, start, start + JSONL_CHUNK_BYTES))
+            elif name.endswith(ARCHIVE_SUFFIXES):
+                yield ("archive", name)
+    if batch:
+        yield ("files", batch)
+
+
+def verify_paths(paths: List[Path], expectations: Dict[str, Any], model: Optional[str] = None,
+                 workers: Optional[int] = None, max_violations: int = 1000) -> Dict[str, Any]:
+    """Verify generated records under the given files, directories, JSONL files or archives.
+    
+    Args:
+        paths: Files or directories to verify
+        expectations: Output of build_expectations
+        model: Model name to check against (inferred from file names when omitted)
+        workers: Number of worker processes (1 verifies in-process)
+        max_violations: Maximum number of violations kept in the report
+    
+    Returns:
+        Report with file, record and violation counts and the retained violations
+    """
+    workers = workers or os.cpu_count() or 1
+    report = {"files": 0, "records": 0, "violation_count": 0, "violations": []}
+    
+    def merge(result: Dict[str, Any]) -> None:
+        report["files"] += result["files"]
+        report["records"] += result["records"]
+        report["violation_count"] += result["violation_count"]
+        room = max_violations - len(report["violations"])
+        if room > 0:
+            report["violations"].extend(result["violations"][:room])
+    
+    tasks = iter_tasks([Path(p) for p in paths])
+    
+    if workers == 1:
+        _init_worker(expectations)
+        for task in tasks:
+            merge(_verify_task(task, model))
+    else:
+        # Keep only a couple of tasks per worker in flight so memory stays
+        # bounded no matter how large the corpus is.
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(expectations,)) as executor:
+            pending = set()
+            for task in tasks:
+                pending.add(executor.submit(_verify_task, task, model))
+                if len(pending) >= workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        merge(future.result())
+            for future in pending:
+                merge(future.result())
+    
+    report["violations"].sort(key=lambda v: (v["file"], v["offset"]))
+    return report
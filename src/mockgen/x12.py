@@ -0,0 +1,141 @@
+"""
+MockGen X12 - X12 837 professional claim segments
+Renders compiled WGS plans into pre-encoded 837 segment fragments for the streaming X12 sink
+"""
+
+import re
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from string import Formatter
+from typing import Dict, List, Any, Optional, Tuple
+
+from .plan import DEFAULT_VALUE, WgsPlan
+
+
+# Delimiters: element, component, repetition and segment terminator
+ELEMENT = "*"
+COMPONENT = ":"
+REPETITION = "^"
+TERMINATOR = "~"
+VERSION = "005010X222A1"
+
+# Placeholder the sink replaces with the claim's record number (CLM01)
+CLAIM_ID = "\x00"
+
+# Subscriber and claim loops of one record. {field} is a WGS field,
+# {ClaimDetails.field} a claim line field, {field:date} a date rendered as
+# CCYYMMDD and {field:amount} a monetary amount (0 when the field is not
+# configured). Pool fields may be referenced once; unreferenced fields are
+# drawn but not written, so record n has the same values as in JSON output.
+CLAIM_SEGMENTS = [
+    "SBR*P*18*******MC",
+    "NM1*IL*1*{PAT_LAST_NME}*{PAT_FRST_NME}****MI*{HCID}",
+    "N3*{street_address}",
+    "N4*{city}*{state}*{zip_code}",
+    "DMG*D8*{PAT_BRTH_DT:date}",
+    "NM1*PR*2*MEDICAID*****PI*MEDICAID",
+    "CLM*" + CLAIM_ID + "*{CHRG_AMT:amount}***11:B:1*Y*A*Y*Y",
+    "DTP*472*D8*{SRVC_FROM_DT:date}",
+    "LX*1",
+    "SV1*HC:{ClaimDetails.proc_cd}*{ClaimDetails.CHRG_AMT:amount}*UN*1***1",
+    "DTP*472*D8*{ClaimDetails.SRVC_FROM_DT:date}",
+]
+
+# Characters that would end an element, component or segment inside a value
+_DELIMITERS = re.compile(r"[*:^~\x00-\x1f]")
+
+_DATE_FORMATS = ["%m/%d/%Y", "%Y-%m-%d", "%Y%m%d"]
+
+
+def x12_value(value: Any, spec: str = "") -> str:
+    """Render one field value as an X12 element.
+    
+    One-element WGS lists are unwrapped, delimiters are replaced with spaces
+    and, with spec 'date', recognised dates are rewritten as CCYYMMDD. With
+    spec 'amount' the value must be a number (currency signs and thousands
+    separators are dropped) and a missing value is written as 0.
+    """
+    if isinstance(value, list) and len(value) == 1:
+        value = value[0]
+    if value is None or value == DEFAULT_VALUE or value == "":
+        return "0" if spec == "amount" else ""
+    text = str(value)
+    if spec == "amount":
+        try:
+            amount = Decimal(text.replace(",", "").replace("$", "").strip())
+        except InvalidOperation:
+            raise ValueError(f"X12 charge amount {value!r} is not a number")
+        if not amount.is_finite():
+            raise ValueError(f"X12 charge amount {value!r} is not a number")
+        # X12 decimals carry no trailing zeros and no exponent
+        text = f"{amount:f}"
+        return text.rstrip("0").rstrip(".") if "." in text else text
+    if spec == "date":
+        for date_format in _DATE_FORMATS:
+            try:
+                return datetime.strptime(text, date_format).strftime("%Y%m%d")
+            except ValueError:
+                continue
+    return _DELIMITERS.sub(" ", text).strip()
+
+
+def compile_segments(plan: WgsPlan, slots: Optional[List[Tuple[str, str, Any]]] = None) -> Tuple[List[bytes], List[Tuple[int, List[bytes], int]]]:
+    """Pre-encode the claim segments of a record (see WgsPlan._compile_fragments).
+    
+    Variables are returned in the plan's draw order; pools that no segment
+    references get an always-empty position.
+    
+    Returns:
+        (parts with static fragments in place, [(position in parts, encoded pool, pool size)])
+    """
+    fields: Dict[str, Tuple[str, Any]] = {}
+    draw_order: List[str] = []
+    
+    def register(name: str, kind: str, payload: Any) -> None:
+        if kind == "pool":
+            fields[name] = ("pool", payload)
+            draw_order.append(name)
+        else:
+            fields[name] = ("static", payload if kind == "value" else None)
+    
+    for field, kind, payload in (plan.slots if slots is None else slots):
+        if kind == "claim":
+            for claim_field, claim_kind, claim_payload in payload:
+                register(f"ClaimDetails.{claim_field}", claim_kind, claim_payload)
+        else:
+            register(field, kind, payload)
+    
+    parts: List[bytes] = []
+    positions: Dict[str, Tuple[int, str]] = {}
+    static = ""
+    for segment in CLAIM_SEGMENTS:
+        for literal, name, spec, _ in Formatter().parse(segment + TERMINATOR):
+            static += literal
+            if name is None:
+                continue
+            kind, payload = fields.get(name, ("static", None))
+            if kind == "static":
+                static += x12_value(payload, spec)
+            elif name in positions:
+                raise ValueError(f"X12 segments reference pool field '{name}' more than once")
+            else:
+                parts.append(static.encode("utf-8"))
+                positions[name] = (len(parts), spec)
+                parts.append(b"")
+                static = ""
+    parts.append(static.encode("utf-8"))
+    
+    variables: List[Tuple[int, List[bytes], int]] = []
+    unused = None
+    for name in draw_order:
+        pool = fields[name][1]
+        if name in positions:
+            position, spec = positions[name]
+            variables.append((position, [x12_value(value, spec).encode("utf-8") for value in pool], len(pool)))
+        else:
+            if unused is None:
+                parts.append(b"")
+                unused = len(parts) - 1
+            variables.append((unused, [b""] * len(pool), len(pool)))
+    return parts, variables
+